@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for pryke, run against a local stand-in for the Wrike API.
+
+Run ``python -m benchmarks`` to compare against the stored baselines, or ``python -m benchmarks --save`` to replace
+them.
+"""
@@ -0,0 +1,47 @@
+from benchmarks.suite import BASELINES, METRICS, load_baselines, regressions, run, save_baselines
+
+import argparse
+import os
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark pryke against a fake Wrike.")
+    parser.add_argument("--tasks", type=int, default=100000, help="tasks in the synthetic account")
+    parser.add_argument("--users", type=int, default=10000, help="users looked up by ID")
+    parser.add_argument("--requests", type=int, default=500, help="requests sent by the request rate benchmarks")
+    parser.add_argument("--page-size", type=int, default=1000, help="tasks per page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the server waits before responding")
+    parser.add_argument("--throttle-every", type=int, default=5, help="answer every n-th request with 429")
+    parser.add_argument("--repeat", type=int, default=3, help="times each rate is measured; the best is kept")
+    parser.add_argument("--baselines", default=BASELINES, help="baselines file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="fraction of a baseline that may be lost")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baselines")
+    args = parser.parse_args(argv)
+    os.environ.setdefault('OAUTHLIB_INSECURE_TRANSPORT', '1')  # the fake server speaks plain HTTP
+
+    config = {'tasks': args.tasks, 'users': args.users, 'requests': args.requests, 'page_size': args.page_size,
+              'latency': args.latency, 'throttle_every': args.throttle_every, 'repeat': args.repeat}
+    results = run(**config)
+    baselines = load_baselines(args.baselines)
+
+    for metric in METRICS:
+        baseline = baselines.get(metric.name)
+        change = "" if not baseline else "{:+.1%}".format(results[metric.name] / baseline - 1)
+        value = "{:.1f}".format(results[metric.name]) if results[metric.name] >= 10 else "{:.4f}".format(
+            results[metric.name])
+        print("{:<32}{:>14} {:<11}{:>9}".format(metric.name, value, metric.unit, change))
+
+    if args.save:
+        save_baselines(results, config, args.baselines)
+        return 0
+
+    found = regressions(results, baselines, args.tolerance)
+    for metric, value, baseline in found:
+        print("REGRESSION {}: {:.1f} {} against a baseline of {:.1f}".format(metric.name, value, metric.unit,
+                                                                                 baseline), file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
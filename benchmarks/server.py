@@ -0,0 +1,259 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import datetime
+import itertools
+import json
+import threading
+import time
+
+
+EPOCH = datetime.datetime(2017, 1, 1)
+
+
+def timestamp(offset):
+    """
+    Wrike formatted timestamp a number of minutes after :data:`EPOCH`.
+    """
+    return (EPOCH + datetime.timedelta(minutes=offset)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_timestamp(value):
+    """
+    Parses a Wrike formatted timestamp.
+    """
+    return datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+
+
+def fake_task(index):
+    """
+    Synthetic task record shaped like the ones returned by Wrike.
+
+    Args:
+        index (int):  Position of the task; determines its ID and dates.
+
+    Returns:
+        dict
+    """
+    return {
+        "id": "TASK{:08d}".format(index),
+        "accountId": "ACCOUNT0",
+        "title": "Task {}".format(index),
+        "status": ("Active", "Completed", "Deferred", "Cancelled")[index % 4],
+        "importance": ("High", "Normal", "Low")[index % 3],
+        "createdDate": timestamp(index),
+        "updatedDate": timestamp(index + 60),
+        "dates": {"type": "Backlog"},
+        "scope": "WsTask",
+        "customStatusId": "STATUS1",
+        "permalink": "https://www.wrike.com/open.htm?id={}".format(index),
+        "priority": "{:08x}".format(index),
+        "hasAttachments": False,
+    }
+
+
+def fake_folder(index):
+    """
+    Synthetic folder record; every folder but the first is a child of the one before it.
+    """
+    return {
+        "id": "FOLDER{:06d}".format(index),
+        "title": "Folder {}".format(index),
+        "childIds": ["FOLDER{:06d}".format(index + 1)],
+        "scope": "WsFolder",
+        "createdDate": timestamp(index),
+        "updatedDate": timestamp(index + 60),
+    }
+
+
+def fake_user(index):
+    """
+    Synthetic user record.
+    """
+    return {
+        "id": "USER{:06d}".format(index),
+        "firstName": "First{}".format(index),
+        "lastName": "Last{}".format(index),
+        "type": "Person",
+        "profiles": [{"accountId": "ACCOUNT0", "email": "user{}@example.com".format(index), "role": "User"}],
+        "timezone": "US/Pacific",
+        "locale": "en",
+        "deleted": False,
+    }
+
+
+def fake_account(index):
+    """
+    Synthetic account record, created at :data:`EPOCH`.
+    """
+    return {"id": "ACCOUNT{}".format(index), "name": "Account {}".format(index), "createdDate": timestamp(0)}
+
+
+class FakeWrike:
+    """
+    Local HTTP stand-in for the Wrike API serving a synthetic account, for benchmarks.
+
+    Supports the task and folder collections (tasks are paginated with ``pageSize`` and ``nextPageToken`` and
+    filtered by ``createdDate``), one comment per task, empty attachment lists, lookups of accounts, tasks, folders
+    and users by comma separated IDs, and ``version``.  Task ``n`` is created ``n`` minutes after :data:`EPOCH`.
+
+    Attributes:
+        tasks (int):  Number of tasks in the account
+        folders (int):  Number of folders in the account
+        users (int):  Number of users in the account
+        latency (float):  Seconds added before every response
+        throttle_every (int):  Answer every n-th request with 429 Too Many Requests; 0 never throttles
+        retry_after (float):  ``Retry-After`` seconds sent with throttled responses
+        errors (dict):  Error status answered to paths after ``/api/v3/``, e.g. ``{"tasks/TASK00000001/comments": 500}``
+        requests (int):  Requests received so far
+    """
+    def __init__(self, tasks=1000, folders=100, users=100, latency=0.0, throttle_every=0, retry_after=0, errors=None):
+        self.tasks = tasks
+        self.folders = folders
+        self.users = users
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.errors = dict(errors or {})
+        self.requests = 0
+        self._counter = itertools.count(1)
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def endpoint(self):
+        """
+        Base URL of the API, to assign to :attr:`pryke.Pryke.endpoint`.
+        """
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/api/v3/".format(host, port)
+
+    def start(self):
+        """
+        Starts serving on a free local port in a background thread.
+        """
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                fake.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the server and waits for its thread to finish.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def handle(self, request):
+        """
+        Answers one request.
+
+        Args:
+            request (http.server.BaseHTTPRequestHandler):  Request being handled.
+        """
+        count = next(self._counter)
+        self.requests = count
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.throttle_every and count % self.throttle_every == 0:
+            self.send(request, 429, {"error": "rate_limit_exceeded"}, {"Retry-After": str(self.retry_after)})
+            return
+
+        url = urlparse(request.path)
+        parts = url.path.split("/")[3:]
+        if "/".join(parts) in self.errors:
+            self.send(request, self.errors["/".join(parts)], {"error": "server_error", "errorDescription": "Failed"})
+            return
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = self.route(parts, query)
+        if body is None:
+            self.send(request, 404, {"error": "not_found"})
+        else:
+            self.send(request, 200, body)
+
+    def route(self, parts, query):
+        """
+        Body of the response to a path.
+
+        Args:
+            parts (list):  Path segments after ``/api/v3/``.
+            query (dict):  Query parameters.
+
+        Returns:
+            dict: The response body, or None if the path is unknown.
+        """
+        if parts == ["version"]:
+            return {"kind": "version", "data": [{"major": 3, "minor": 0}]}
+
+        if parts == ["tasks"] or parts[-1:] == ["tasks"] and len(parts) == 3:
+            first, last = 0, self.tasks
+            if "createdDate" in query:
+                created = json.loads(query["createdDate"])
+                minute = datetime.timedelta(minutes=1)
+                if "start" in created:
+                    first = max(first, -((EPOCH - parse_timestamp(created["start"])) // minute))
+                if "end" in created:
+                    last = min(last, (parse_timestamp(created["end"]) - EPOCH) // minute + 1)
+
+            start = max(first, int(query.get("nextPageToken", first)))
+            end = min(last, start + int(query.get("pageSize", 1000)))
+            body = {"kind": "tasks", "data": [fake_task(index) for index in range(start, end)]}
+            if end < last:
+                body["nextPageToken"] = str(end)
+            return body
+
+        if len(parts) == 3 and parts[0] == "tasks" and parts[2] == "comments":
+            return {"kind": "comments", "data": [{"id": "COMMENT" + parts[1], "taskId": parts[1], "text": "Done"}]}
+
+        if len(parts) == 3 and parts[0] in ["tasks", "folders"] and parts[2] == "attachments":
+            return {"kind": "attachments", "data": []}
+
+        if parts == ["folders"] or parts[-1:] == ["folders"] and len(parts) == 3:
+            return {"kind": "folderTree", "data": [fake_folder(index) for index in range(self.folders)]}
+
+        lookups = {"accounts": (fake_account, 7, 1), "tasks": (fake_task, 4, self.tasks),
+                   "folders": (fake_folder, 6, self.folders), "users": (fake_user, 4, self.users)}
+        if len(parts) == 2 and parts[0] in lookups:
+            build, prefix, total = lookups[parts[0]]
+            indexes = [int(object_id[prefix:]) for object_id in parts[1].split(",") if object_id[prefix:].isdigit()]
+            return {"kind": parts[0], "data": [build(index) for index in indexes if index < total]}
+
+        return None
+
+    @staticmethod
+    def send(request, status, body, headers=None):
+        """
+        Writes a JSON response.
+        """
+        content = json.dumps(body).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(content)
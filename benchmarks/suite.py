@@ -0,0 +1,172 @@
+from benchmarks.server import FakeWrike, fake_task
+from collections import namedtuple
+from pryke import Pryke, Task
+
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+Metric = namedtuple('Metric', ['name', 'unit', 'higher_is_better'])
+
+METRICS = [
+    Metric('requests_per_second', 'requests/s', True),
+    Metric('throttled_requests_per_second', 'requests/s', True),
+    Metric('lookups_per_second', 'objects/s', True),
+    Metric('objects_per_second', 'objects/s', True),
+    Metric('pagination_per_second', 'objects/s', True),
+    Metric('stream_pagination_per_second', 'objects/s', True),
+    Metric('raw_pagination_per_second', 'records/s', True),
+    Metric('memory_per_100k_objects', 'MiB', False),
+    Metric('import_seconds', 's', False),
+]
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+
+def client(fake):
+    """
+    Client pointed at a fake server, with rate limiting and the object cache disabled.
+
+    The fake server speaks plain HTTP, so ``OAUTHLIB_INSECURE_TRANSPORT`` must be set while the client is used.
+
+    Args:
+        fake (:class:`FakeWrike`):  Running server.
+
+    Returns:
+        :class:`pryke.Pryke`
+    """
+    pryke = Pryke("", "", access_token="benchmark", rate_limit=None, cache_size=0)
+    pryke.endpoint = fake.endpoint
+    return pryke
+
+
+def rate(count, fn, repeat=3):
+    """
+    Calls ``fn`` ``repeat`` times and returns how many of ``count`` units the fastest call processed per second.
+    """
+    fastest = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        fastest = elapsed if fastest is None else min(fastest, elapsed)
+    return count / fastest
+
+
+def import_time(repeat=3):
+    """
+    Seconds the fastest of ``repeat`` fresh interpreters takes to ``import pryke``.
+    """
+    code = "import time; start = time.perf_counter(); import pryke; print(time.perf_counter() - start)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return min(float(subprocess.check_output([sys.executable, "-c", code], cwd=root)) for _ in range(repeat))
+
+
+def run(tasks=100000, users=10000, requests=500, page_size=1000, latency=0.0, throttle_every=5, repeat=3):
+    """
+    Runs every benchmark against freshly started fake servers.
+
+    Keyword Args:
+        tasks (int):  Tasks in the synthetic account, paginated and constructed by the throughput benchmarks.
+        users (int):  Users looked up by ID on a thread pool.
+        requests (int):  Requests sent by the request rate benchmarks.
+        page_size (int):  Tasks per page.
+        latency (float):  Seconds the server waits before every response.
+        throttle_every (int):  Answer every n-th request of the throttled benchmark with 429.
+        repeat (int):  Times each rate is measured; the best is kept, to damp noise from other processes.
+
+    Returns:
+        dict: Value of every metric in :data:`METRICS`, by name.
+    """
+    results = {}
+
+    with FakeWrike(tasks=tasks, users=users, latency=latency) as fake:
+        pryke = client(fake)
+        results['requests_per_second'] = rate(requests, lambda: [pryke.get("version") for _ in range(requests)], repeat)
+
+        ids = ["USER{:06d}".format(index) for index in range(users)]
+        results['lookups_per_second'] = rate(users, lambda: pryke.fetch_many("users", ids), repeat)
+
+        results['pagination_per_second'] = rate(tasks, lambda: sum(1 for _ in pryke.tasks(page_size=page_size)), repeat)
+        results['stream_pagination_per_second'] = rate(
+            tasks, lambda: sum(1 for _ in pryke.tasks(page_size=page_size, stream=True)), repeat)
+        results['raw_pagination_per_second'] = rate(
+            tasks, lambda: sum(1 for _ in pryke.tasks(page_size=page_size, raw=True)), repeat)
+
+        tracemalloc.start()
+        objects = list(pryke.tasks(page_size=page_size))
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results['memory_per_100k_objects'] = current / len(objects) * 100000 / 2 ** 20
+        del objects
+
+    with FakeWrike(latency=latency, throttle_every=throttle_every) as fake:
+        pryke = client(fake)
+        results['throttled_requests_per_second'] = rate(
+            requests, lambda: [pryke.get("version") for _ in range(requests)], repeat)
+
+    records = [json.loads(json.dumps(fake_task(index))) for index in range(tasks)]
+    results['objects_per_second'] = rate(tasks, lambda: [Task(pryke, data=data) for data in records], repeat)
+    results['import_seconds'] = import_time(repeat)
+
+    return results
+
+
+def load_baselines(path=BASELINES):
+    """
+    Reads stored baselines.
+
+    Returns:
+        dict: Baseline value of every metric, by name; empty if none are stored.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baselines_file:
+        return {name: entry['value'] for name, entry in json.load(baselines_file)['metrics'].items()}
+
+
+def save_baselines(results, config, path=BASELINES):
+    """
+    Stores results as the new baselines.
+
+    Args:
+        results (dict):  Metric values, as returned by :func:`run`.
+        config (dict):  Arguments the results were measured with.
+    """
+    metrics = {metric.name: {'value': round(results[metric.name], 3), 'unit': metric.unit}
+               for metric in METRICS if metric.name in results}
+    with open(path, 'w') as baselines_file:
+        json.dump({'config': config, 'metrics': metrics}, baselines_file, indent=2, sort_keys=True)
+        baselines_file.write('\n')
+
+
+def regressions(results, baselines, tolerance=0.25):
+    """
+    Metrics that are worse than their baseline by more than ``tolerance``.
+
+    Args:
+        results (dict):  Metric values, as returned by :func:`run`.
+        baselines (dict):  Baseline values, as returned by :func:`load_baselines`.
+
+    Keyword Args:
+        tolerance (float):  Allowed fraction of the baseline lost before a metric counts as regressed.
+
+    Returns:
+        list: (:class:`Metric`, value, baseline) for every regressed metric.
+    """
+    found = []
+    for metric in METRICS:
+        value, baseline = results.get(metric.name), baselines.get(metric.name)
+        if value is None or not baseline:
+            continue
+        if metric.higher_is_better:
+            regressed = value < baseline * (1 - tolerance)
+        else:
+            regressed = value > baseline * (1 + tolerance)
+        if regressed:
+            found.append((metric, value, baseline))
+    return found
@@ -1,303 +1,2789 @@
 from enum import Enum, unique
-from jinja2 import Environment, PackageLoader
-from requests_oauthlib import OAuth2Session
 
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from email.utils import parsedate_to_datetime
+
+import bisect
+import codecs
 import datetime
+import functools
+import itertools
+import json
+import os
+import random
+import re
 import requests
+import sqlite3
+import threading
 import time
+import zipfile
 
-__version__ = "0.0.1"
+try:
+    from orjson import loads as DEFAULT_JSON_LOADS
+except ImportError:
+    try:
+        from ujson import loads as DEFAULT_JSON_LOADS
+    except ImportError:
+        from json import loads as DEFAULT_JSON_LOADS
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows; FileTokenStore then only serializes threads
+    fcntl = None
 
-class Pryke:
+__version__ = "0.0.1"
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"  # format of timestamps sent and returned by Wrike
+MAX_IDS_PER_REQUEST = 100  # Wrike accepts up to 100 comma-separated IDs per lookup
+DEFAULT_WORKERS = 8  # threads used by Pryke.map when no worker count is given
+DEFAULT_RATE_LIMIT = 400  # Wrike allows 400 requests per minute per access token
+DEFAULT_MAX_RETRIES = 6  # retries of a throttled (429/503) request before giving up
+BACKOFF_BASE = 1  # seconds waited after the first throttled response
+BACKOFF_CAP = 60  # longest wait between retries, in seconds
+DEFAULT_TIMEOUT = (10, 60)  # seconds to connect and to wait between bytes received
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # bytes written to disk at a time by Attachment.download
+STREAM_CHUNK_SIZE = 64 * 1024  # bytes of a streamed collection page parsed at a time
+ATTACHMENT_WINDOW = datetime.timedelta(days=30)  # Wrike rejects createdDate ranges of 31 days or more
+EXPORT_BATCH_SIZE = 500  # tasks whose comments and attachments Pryke.export_tasks holds in memory at once
+DEFAULT_ENDPOINT = "https://www.wrike.com/api/v3/"
+TOKEN_URL = "https://www.wrike.com/oauth2/token"
+TOKEN_REFRESH_MARGIN = 300  # seconds before expiry at which an access token is refreshed
+SYNC_CLOCK_SKEW = datetime.timedelta(minutes=5)  # margin for clocks when a sync mark is the time of the query
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # upper bounds in seconds of the request latency histogram
+
+
+class PrykeError(requests.HTTPError):
     """
-    A client for interacting with the Wrike API.
+    Error response from the Wrike API.
 
     Attributes:
-        _response (request):  Last response received by client.  Used for testing.
-        endpoint (str):  Base URL for the API
-        oauth (requests_oauthlib.OAuth2Session):  OAuth Session
-        templates (jinja2.Environment):  Templates Environment
+        error (str):  Wrike's error code, e.g. "invalid_parameter", or None if the body had none
+        description (str):  Wrike's ``errorDescription``, or None if the body had none
     """
-    def __init__(self, client_id, client_secret, access_token=None):
+    def __init__(self, response, error=None, description=None):
         """
-        Initializes the client.
+        Inits the error.
 
         Args:
-            client_id (str):
-            client_secret (str):
-            access_token (str):
+            response (requests.Response):  Response with the error status.
+
+        Keyword Args:
+            error (str):  Wrike's error code.
+            description (str):  Wrike's ``errorDescription``.
         """
-        self.endpoint = "https://www.wrike.com/api/v3/"
-        self.oauth = OAuth2Session(client_id=client_id, redirect_uri="http://localhost")
-        self._response = None
+        message = "{} {} for url: {}".format(response.status_code, description or error or response.reason,
+                                             response.url)
+        super().__init__(message, response=response)
+        self.error = error
+        self.description = description
 
-        if access_token is not None:
-            self.oauth.token = access_token
-            self.oauth.access_token = access_token
+    def __reduce__(self):  # pickled with its response, e.g. when raised in a worker process
+        return type(self), (self.response, self.error, self.description)
 
-        else:
-            self.authorization_url, state = self.oauth.authorization_url("https://www.wrike.com/oauth2/authorize")
-            print(self.authorization_url)
 
-            response = input('Enter the full callback URL')
+class RateLimiter:
+    """
+    Token bucket limiting the requests a client dispatches, shared by every thread using it.
 
-            token = self.oauth.fetch_token("https://www.wrike.com/oauth2/token",
-                                           authorization_response=response,
-                                           client_secret=client_secret)
+    Tokens refill continuously at ``rate_limit`` per minute up to ``burst``.  :meth:`pause` holds back all callers,
+    e.g. after the API answers 429 Too Many Requests.
 
-        self.templates = Environment(loader=PackageLoader("pryke", "templates"))
+    Attributes:
+        rate_limit (float):  Requests allowed per minute; None for no limit.
+        burst (int):  Requests that may be dispatched back to back after an idle period.
+    """
+    def __init__(self, rate_limit=DEFAULT_RATE_LIMIT, burst=10):
+        """
+        Inits the limiter.
 
-        self.headers = requests.utils.default_headers()
-        self.headers.update({
-            'User-Agent': 'Pryke/{} (+https://github.com/wikkiewikkie/pryke)'.format(__version__)
-        })
+        Keyword Args:
+            rate_limit (float):  Requests allowed per minute; None for no limit.
+            burst (int):  Requests that may be dispatched back to back after an idle period.
+        """
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._resume_at = 0  # time.monotonic() value before which no request is dispatched
+        self._lock = threading.Lock()
 
-    def get(self, path, params={}, delay=None, headers=None):
+    def acquire(self):
         """
-        Dispatch GET request and return response.  Throttles back exponentially if API returns status codes 429 or 503
+        Blocks until a request may be dispatched, then takes a token for it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
 
-        Args:
-            path (str): relative path to get.
-            params (dict):  dictionary of request parameters.
-            delay (int):  Seconds to wait before dispatching request; used to throttle
+                if now < self._resume_at:
+                    wait = self._resume_at - now
+                elif self.rate_limit is None:
+                    return
+                else:
+                    rate = self.rate_limit / 60
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+                    self._updated = now
+
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / rate
+
+            time.sleep(wait)
+
+    def delay(self):
+        """
+        Seconds until a request could be dispatched, without taking a token.
 
         Returns:
-            requests.Response: Response
+            float
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._resume_at:
+                return self._resume_at - now
+            if self.rate_limit is None:
+                return 0.0
 
-        See Also:
-            Question no. 8 regarding rate limits
-            https://developers.wrike.com/faq/
+            rate = self.rate_limit / 60
+            tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+            return 0.0 if tokens >= 1 else (1 - tokens) / rate
+
+    def pause(self, seconds):
         """
-        if delay is not None:
-            delay **= 2
-            time.sleep(delay)
-            delay += 1
+        Holds back all requests for at least the given number of seconds.
 
-        if self.endpoint not in path:
-            path = "{}{}".format(self.endpoint, path)
+        Args:
+            seconds (float):  Seconds to wait from now.
+        """
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
 
-        if headers is None:
-            headers = self.headers
 
-        self._response = self.oauth.get(path, params=params, headers=headers)
+class ObjectCache:
+    """
+    Identity map of objects looked up by a client, keyed by (type, id).
 
-        if self._response.status_code in [429, 503]:
-            return self.get(path, params=params, delay=delay or 1, headers=headers)
+    Entries expire after ``ttl`` seconds and the least recently used entry is evicted once ``max_size`` is reached.
 
-        return self._response
+    Attributes:
+        ttl (float):  Seconds an entry stays fresh; None to never expire.
+        max_size (int):  Maximum number of entries kept.
+        hits (int):  Lookups answered from the cache.
+        misses (int):  Lookups of missing or expired objects.
+    """
+    def __init__(self, ttl=300, max_size=10000):
+        """
+        Inits the cache.
 
-    def account(self, account_id):
+        Keyword Args:
+            ttl (float):  Seconds an entry stays fresh; None to never expire.
+            max_size (int):  Maximum number of entries kept; 0 disables caching.
         """
-        Look up an account by ID
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, cls, object_id):
+        """
+        Looks up a cached object.
 
         Args:
-            account_id (str): ID for the account
+            cls (type):  :class:`PrykeObject` subclass of the object.
+            object_id (str):  ID of the object.
 
         Returns:
-            :class:`Account`:
+            :class:`PrykeObject`: The cached object, or None if it is missing or expired.
         """
-        r = self.get("accounts/{}".format(account_id))
+        key = (cls, object_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
 
-        if r.status_code == 200:
-            return Account(self, data=r.json()['data'][0])
-        return None
+            expires, obj = entry
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
 
-    def accounts(self):
-        """
-        All accounts current user has access to.
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return obj
 
-        Yields:
-            :class:`Account`: The next account.
+    def stats(self):
         """
-        r = self.get("accounts")
+        Hit rate and size of the cache.
 
-        for account_data in r.json()['data']:
-            yield Account(self, data=account_data)
+        Returns:
+            dict: ``hits``, ``misses``, ``hit_rate`` (None before the first lookup) and ``size``.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else None,
+                    'size': len(self._entries)}
 
-    def attachment(self, attachment_id):
+    def add(self, obj):
         """
-        Looks up an attachment by ID
+        Adds an object to the cache, replacing any existing entry with the same type and ID.
 
         Args:
-            attachment_id (str): ID of attachment
+            obj (:class:`PrykeObject`):  Object to cache.
 
         Returns:
-            :class:`Attachment`: The attachment
+            :class:`PrykeObject`: The object, for chaining.
         """
-        r = self.get("attachments/{}".format(attachment_id))
-        if r.status_code == 200:
-            return Attachment(self, data=r.json()['data'][0])
-        return None
+        if self.max_size <= 0 or obj.id is None:
+            return obj
 
-    def comment(self, comment_id):
+        key = (type(obj), obj.id)
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, obj)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return obj
+
+    def invalidate(self, cls=None, object_id=None):
         """
-        Look up a comment by ID
+        Drops entries from the cache.  With no arguments the whole cache is cleared.
+
+        Keyword Args:
+            cls (type):  Only drop objects of this type.
+            object_id (str):  Only drop the object with this ID.
+        """
+        with self._lock:
+            if cls is None and object_id is None:
+                self._entries.clear()
+                return
+
+            for key in [key for key in self._entries
+                        if (cls is None or key[0] is cls) and (object_id is None or key[1] == object_id)]:
+                del self._entries[key]
+
+
+class ResponseCache:
+    """
+    Persistent cache of API responses in a SQLite file, keyed by URL including parameters.
+
+    Cached responses younger than their endpoint's TTL are served without a request.  Older ones are revalidated with
+    ``If-None-Match``/``If-Modified-Since`` when the server sent an ``ETag`` or ``Last-Modified`` header, and fetched
+    again otherwise.  The least recently used responses are evicted beyond ``max_entries``.
+
+    Keys do not include the access token, so use a separate cache per token.
+
+    Attributes:
+        path (str):  Path of the SQLite database.
+        ttl (float):  Seconds a response is served without revalidation, for endpoints without their own TTL.
+        ttls (dict):  TTL per endpoint, keyed by the first path segment, e.g. {"users": 3600}.
+        max_entries (int):  Maximum number of responses kept.
+        offline (bool):  Serve only from the cache, never sending requests.
+    """
+    def __init__(self, path, ttl=0, ttls=None, max_entries=10000, offline=False):
+        """
+        Opens the cache, creating the database if needed.
 
         Args:
-            comment_id:
+            path (str):  Path of the SQLite database.
 
-        Returns:
-            :class:`Comment`: The comment
+        Keyword Args:
+            ttl (float):  Seconds a response is served without revalidation, for endpoints without their own TTL.
+            ttls (dict):  TTL per endpoint, keyed by the first path segment, e.g. {"users": 3600}.
+            max_entries (int):  Maximum number of responses kept.
+            offline (bool):  Serve only from the cache, never sending requests.
         """
-        r = self.get("comments/{}".format(comment_id))
-        if r.status_code == 200:
-            return Comment(self, data=r.json()['data'][0])
-        return None
+        self.path = path
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, status INTEGER, headers TEXT, "
+                         "body BLOB, stored REAL, accessed REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.commit()
 
-    def comments(self):
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
         """
-        All comments in all accounts
+        Closes the database.
+        """
+        with self._lock:
+            self._db.close()
 
-        Yields:
-            :class:`Comment`:
+    def ttl_for(self, path):
         """
-        r = self.get("comments")
+        TTL of the endpoint a path belongs to.
 
-        for comment_data in r.json()['data']:
-            yield Comment(self, data=comment_data)
+        Args:
+            path (str):  Path relative to the API endpoint, e.g. "users/KUAJ25LD".
 
-    def contact(self, contact_id):
+        Returns:
+            float: Seconds a response is served without revalidation.
         """
-        Look up a contact by ID
+        return self.ttls.get(path.split("/", 1)[0].split("?", 1)[0], self.ttl)
+
+    def get(self, url):
+        """
+        Looks up a cached response.
 
         Args:
-            contact_id (str):  Contact ID to look up.
+            url (str):  Full URL of the request, including parameters.
 
-        Return:
-            :class:`Contact`:
+        Returns:
+            tuple: The cached :class:`requests.Response` and the time it was stored, or (None, None).
+        """
+        with self._lock:
+            row = self._db.execute("SELECT status, headers, body, stored FROM responses WHERE url = ?",
+                                   (url,)).fetchone()
+            if row is None:
+                return None, None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+        status, headers, body, stored = row
+        response = requests.Response()
+        response.status_code = status
+        response.headers = requests.structures.CaseInsensitiveDict(json.loads(headers))
+        response._content = body
+        response.url = url
+        response.request = requests.Request("GET", url).prepare()
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response, stored
+
+    def set(self, url, response):
+        """
+        Stores a response, evicting the least recently used ones beyond :attr:`max_entries`.
+
+        Args:
+            url (str):  Full URL of the request, including parameters.
+            response (requests.Response):  Response to store.
         """
-        r = self.get("contacts/{}".format(contact_id))
+        now = time.time()
+        headers = json.dumps({key: value for key, value in response.headers.items()
+                              if key.lower() in ('content-type', 'etag', 'last-modified')})
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                             (url, response.status_code, headers, response.content, now, now))
+            self._db.execute("DELETE FROM responses WHERE url IN (SELECT url FROM responses "
+                             "ORDER BY accessed DESC, rowid DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self._db.commit()
 
-        return Contact(self, data=r.json()['data'][0])
+    def touch(self, url):
+        """
+        Marks a cached response as fresh again after the server confirmed it is unchanged.
 
-    def contacts(self):
+        Args:
+            url (str):  Full URL of the request, including parameters.
         """
-        Contacts of all users and user groups in all accessible accounts.
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE responses SET stored = ?, accessed = ? WHERE url = ?", (now, now, url))
+            self._db.commit()
 
-        Yields:
-            :class:`Contact`
+    def invalidate(self, url=None):
+        """
+        Drops a cached response, or every response when no URL is given.
 
-        See Also:
-            https://developers.wrike.com/documentation/api/methods/query-contacts#get-contacts-empty
+        Keyword Args:
+            url (str):  Full URL of the request, including parameters.
         """
-        r = self.get("contacts")
+        with self._lock:
+            if url is None:
+                self._db.execute("DELETE FROM responses")
+            else:
+                self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._db.commit()
 
-        for contact_data in r.json()['data']:
-            yield Contact(self, data=contact_data)
 
-    def folder(self, folder_id):
+class MemoryTokenStore:
+    """
+    Keeps an OAuth token in memory, shared by every client and thread using the store.
+    """
+    def __init__(self, token=None):
         """
-        Search for a single folder by ID
+        Inits the store.
 
-        Args:
-            folder_id (str):  ID of the folder
+        Keyword Args:
+            token (dict):  Initial token.
+        """
+        self._token = dict(token) if token else None
+        self._lock = threading.RLock()
+
+    def load(self):
+        """
+        Reads the stored token.
 
         Returns:
-            :class:`Folder`:
+            dict: A copy of the token, or None if none is stored.
         """
-        r = self.get("folders/{}".format(folder_id))
-        return Folder(self, data=r.json()['data'][0])
+        return dict(self._token) if self._token else None
 
-    def folders(self):
+    def save(self, token):
         """
-        Folders for all accounts
+        Replaces the stored token.
 
-        Yields:
-            :class:`Folder`:
+        Args:
+            token (dict):  Token to store.
         """
-        r = self.get("folders")
-        for folder_data in r.json()['data']:
-            yield Folder(self, data=folder_data)
+        self._token = dict(token)
 
-    def group(self, group_id):
+    def lock(self):
         """
-        Looks up a group by ID
+        Lock held while a token is refreshed, so that only one holder refreshes it.
+
+        Returns:
+            A context manager.
+        """
+        return self._lock
+
+
+class FileTokenStore(MemoryTokenStore):
+    """
+    Keeps an OAuth token in a JSON file, shared by every process using the same path.
+
+    Refreshes are serialized across processes with an advisory lock on ``<path>.lock``, and the file is replaced
+    atomically so readers never see a partial token.
+
+    Attributes:
+        path (str):  Path of the token file
+    """
+    def __init__(self, path):
+        """
+        Inits the store.
 
         Args:
-            group_id (str):  Group ID
+            path (str):  Path of the token file; created on the first save.
+        """
+        super().__init__()
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as token_file:
+                return json.load(token_file)
+        except FileNotFoundError:
+            return None
+
+    def save(self, token):
+        temporary = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as token_file:
+            json.dump(token, token_file)
+        os.replace(temporary, self.path)
+
+    @contextmanager
+    def lock(self):
+        with self._lock, open(self.path + ".lock", "a") as lock_file:
+            if fcntl is None:
+                yield
+                return
+
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class Metrics:
+    """
+    Counters and latency histograms of the requests sent by one or more clients, per endpoint template such as
+    ``tasks/{id}``, so that N+1 request patterns stand out.
 
-        Returns:
-            :class:`Group`:
+    Attributes:
+        buckets (tuple):  Upper bounds, in seconds, of the latency histogram buckets
+    """
+    ID = re.compile(r'^[A-Z0-9]{8,}(,[A-Z0-9]{8,})*$')  # one or more comma separated Wrike IDs
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
         """
-        r = self.get("groups/{}".format(group_id))
+        Inits the metrics.
 
-        return Group(self, data=r.json()['data'][0])
+        Keyword Args:
+            buckets (iterable):  Upper bounds, in seconds, of the latency histogram buckets.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
 
-    def task(self, task_id):
+    @classmethod
+    def template(cls, path):
         """
-        Looks up a task by ID
+        Endpoint template of a request path, with IDs replaced by ``{id}``.
+
+        Absolute URLs outside the API endpoint, such as attachment downloads, all share the template "download" so
+        that file names do not each add a series.
 
         Args:
-            task_id (str): Task ID
+            path (str):  Path relative to the API endpoint, e.g. "folders/IEAGIITRI4AYHYMV/tasks".
 
         Returns:
-            :class:`Task`:
+            str: The template, e.g. "folders/{id}/tasks".
+        """
+        if "://" in path:
+            return "download"
+        return "/".join("{id}" if cls.ID.match(part) else part for part in path.strip("/").split("/"))
 
-        See Also:
-            https://developers.wrike.com/documentation/api/methods/query-tasks#get-tasks-multi
+    def reset(self):
+        """
+        Sets every counter back to zero.
         """
-        # TODO: add parameters
-        r = self.get("tasks/{}".format(task_id))
-        return Task(self, data=r.json()['data'][0])
+        with self._lock:
+            self._endpoints = {}
+            self._backoff = 0.0
+            self._waited = 0.0
 
-    def tasks(self, title=None):
+    def _endpoint(self, template):
         """
-        Queries for tasks in all accounts.
+        Counters of an endpoint template, created on first use.  The caller holds the lock.
+        """
+        entry = self._endpoints.get(template)
+        if entry is None:
+            entry = self._endpoints[template] = {
+                'requests': 0, 'errors': 0, 'throttled': 0, 'retries': 0, 'bytes': 0, 'seconds': 0.0,
+                'backoff_seconds': 0.0, 'cache_hits': 0, 'cache_misses': 0, 'latency': [0] * (len(self.buckets) + 1)
+            }
+        return entry
+
+    def record(self, template, response, seconds, waited=0.0, stream=False):
+        """
+        Counts a request sent to the API.
+
+        Args:
+            template (str):  Endpoint template of the request.
+            response (requests.Response):  Response received.
+            seconds (float):  Time from sending the request to receiving the response headers, or the whole body
+                unless streamed.
 
         Keyword Args:
-            title (str):  Title filter, exact match
+            waited (float):  Seconds the request was held back by the rate limiter first.
+            stream (bool):  Whether the body is streamed; its size is then taken from ``Content-Length``.
+        """
+        if stream:
+            size = int(response.headers.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
 
-        Yields:
-            :class:`Task`:
+        with self._lock:
+            entry = self._endpoint(template)
+            entry['requests'] += 1
+            entry['errors'] += response.status_code >= 400
+            entry['throttled'] += response.status_code in [429, 503]
+            entry['bytes'] += size
+            entry['seconds'] += seconds
+            entry['latency'][bisect.bisect_left(self.buckets, seconds)] += 1
+            self._waited += waited
 
-        See Also:
-            https://developers.wrike.com/documentation/api/methods/query-tasks#get-tasks-empty
+    def retry(self, template, delay):
         """
-        params = {'title': title}
-        r = self.get("tasks", params)
-        for task_data in r.json()['data']:
-            yield Task(self, data=task_data)
+        Counts a throttled request about to be retried.
 
-    def user(self, user_id):
+        Args:
+            template (str):  Endpoint template of the request.
+            delay (float):  Seconds of backoff before the retry.
         """
-        Looks up a user by ID
+        with self._lock:
+            entry = self._endpoint(template)
+            entry['retries'] += 1
+            entry['backoff_seconds'] += delay
+            self._backoff += delay
+
+    def cache(self, template, hit):
+        """
+        Counts a lookup in the response cache.
 
         Args:
-            user_id (str):  ID for user.
+            template (str):  Endpoint template of the request.
+            hit (bool):  Whether the cached response was used, including after revalidation.
+        """
+        with self._lock:
+            self._endpoint(template)['cache_hits' if hit else 'cache_misses'] += 1
+
+    def stats(self):
+        """
+        Snapshot of every counter.
 
         Returns:
-            User
+            dict: Totals of ``requests``, ``errors``, ``throttled``, ``retries``, ``bytes``, ``backoff_seconds``
+            (backoff after throttled responses), ``wait_seconds`` (time held back by the rate limiter, including
+            backoff) and ``http_cache`` hits, plus the same counters and a cumulative ``latency`` histogram keyed by
+            upper bound for every template under ``endpoints``.
+        """
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        with self._lock:
+            endpoints = {}
+            for template, entry in self._endpoints.items():
+                endpoints[template] = dict(entry, latency=dict(zip(bounds, itertools.accumulate(entry['latency']))))
+            waited = self._waited
+            backoff = self._backoff
+
+        totals = {key: sum(entry[key] for entry in endpoints.values())
+                  for key in ['requests', 'errors', 'throttled', 'retries', 'bytes', 'cache_hits', 'cache_misses']}
+        lookups = totals['cache_hits'] + totals['cache_misses']
+        return {
+            'requests': totals['requests'],
+            'errors': totals['errors'],
+            'throttled': totals['throttled'],
+            'retries': totals['retries'],
+            'bytes': totals['bytes'],
+            'backoff_seconds': backoff,
+            'wait_seconds': waited,
+            'http_cache': {'hits': totals['cache_hits'], 'misses': totals['cache_misses'],
+                           'hit_rate': totals['cache_hits'] / lookups if lookups else None},
+            'endpoints': endpoints,
+        }
+
+
+def prometheus_text(stats, prefix="pryke"):
+    """
+    Formats statistics in the Prometheus text exposition format.
+
+    Args:
+        stats (dict):  Statistics as returned by :meth:`Pryke.stats`.
+
+    Keyword Args:
+        prefix (str):  Prefix of every metric name.
+
+    Returns:
+        str
+    """
+    lines = []
+
+    def metric(name, kind, description, samples):
+        lines.append("# HELP {}_{} {}".format(prefix, name, description))
+        lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+        for suffix, labels, value in samples:
+            label_text = ",".join('{}="{}"'.format(key, str(label).replace('\\', '\\\\').replace('"', '\\"'))
+                                  for key, label in labels)
+            lines.append("{}_{}{}{} {}".format(prefix, name, suffix, "{" + label_text + "}" if labels else "",
+                                               float(value) if isinstance(value, float) else value))
+
+    endpoints = sorted(stats['endpoints'].items())
+    for name, key, description in [
+            ('requests_total', 'requests', 'Requests sent to the Wrike API.'),
+            ('request_errors_total', 'errors', 'Responses with an error status code.'),
+            ('throttled_total', 'throttled', 'Responses with status code 429 or 503.'),
+            ('retries_total', 'retries', 'Throttled requests retried.'),
+            ('response_bytes_total', 'bytes', 'Bytes of response bodies received.'),
+            ('backoff_seconds_total', 'backoff_seconds', 'Seconds of backoff after throttled responses.'),
+            ('http_cache_hits_total', 'cache_hits', 'Requests answered from the response cache.'),
+            ('http_cache_misses_total', 'cache_misses', 'Requests missing from the response cache.')]:
+        metric(name, 'counter', description,
+               [("", [('endpoint', template)], entry[key]) for template, entry in endpoints])
+
+    samples = []
+    for template, entry in endpoints:
+        samples.extend(("_bucket", [('endpoint', template), ('le', bound)], count)
+                       for bound, count in entry['latency'].items())
+        samples.append(("_sum", [('endpoint', template)], entry['seconds']))
+        samples.append(("_count", [('endpoint', template)], entry['requests']))
+    metric('request_duration_seconds', 'histogram', 'Latency of requests sent to the Wrike API.', samples)
+
+    metric('limiter_wait_seconds_total', 'counter', 'Seconds requests were held back by the rate limiter.',
+           [("", [], stats['wait_seconds'])])
+    if 'object_cache' in stats:
+        metric('object_cache_hits_total', 'counter', 'Lookups answered from the object cache.',
+               [("", [], stats['object_cache']['hits'])])
+        metric('object_cache_misses_total', 'counter', 'Lookups missing from the object cache.',
+               [("", [], stats['object_cache']['misses'])])
+
+    return "\n".join(lines) + "\n"
+
+
+class Pryke:
+    """
+    A client for interacting with the Wrike API.
+
+    Attributes:
+        _response (request):  Last response received by client.  Used for testing.
+        cache (:class:`ObjectCache`):  Objects already looked up by ID
+        http_cache (:class:`ResponseCache`):  Persistent cache of API responses, or None
+        json_loads (callable):  Decodes response bodies; orjson or ujson when installed
+        endpoint (str):  Base URL for the API
+        oauth (requests_oauthlib.OAuth2Session):  OAuth Session
+        session (requests.Session):  Pooled session for requests outside the Wrike API, e.g. external attachments
+        timeout (float or tuple):  Connect and read timeouts for every request
+        templates (jinja2.Environment):  Templates Environment, created on first use
+        template_cache (str):  Directory of compiled template bytecode, or None to compile in every process
+        token_store (:class:`MemoryTokenStore`):  Where the OAuth token is kept and shared when refreshed
+        refresh_margin (float):  Seconds before expiry at which the access token is refreshed
+        limiter (:class:`RateLimiter`):  Throttles requests dispatched by the client
+        max_retries (int):  Retries of a throttled request before its response is returned as is
+        metrics (:class:`Metrics`):  Counters of the requests sent, see :meth:`stats`
+        hooks (dict):  Callables run around every :meth:`get`; "before_request" hooks are called with the relative
+            path and parameters, "after_request" hooks with those, the response and the seconds it took
+    """
+    def __init__(self, client_id, client_secret, access_token=None, cache_ttl=300, cache_size=10000,
+                 rate_limit=DEFAULT_RATE_LIMIT, max_retries=DEFAULT_MAX_RETRIES, limiter=None,
+                 pool_connections=requests.adapters.DEFAULT_POOLSIZE, pool_maxsize=requests.adapters.DEFAULT_POOLSIZE,
+                 keep_alive=True, timeout=DEFAULT_TIMEOUT, http_cache=None, json_loads=DEFAULT_JSON_LOADS,
+                 metrics=None, template_cache=None, token=None, token_store=None,
+                 refresh_margin=TOKEN_REFRESH_MARGIN, interactive=True, endpoint=DEFAULT_ENDPOINT):
+        """
+        Initializes the client.
+
+        Args:
+            client_id (str):
+            client_secret (str):
+            access_token (str):
+
+        Keyword Args:
+            cache_ttl (float):  Seconds a looked up object is reused before being fetched again; None to never expire.
+            cache_size (int):  Maximum number of looked up objects kept; 0 disables the cache.
+            rate_limit (float):  Requests per minute the client dispatches at most; None for no limit.
+            max_retries (int):  Retries of a throttled (429/503) request.
+            limiter (:class:`RateLimiter`):  Limiter to share with other clients using the same token; overrides
+                ``rate_limit``.
+            pool_connections (int):  Number of hosts to keep connection pools for.
+            pool_maxsize (int):  Maximum connections kept open per host.
+            keep_alive (bool):  Reuse connections between requests; False closes each connection after its response.
+            timeout (float or tuple):  Seconds to wait for a connection and for data, as accepted by :mod:`requests`.
+            http_cache (:class:`ResponseCache`):  Persistent cache for API responses.
+            json_loads (callable):  Decoder for response bodies, taking bytes.
+            metrics (:class:`Metrics`):  Metrics to share with other clients.
+            template_cache (str):  Directory to keep compiled template bytecode in, see :meth:`precompile_templates`.
+            token (dict):  OAuth token with ``access_token``, ``refresh_token`` and ``expires_at``; it is refreshed
+                automatically before it expires.  Defaults to the token in ``token_store``.
+            token_store (:class:`MemoryTokenStore`):  Store to share refreshed tokens through, e.g. a
+                :class:`FileTokenStore` used by several processes.
+            refresh_margin (float):  Seconds before expiry at which the access token is refreshed.
+            interactive (bool):  Ask for authorization on the console when no token is given or stored; when False a
+                ValueError is raised instead.
+            endpoint (str):  Base URL for the API, e.g. of another Wrike data center.
+
+        Raises:
+            ValueError: If there is no token and ``interactive`` is False.
+        """
+        from requests_oauthlib import OAuth2Session
+
+        self.endpoint = endpoint
+        self.oauth = OAuth2Session(client_id=client_id, redirect_uri="http://localhost")
+        self.cache = ObjectCache(ttl=cache_ttl, max_size=cache_size)
+        self._response = None
+        self.session = requests.Session()
+        self.timeout = timeout
+        self._pool_connections = pool_connections
+        self._pool_size = 0
+        self._ensure_pool(pool_maxsize)
+        self.limiter = limiter if limiter is not None else RateLimiter(rate_limit)
+        self.max_retries = max_retries
+        self.http_cache = http_cache
+        self.json_loads = json_loads
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.hooks = {'before_request': [], 'after_request': []}
+
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_store = token_store if token_store is not None else MemoryTokenStore()
+        self.refresh_margin = refresh_margin
+
+        if access_token is not None:
+            self.oauth.token = access_token
+            self.oauth.access_token = access_token
+
+        elif token is not None or self.token_store.load() is not None:
+            if token is not None:
+                self.token_store.save(token)
+            self.oauth.token = self.token_store.load()
+
+        elif not interactive:
+            raise ValueError("No OAuth token was given or stored, and interactive authorization is disabled")
+
+        else:
+            self.authorization_url, state = self.oauth.authorization_url("https://www.wrike.com/oauth2/authorize")
+            print(self.authorization_url)
+
+            response = input('Enter the full callback URL')
+
+            token = self.oauth.fetch_token(TOKEN_URL,
+                                           authorization_response=response,
+                                           client_secret=client_secret)
+            self.token_store.save(token)
+
+        self.template_cache = template_cache
+        self._templates = None
+
+        self.headers = requests.utils.default_headers()
+        self.headers.update({
+            'User-Agent': 'Pryke/{} (+https://github.com/wikkiewikkie/pryke)'.format(__version__)
+        })
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        self.session.headers.update(self.headers)
+
+    @property
+    def templates(self):
+        """
+        Jinja environment of the export templates.  Jinja is only imported when a client first exports, so
+        short-lived processes that never do skip its cost.
+
+        Returns:
+            jinja2.Environment
         """
-        r = self.get("users/{}".format(user_id))
+        if self._templates is None:
+            from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader
+
+            bytecode_cache = None
+            if self.template_cache is not None:
+                os.makedirs(self.template_cache, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(self.template_cache)
+            self._templates = Environment(loader=PackageLoader("pryke", "templates"), bytecode_cache=bytecode_cache)
+        return self._templates
+
+    def precompile_templates(self, names=None):
+        """
+        Compiles export templates ahead of the first render.  With :attr:`template_cache` set the bytecode is also
+        stored there, so later processes load it instead of compiling again.
+
+        Keyword Args:
+            names (list):  Templates to compile, e.g. ["task.html"]; defaults to all of them.
+
+        Returns:
+            list: The compiled :class:`jinja2.Template` objects.
+        """
+        names = names or self.templates.list_templates()
+        return [self.templates.get_template(name) for name in names]
+
+    def get(self, path, params={}, headers=None, stream=False):
+        """
+        Dispatch GET request and return response.
+
+        Requests are paced by :attr:`limiter`.  If the API returns status code 429 or 503 the request is retried up to
+        :attr:`max_retries` times, waiting as long as the ``Retry-After`` header asks or else backing off
+        exponentially with jitter.  The wait holds back every thread using the client.
+
+        API responses are served from and stored in :attr:`http_cache` when one is set.  In offline mode a response
+        missing from the cache has status code 504.
+
+        Every request is counted in :attr:`metrics`, and :attr:`hooks` are run before and after it.
+
+        Args:
+            path (str): relative path to get, or an absolute URL such as the download URL of an attachment.
+            params (dict):  dictionary of request parameters.
+            headers (dict):  Request headers; defaults to :attr:`headers`.
+            stream (bool):  Defer downloading the response body until it is read.
+
+        Returns:
+            requests.Response: Response
+
+        See Also:
+            Question no. 8 regarding rate limits
+            https://developers.wrike.com/faq/
+        """
+        relative_path = path
+        if path.startswith(self.endpoint):
+            relative_path = path[len(self.endpoint):]
+        elif not re.match(r"https?://", path):
+            path = "{}{}".format(self.endpoint, path)
+
+        if headers is None:
+            headers = self.headers
+
+        for hook in self.hooks['before_request']:
+            hook(relative_path, params)
+
+        start = time.perf_counter()
+        response = self._get(path, relative_path, params, headers, stream)
+
+        for hook in self.hooks['after_request']:
+            hook(relative_path, params, response, time.perf_counter() - start)
+        return response
+
+    def _get(self, path, relative_path, params, headers, stream):
+        """
+        Dispatch GET request through :attr:`http_cache`, if any.
+
+        Args:
+            path (str):  Full URL to get.
+            relative_path (str):  Path relative to :attr:`endpoint`.
+            params (dict):  dictionary of request parameters.
+            headers (dict):  Request headers.
+            stream (bool):  Defer downloading the response body until it is read.
+
+        Returns:
+            requests.Response: Response
+        """
+        template = self.metrics.template(relative_path)
+        if self.http_cache is None or stream:
+            return self._send(path, template, params, headers, stream)
+
+        url = requests.Request("GET", path, params=params).prepare().url
+        cached, stored = self.http_cache.get(url)
+
+        if self.http_cache.offline:
+            self.metrics.cache(template, cached is not None)
+            if cached is None:
+                cached = requests.Response()
+                cached.status_code = 504
+                cached.url = url
+                cached.request = requests.Request("GET", url).prepare()
+                cached._content = b""
+            self._response = cached
+            return cached
+
+        if cached is not None:
+            if time.time() - stored < self.http_cache.ttl_for(relative_path):
+                self.metrics.cache(template, True)
+                self._response = cached
+                return cached
+
+            headers = dict(headers)
+            if 'ETag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['ETag']
+            if 'Last-Modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+        response = self._send(path, template, params, headers, stream)
+
+        revalidated = response.status_code == 304 and cached is not None
+        self.metrics.cache(template, revalidated)
+        if revalidated:
+            self.http_cache.touch(url)
+            self._response = cached
+            return cached
+
+        if response.status_code == 200:
+            self.http_cache.set(url, response)
+        return response
+
+    def _send(self, path, template, params, headers, stream):
+        """
+        Sends a GET request, pacing it with :attr:`limiter` and retrying while throttled.
+
+        Args:
+            path (str):  Full URL to get.
+            template (str):  Endpoint template the request is counted under in :attr:`metrics`.
+            params (dict):  dictionary of request parameters.
+            headers (dict):  Request headers.
+            stream (bool):  Defer downloading the response body until it is read.
+
+        Returns:
+            requests.Response: Response
+        """
+        refreshed = False  # the one retry after a 401 does not count against max_retries
+        attempt = 0
+        while True:
+            self._ensure_token()
+            access_token = self.oauth.access_token
+
+            start = time.perf_counter()
+            self.limiter.acquire()
+            sent = time.perf_counter()
+            self._response = self.oauth.get(path, params=params, headers=headers, timeout=self.timeout, stream=stream)
+            self.metrics.record(template, self._response, time.perf_counter() - sent, sent - start, stream)
+
+            if self._response.status_code == 401 and not refreshed and self._refreshable():
+                self._response.close()
+                refreshed = True
+                self.refresh(stale=access_token)
+                continue
+
+            if self._response.status_code not in [429, 503] or attempt == self.max_retries:
+                break
+            self._response.close()
+
+            delay = self._retry_after(self._response)
+            if delay is None:
+                delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+                delay = random.uniform(delay / 2, delay)
+            self.metrics.retry(template, delay)
+            self.limiter.pause(delay)
+            attempt += 1
+
+        return self._response
+
+    def stats(self):
+        """
+        Statistics of the requests sent and the caches, for finding slow endpoints and N+1 request patterns.
+
+        Returns:
+            dict: :meth:`Metrics.stats` of :attr:`metrics`, with :meth:`ObjectCache.stats` under ``object_cache``.
+        """
+        stats = self.metrics.stats()
+        stats['object_cache'] = self.cache.stats()
+        return stats
+
+    def prometheus(self, prefix="pryke"):
+        """
+        :meth:`stats` in the Prometheus text exposition format.
+
+        Keyword Args:
+            prefix (str):  Prefix of every metric name.
+
+        Returns:
+            str
+        """
+        return prometheus_text(self.stats(), prefix)
+
+    def _refreshable(self):
+        """
+        Whether the client holds a token that can be refreshed.
+        """
+        token = self.oauth.token
+        return isinstance(token, dict) and bool(token.get('refresh_token'))
+
+    def _expiring(self, token):
+        """
+        Whether a token expires within :attr:`refresh_margin` seconds.
+        """
+        expires_at = token.get('expires_at')
+        return expires_at is not None and float(expires_at) - self.refresh_margin <= time.time()
+
+    def _ensure_token(self):
+        """
+        Refreshes the access token if it is about to expire.
+        """
+        if self._refreshable() and self._expiring(self.oauth.token):
+            self.refresh(stale=self.oauth.access_token)
+
+    def refresh(self, stale=None):
+        """
+        Refreshes the access token and saves the new token to :attr:`token_store`.
+
+        The refresh happens under the store's lock.  When ``stale`` is given and another thread or process already
+        stored a newer token, that token is used instead of refreshing again.  Without ``stale`` the token is always
+        refreshed.
+
+        Keyword Args:
+            stale (str):  Access token known to be expiring or rejected.
+
+        Returns:
+            dict: The token in use.
+        """
+        with self.token_store.lock():
+            stored = self.token_store.load() or self.oauth.token
+            if stale is not None and stored.get('access_token') != stale and not self._expiring(stored):
+                self.oauth.token = stored
+                return stored
+
+            token = self.oauth.refresh_token(TOKEN_URL, refresh_token=stored['refresh_token'],
+                                             client_id=self.client_id, client_secret=self.client_secret)
+            token = dict(token)
+            token.setdefault('refresh_token', stored['refresh_token'])
+            self.token_store.save(token)
+            self.oauth.token = token
+            return token
+
+    def decode(self, response):
+        """
+        Decodes a JSON response body with :attr:`json_loads`.
+
+        Args:
+            response (requests.Response):  Response to decode.
+
+        Returns:
+            dict: The decoded body.
+        """
+        return self.json_loads(response.content)
+
+    def check(self, response):
+        """
+        Raises the error a response carries, if any.
+
+        Args:
+            response (requests.Response):  Response to check.
+
+        Raises:
+            PrykeError: If the response status is not 200, with Wrike's ``error`` and ``errorDescription``.
+        """
+        if response.status_code == 200:
+            return
+
+        try:
+            body = self.decode(response)
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            body = {}
+        raise PrykeError(response, error=body.get('error'), description=body.get('errorDescription'))
+
+    def _get_page(self, path, params):
+        """
+        Gets and decodes one page of a collection.
+
+        Args:
+            path (str):  Relative path of the collection.
+            params (dict):  Request parameters.
+
+        Returns:
+            dict: The decoded page.
+
+        Raises:
+            PrykeError: If the page could not be fetched.
+        """
+        response = self.get(path, params=params)
+        self.check(response)
+        return self.decode(response)
+
+    def get_json(self, path, params={}):
+        """
+        Dispatch GET request and decode the response.
+
+        Args:
+            path (str): relative path to get.
+            params (dict):  dictionary of request parameters.
+
+        Returns:
+            dict: The decoded body.
+        """
+        return self.decode(self.get(path, params=params))
+
+    @staticmethod
+    def _retry_after(response):
+        """
+        Seconds the server asked to wait before retrying.
+
+        Args:
+            response (requests.Response):  Throttled response.
+
+        Returns:
+            float: Seconds to wait, or None if the response has no usable ``Retry-After`` header.
+        """
+        value = response.headers.get('Retry-After')
+        if value is None:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+    def _ensure_pool(self, size):
+        """
+        Grows the connection pools of both sessions so ``size`` threads can each hold a connection to a host.
+
+        Args:
+            size (int):  Number of connections needed per host.
+        """
+        if size > self._pool_size:
+            for session in (self.oauth, self.session):
+                adapter = requests.adapters.HTTPAdapter(pool_connections=self._pool_connections, pool_maxsize=size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+            self._pool_size = size
+
+    def _lookup(self, path, object_id, cls, params=None):
+        """
+        Looks up a single object by ID, reusing it from :attr:`cache` when possible.
+
+        Args:
+            path (str):  Relative path of the lookup endpoint, e.g. "users".
+            object_id (str):  ID to look up.
+            cls (type):  :class:`PrykeObject` subclass to build from the record.
+
+        Keyword Args:
+            params (dict):  Request parameters.  Objects requested with parameters bypass :attr:`cache`.
+
+        Returns:
+            :class:`PrykeObject`: The object, or None if the ID is invalid or inaccessible.
+
+        Raises:
+            PrykeError: If the lookup fails for another reason, e.g. throttling once retries are exhausted.
+        """
+        if not params:
+            obj = self.cache.get(cls, object_id)
+            if obj is not None:
+                return obj
+
+        r = self.get("{}/{}".format(path, object_id), params=params or {})
+
+        if r.status_code in [400, 403, 404]:
+            r.close()
+            return None
+
+        self.check(r)
+        obj = cls(self, data=self.decode(r)['data'][0])
+        return obj if params else self.cache.add(obj)
+
+    def _lookup_many(self, path, ids, cls, params=None):
+        """
+        Looks up objects by ID, sending up to :data:`MAX_IDS_PER_REQUEST` comma-separated IDs per request.
+
+        Objects already in :attr:`cache` are yielded first without a request.
+
+        Args:
+            path (str):  Relative path of the lookup endpoint, e.g. "users".
+            ids (iterable):  IDs to look up.  Duplicates are only requested once.
+            cls (type):  :class:`PrykeObject` subclass to build from each record.
+
+        Keyword Args:
+            params (dict):  Request parameters.  Objects requested with parameters bypass :attr:`cache`.
+
+        Yields:
+            :class:`PrykeObject`: The next object found.
+
+        Raises:
+            PrykeError: If a lookup fails for another reason than an invalid or inaccessible ID.
+        """
+        missing = []
+        for object_id in dict.fromkeys(ids):
+            obj = None if params else self.cache.get(cls, object_id)
+            if obj is None:
+                missing.append(object_id)
+            else:
+                yield obj
+
+        for start in range(0, len(missing), MAX_IDS_PER_REQUEST):
+            chunk = missing[start:start + MAX_IDS_PER_REQUEST]
+            r = self.get("{}/{}".format(path, ",".join(chunk)), params=params or {})
+
+            if r.status_code in [400, 403, 404]:  # an ID is invalid or inaccessible; find the others one by one
+                r.close()
+                if len(chunk) > 1:
+                    for object_id in chunk:
+                        yield from self._lookup_many(path, [object_id], cls, params=params)
+                continue
+
+            self.check(r)
+            for data in self.decode(r)['data']:
+                obj = cls(self, data=data)
+                yield obj if params else self.cache.add(obj)
+
+    def account(self, account_id):
+        """
+        Look up an account by ID
+
+        Args:
+            account_id (str): ID for the account
+
+        Returns:
+            :class:`Account`:
+        """
+        return self._lookup("accounts", account_id, Account)
+
+    def accounts(self):
+        """
+        All accounts current user has access to.
+
+        Yields:
+            :class:`Account`: The next account.
+        """
+        yield from self.paginate("accounts", Account)
+
+    def attachment(self, attachment_id):
+        """
+        Looks up an attachment by ID
+
+        Args:
+            attachment_id (str): ID of attachment
+
+        Returns:
+            :class:`Attachment`: The attachment
+        """
+        return self._lookup("attachments", attachment_id, Attachment)
+
+    def comment(self, comment_id):
+        """
+        Look up a comment by ID
+
+        Args:
+            comment_id:
+
+        Returns:
+            :class:`Comment`: The comment
+        """
+        return self._lookup("comments", comment_id, Comment)
+
+    def comments(self):
+        """
+        All comments in all accounts
+
+        Yields:
+            :class:`Comment`:
+        """
+        yield from self.paginate("comments", Comment)
+
+    def contact(self, contact_id):
+        """
+        Look up a contact by ID
+
+        Args:
+            contact_id (str):  Contact ID to look up.
+
+        Return:
+            :class:`Contact`:
+        """
+        return self._lookup("contacts", contact_id, Contact)
+
+    def contacts(self):
+        """
+        Contacts of all users and user groups in all accessible accounts.
+
+        Yields:
+            :class:`Contact`
+
+        See Also:
+            https://developers.wrike.com/documentation/api/methods/query-contacts#get-contacts-empty
+        """
+        yield from self.paginate("contacts", Contact)
+
+    def contacts_by_id(self, contact_ids):
+        """
+        Look up several contacts by ID in as few requests as possible.
+
+        Args:
+            contact_ids (iterable):  Contact IDs to look up.
+
+        Yields:
+            :class:`Contact`
+        """
+        return self._lookup_many("contacts", contact_ids, Contact)
+
+    def download_attachments(self, attachments, directory, workers=None):
+        """
+        Downloads attachments into a directory on a thread pool.
+
+        Each attachment is saved as ``<id>_v<version>_<name>``.  Files already present with the expected size are
+        skipped, so an interrupted export can be run again.
+
+        Args:
+            attachments (iterable):  :class:`Attachment` objects with download URLs.
+            directory (str):  Directory to save the attachments in; created if missing.
+
+        Keyword Args:
+            workers (int):  Number of concurrent downloads; defaults to :data:`DEFAULT_WORKERS`.
+
+        Returns:
+            list: For each attachment in order, the path it was saved to, None if it could not be downloaded, or
+            the exception raised while downloading it.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        def download(attachment):
+            name = os.path.basename(attachment.name or "").replace(os.sep, "_")
+            path = os.path.join(directory, "{}_v{}_{}".format(attachment.id, attachment.version, name))
+
+            if os.path.exists(path) and attachment.size is not None and attachment.size >= 0 \
+                    and os.path.getsize(path) == attachment.size:
+                return path
+            return path if attachment.download(path, verify_size=True) else None
+
+        return self.map(download, attachments, workers=workers)
+
+    def export_tasks(self, tasks, directory=None, archive=None, workers=None, batch_size=EXPORT_BATCH_SIZE):
+        """
+        Exports many tasks to HTML, one document per task named ``<id>.html``.
+
+        Tasks are exported in batches of ``batch_size``: the comments and attachments of a batch are fetched on a
+        thread pool, their authors and the task authors are resolved with batched user lookups, and every task is
+        rendered with the same compiled template.  Documents are written to a directory on the thread pool, or
+        streamed into a single ZIP archive.
+
+        Args:
+            tasks (iterable):  :class:`Task` objects.
+
+        Keyword Args:
+            directory (str):  Directory to write the documents in; created if missing.
+            archive (str or file):  ZIP archive to write the documents to instead of a directory.
+            workers (int):  Number of threads; defaults to :data:`DEFAULT_WORKERS`.
+            batch_size (int):  Tasks whose related objects are held in memory at once.
+
+        Returns:
+            list: For each task in order, the path or archive member written, or the exception raised while
+            exporting it.
+
+        Raises:
+            ValueError: Unless exactly one of ``directory`` and ``archive`` is given.
+        """
+        if (directory is None) == (archive is None):
+            raise ValueError("Give either a directory or an archive to export to")
+
+        template = self.templates.get_template("task.html")
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        results = []
+        tasks = iter(tasks)
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) if archive is not None else nullcontext() as zip_file:
+            for batch in iter(lambda: list(itertools.islice(tasks, batch_size)), []):
+                results.extend(self._export_batch(batch, template, directory, zip_file, workers))
+        return results
+
+    def _export_batch(self, tasks, template, directory, zip_file, workers):
+        """
+        Prefetches the related objects of a batch of tasks, then renders and writes them.
+
+        Args:
+            tasks (list):  :class:`Task` objects.
+            template (jinja2.Template):  Compiled task template.
+            directory (str):  Directory to write to, or None.
+            zip_file (zipfile.ZipFile):  Archive to write to, or None.
+            workers (int):  Number of threads.
+
+        Returns:
+            list: For each task, the path or archive member written, or the exception raised.
+        """
+        related = self.map(lambda task: (list(task.comments()), list(task.attachments())), tasks, workers=workers)
+        fetched = [item for item in related if not isinstance(item, Exception)]
+        self.load_authors(obj for comments, attachments in fetched for obj in comments + attachments)
+
+        pending = [task for task in tasks if task._author is None and task.author_ids]
+        users = {user.id: user for user in self.users(task.author_ids[0] for task in pending)}
+        for task in pending:
+            task._author = users.get(task.author_ids[0])
+
+        def export(item):
+            task, objects = item
+            if isinstance(objects, Exception):
+                raise objects
+
+            name = "{}.html".format(task.id)
+            html = task.render(template, *objects)
+            if zip_file is not None:
+                zip_file.writestr(name, html)
+                return name
+
+            path = os.path.join(directory, name)
+            with open(path, "w") as export_file:
+                export_file.write(html)
+            return path
+
+        if zip_file is not None:  # archive members are written one at a time
+            results = []
+            for item in zip(tasks, related):
+                try:
+                    results.append(export(item))
+                except Exception as e:
+                    results.append(e)
+            return results
+        return self.map(export, zip(tasks, related), workers=workers)
+
+    def fetch_many(self, kind, ids, workers=None):
+        """
+        Looks up objects of one kind by ID on a thread pool, batching :data:`MAX_IDS_PER_REQUEST` IDs per request.
+
+        Args:
+            kind (str):  Endpoint of the objects, one of "accounts", "attachments", "comments", "contacts",
+                "folders", "groups", "tasks" or "users".
+            ids (iterable):  IDs to look up.
+
+        Keyword Args:
+            workers (int):  Number of threads; defaults to :data:`DEFAULT_WORKERS`.
+
+        Returns:
+            list: One entry per ID in the same order: the object, None if it was not found, or the exception raised
+            while fetching it.
+        """
+        cls = LOOKUP_TYPES[kind]
+        ids = list(ids)
+        unique_ids = list(dict.fromkeys(ids))
+        chunks = [unique_ids[start:start + MAX_IDS_PER_REQUEST]
+                  for start in range(0, len(unique_ids), MAX_IDS_PER_REQUEST)]
+
+        found = {}
+        for chunk, result in zip(chunks, self.map(lambda chunk: list(self._lookup_many(kind, chunk, cls)), chunks,
+                                                  workers=workers)):
+            if isinstance(result, Exception):
+                found.update((object_id, result) for object_id in chunk)
+            else:
+                found.update((obj.id, obj) for obj in result)
+
+        return [found.get(object_id) for object_id in ids]
+
+    def folder(self, folder_id):
+        """
+        Search for a single folder by ID
+
+        Args:
+            folder_id (str):  ID of the folder
+
+        Returns:
+            :class:`Folder`:
+        """
+        return self._lookup("folders", folder_id, Folder)
+
+    def folders(self, fields=None, raw=False):
+        """
+        Folders for all accounts
+
+        Keyword Args:
+            fields (list):  Optional fields to include, e.g. ["description"]
+            raw (bool or tuple):  Yield dicts or tuples of the given keys instead of objects, see :meth:`paginate`
+
+        Yields:
+            :class:`Folder`:
+        """
+        yield from self.paginate("folders", Folder, params=query_params({'fields': fields}), raw=raw)
+
+    def folder_tree(self):
+        """
+        Every folder in all accounts, indexed as a tree, from a single query.
+
+        Returns:
+            :class:`FolderTree`
+        """
+        return FolderTree(self.folders())
+
+    def folders_by_id(self, folder_ids):
+        """
+        Look up several folders by ID in as few requests as possible.
+
+        Args:
+            folder_ids (iterable):  Folder IDs to look up.
+
+        Yields:
+            :class:`Folder`
+        """
+        return self._lookup_many("folders", folder_ids, Folder)
+
+    def group(self, group_id):
+        """
+        Looks up a group by ID
+
+        Args:
+            group_id (str):  Group ID
+
+        Returns:
+            :class:`Group`:
+        """
+        return self._lookup("groups", group_id, Group)
+
+    def invalidate(self, cls=None, object_id=None):
+        """
+        Forgets cached objects so they are fetched again on next lookup.  With no arguments the whole cache is cleared.
+
+        Keyword Args:
+            cls (type):  Only forget objects of this type, e.g. :class:`User`.
+            object_id (str):  Only forget the object with this ID.
+        """
+        self.cache.invalidate(cls=cls, object_id=object_id)
+
+    def load_authors(self, items):
+        """
+        Resolves the authors of many comments or attachments with batched user lookups.
+
+        Args:
+            items (iterable):  :class:`Comment` or :class:`Attachment` objects.
+
+        Returns:
+            list: The items, with their ``author`` populated.
+        """
+        items = list(items)
+        pending = [item for item in items if item._author is None and item.author_id is not None]
+        users = {user.id: user for user in self.users(item.author_id for item in pending)}
+
+        for item in pending:
+            item._author = users.get(item.author_id)
+
+        return items
+
+    def map(self, fn, items, workers=None):
+        """
+        Calls ``fn`` for every item on a thread pool that shares this client's connections and throttling.
+
+        Errors are collected per item instead of aborting the batch.
+
+        Args:
+            fn (callable):  Function taking one item, e.g. :meth:`task`.
+            items (iterable):  Items to pass to ``fn``.
+
+        Keyword Args:
+            workers (int):  Number of threads; defaults to :data:`DEFAULT_WORKERS`.
+
+        Returns:
+            list: The return value of ``fn`` for each item in the same order, or the exception it raised.
+        """
+        workers = workers or DEFAULT_WORKERS
+        self._ensure_pool(workers)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fn, item) for item in items]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def paginate(self, path, cls, params=None, page_size=None, raw=False, stream=False):
+        """
+        Iterates over every page of a collection, following ``nextPageToken`` until the last page.
+
+        The next page is requested and decoded in the background while the current one is consumed, so at most two
+        pages are held in memory at a time.
+
+        Args:
+            path (str):  Relative path of the collection, e.g. "tasks".
+            cls (type):  :class:`PrykeObject` subclass to build from each record.
+
+        Keyword Args:
+            params (dict):  Request parameters.
+            page_size (int):  Records per page, for endpoints that support ``pageSize``.
+            raw (bool or tuple):  True to yield the decoded records as dicts, or a tuple of keys to yield a tuple of
+                those values per record, instead of building objects.
+            stream (bool):  Parse each page while it downloads, yielding every record as soon as it is complete.
+                Memory use no longer grows with the page size, but pages are not prefetched.
+
+        Yields:
+            :class:`PrykeObject`: The next object.
+
+        Raises:
+            PrykeError: If a page could not be fetched, e.g. for an invalid filter or once retries are exhausted.
+
+        See Also:
+            https://developers.wrike.com/documentation/api/methods/query-tasks#get-tasks-empty
+        """
+        params = dict(params or {})
+        if page_size is not None:
+            params['pageSize'] = page_size
+
+        if stream:
+            yield from self._paginate_stream(path, cls, params, raw)
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = self._get_page(path, params)
+
+            while page is not None:
+                next_page = None
+                if page.get('nextPageToken'):
+                    params['nextPageToken'] = page['nextPageToken']
+                    next_page = executor.submit(self._get_page, path, dict(params))
+
+                yield from records(self, cls, page['data'], raw)
+
+                page = next_page.result() if next_page is not None else None
+
+    def _paginate_stream(self, path, cls, params, raw):
+        """
+        Iterates over every page of a collection, parsing each response body incrementally.
+
+        Args:
+            path (str):  Relative path of the collection.
+            cls (type):  :class:`PrykeObject` subclass to build from each record.
+            params (dict):  Request parameters.
+            raw (bool or tuple):  Yield dicts or tuples instead of objects.
+
+        Yields:
+            :class:`PrykeObject`: The next object.
+        """
+        while True:
+            page = {}
+            response = self.get(path, params=params, stream=True)
+            try:
+                self.check(response)
+                data = iter_json_items(response.iter_content(STREAM_CHUNK_SIZE), header=page)
+                yield from records(self, cls, data, raw)
+            finally:
+                response.close()
+
+            if not page.get('nextPageToken'):
+                return
+            params['nextPageToken'] = page['nextPageToken']
+
+    def task(self, task_id, fields=None):
+        """
+        Looks up a task by ID
+
+        Args:
+            task_id (str): Task ID
+
+        Keyword Args:
+            fields (list):  Optional fields to include, e.g. ["recurrent"]; the task is then not cached.
+
+        Returns:
+            :class:`Task`:
+
+        See Also:
+            https://developers.wrike.com/documentation/api/methods/query-tasks#get-tasks-multi
+        """
+        return self._lookup("tasks", task_id, Task, params=query_params({'fields': fields}))
+
+    def tasks(self, title=None, page_size=None, raw=False, stream=False, **filters):
+        """
+        Queries for tasks in all accounts.
+
+        Keyword Args:
+            title (str):  Title filter, exact match
+            page_size (int):  Tasks requested per page
+            raw (bool or tuple):  Yield dicts or tuples of the given keys instead of objects, see :meth:`paginate`
+            stream (bool):  Parse responses incrementally so memory stays flat for large pages, see :meth:`paginate`
+            **filters:  Any other parameter in :data:`TASK_QUERY_PARAMETERS`, e.g. ``status="Active"``,
+                ``responsibles=["KUAJ25LD"]``, ``updated_date={"start": datetime}``, ``sort_field="UpdatedDate"`` or
+                ``fields=["description"]``.
+
+        Yields:
+            :class:`Task`:
+
+        See Also:
+            https://developers.wrike.com/documentation/api/methods/query-tasks#get-tasks-empty
+        """
+        params = query_params(dict(filters, title=title), TASK_QUERY_PARAMETERS)
+        yield from self.paginate("tasks", Task, params=params, page_size=page_size, raw=raw, stream=stream)
+
+    def tasks_by_id(self, task_ids, fields=None):
+        """
+        Look up several tasks by ID in as few requests as possible.
+
+        Args:
+            task_ids (iterable):  Task IDs to look up.
+
+        Keyword Args:
+            fields (list):  Optional fields to include, e.g. ["recurrent"]
+
+        Yields:
+            :class:`Task`
+
+        See Also:
+            https://developers.wrike.com/documentation/api/methods/query-tasks#get-tasks-multi
+        """
+        return self._lookup_many("tasks", task_ids, Task, params=query_params({'fields': fields}))
+
+    def user(self, user_id):
+        """
+        Looks up a user by ID
+
+        Args:
+            user_id (str):  ID for user.
+
+        Returns:
+            User
+        """
+        return self._lookup("users", user_id, User)
+
+    def users(self, user_ids):
+        """
+        Look up several users by ID in as few requests as possible.
+
+        Args:
+            user_ids (iterable):  User IDs to look up.
+
+        Yields:
+            :class:`User`
+        """
+        return self._lookup_many("users", user_ids, User)
+
+    @property
+    def version(self):
+        """
+        Current API version as reported by server.
+
+        Returns:
+            tuple: A tuple of the major and minor version numbers.
+
+        See Also:
+            https://developers.wrike.com/documentation/api/methods/api-version
+        """
+        data = self.get_json("version")["data"][0]
+        return data['major'], data['minor']
+
+
+class AsyncPryke:
+    """
+    An asyncio client for the Wrike API with the same surface as :class:`Pryke`.
+
+    Requests are dispatched through a wrapped :class:`Pryke` on a thread pool, so the OAuth session, cache and
+    model classes are shared with the synchronous client.  At most ``concurrency`` requests are in flight at once.
+
+    Attributes:
+        client (:class:`Pryke`):  Synchronous client used for transport and parsing
+        concurrency (int):  Maximum number of requests in flight
+    """
+    def __init__(self, client_id, client_secret, access_token=None, concurrency=100, **kwargs):
+        """
+        Initializes the client.
+
+        Args:
+            client_id (str):
+            client_secret (str):
+            access_token (str):
+
+        Keyword Args:
+            concurrency (int):  Maximum number of requests in flight.
+            **kwargs:  Passed on to :class:`Pryke`.
+        """
+        self.client = Pryke(client_id, client_secret, access_token=access_token, **kwargs)
+        self.client._ensure_pool(concurrency)
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._loop = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the thread pool used for requests.
+        """
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, func, *args, **kwargs):
+        """
+        Runs a blocking call on the thread pool once a concurrency slot is free.
+
+        Args:
+            func (callable):  Blocking function to run.
+
+        Returns:
+            Whatever ``func`` returns.
+        """
+        import asyncio  # imported here so that synchronous users of pryke skip its import cost
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def get(self, path, params={}, headers=None):
+        """
+        Dispatch GET request and return response.
+
+        Args:
+            path (str): relative path to get.
+            params (dict):  dictionary of request parameters.
+
+        Returns:
+            requests.Response: Response
+        """
+        return await self._run(self.client.get, path, params=params, headers=headers)
+
+    async def paginate(self, path, cls, params=None, page_size=None, raw=False):
+        """
+        Iterates over every page of a collection, requesting the next page while the current one is consumed.
+
+        Args:
+            path (str):  Relative path of the collection, e.g. "tasks".
+            cls (type):  :class:`PrykeObject` subclass to build from each record.
+
+        Keyword Args:
+            params (dict):  Request parameters.
+            page_size (int):  Records per page, for endpoints that support ``pageSize``.
+            raw (bool or tuple):  Yield dicts or tuples instead of objects, as for :meth:`Pryke.paginate`.
+
+        Yields:
+            :class:`PrykeObject`: The next object.
+        """
+        import asyncio
+
+        params = dict(params or {})
+        if page_size is not None:
+            params['pageSize'] = page_size
+
+        page = await self._run(self.client._get_page, path, params)
+        next_page = None
+
+        try:
+            while page is not None:
+                next_page = None
+                if page.get('nextPageToken'):
+                    params['nextPageToken'] = page['nextPageToken']
+                    next_page = asyncio.ensure_future(self._run(self.client._get_page, path, dict(params)))
+
+                for record in records(self.client, cls, page['data'], raw):
+                    yield record
+
+                page = (await next_page) if next_page is not None else None
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    async def _lookup_many(self, path, ids, cls):
+        """
+        Looks up objects by ID, sending one request per :data:`MAX_IDS_PER_REQUEST` IDs concurrently.
+
+        Args:
+            path (str):  Relative path of the lookup endpoint, e.g. "users".
+            ids (iterable):  IDs to look up.  Duplicates are only requested once.
+            cls (type):  :class:`PrykeObject` subclass to build from each record.
+
+        Yields:
+            :class:`PrykeObject`: The next object found, in the order chunks complete.
+        """
+        import asyncio
+
+        ids = list(dict.fromkeys(ids))
+        chunks = [ids[start:start + MAX_IDS_PER_REQUEST] for start in range(0, len(ids), MAX_IDS_PER_REQUEST)]
+        lookups = [self._run(lambda chunk=chunk: list(self.client._lookup_many(path, chunk, cls)))
+                   for chunk in chunks]
+
+        for lookup in asyncio.as_completed(lookups):
+            for obj in await lookup:
+                yield obj
+
+    async def account(self, account_id):
+        """
+        Look up an account by ID
+
+        Args:
+            account_id (str): ID for the account
+
+        Returns:
+            :class:`Account`:
+        """
+        return await self._run(self.client.account, account_id)
+
+    async def accounts(self):
+        """
+        All accounts current user has access to.
+
+        Yields:
+            :class:`Account`: The next account.
+        """
+        async for account in self.paginate("accounts", Account):
+            yield account
+
+    async def attachment(self, attachment_id):
+        """
+        Looks up an attachment by ID
+
+        Args:
+            attachment_id (str): ID of attachment
+
+        Returns:
+            :class:`Attachment`: The attachment
+        """
+        return await self._run(self.client.attachment, attachment_id)
+
+    async def comment(self, comment_id):
+        """
+        Look up a comment by ID
+
+        Args:
+            comment_id (str):  ID of the comment
+
+        Returns:
+            :class:`Comment`: The comment
+        """
+        return await self._run(self.client.comment, comment_id)
+
+    async def comments(self):
+        """
+        All comments in all accounts
+
+        Yields:
+            :class:`Comment`:
+        """
+        async for comment in self.paginate("comments", Comment):
+            yield comment
+
+    async def contact(self, contact_id):
+        """
+        Look up a contact by ID
+
+        Args:
+            contact_id (str):  Contact ID to look up.
+
+        Return:
+            :class:`Contact`:
+        """
+        return await self._run(self.client.contact, contact_id)
+
+    async def contacts(self):
+        """
+        Contacts of all users and user groups in all accessible accounts.
+
+        Yields:
+            :class:`Contact`
+        """
+        async for contact in self.paginate("contacts", Contact):
+            yield contact
+
+    async def contacts_by_id(self, contact_ids):
+        """
+        Look up several contacts by ID concurrently.
+
+        Args:
+            contact_ids (iterable):  Contact IDs to look up.
+
+        Yields:
+            :class:`Contact`
+        """
+        async for contact in self._lookup_many("contacts", contact_ids, Contact):
+            yield contact
+
+    async def folder(self, folder_id):
+        """
+        Search for a single folder by ID
+
+        Args:
+            folder_id (str):  ID of the folder
+
+        Returns:
+            :class:`Folder`:
+        """
+        return await self._run(self.client.folder, folder_id)
+
+    async def folder_children(self, folder):
+        """
+        Fully loaded child folders of a folder, looked up concurrently.
+
+        Args:
+            folder (:class:`Folder`):  Parent folder.
+
+        Yields:
+            :class:`Folder`
+        """
+        async for child in self.folders_by_id(folder.child_ids):
+            yield child
+
+    async def folder_shared_users(self, folder):
+        """
+        Users who share a folder, looked up concurrently.
+
+        Args:
+            folder (:class:`Folder`):  Shared folder.
+
+        Yields:
+            :class:`User`
+        """
+        async for user in self.users(folder.shared_ids):
+            yield user
+
+    async def folders(self):
+        """
+        Folders for all accounts
+
+        Yields:
+            :class:`Folder`:
+        """
+        async for folder in self.paginate("folders", Folder):
+            yield folder
+
+    async def folders_by_id(self, folder_ids):
+        """
+        Look up several folders by ID concurrently.
+
+        Args:
+            folder_ids (iterable):  Folder IDs to look up.
+
+        Yields:
+            :class:`Folder`
+        """
+        async for folder in self._lookup_many("folders", folder_ids, Folder):
+            yield folder
+
+    async def group(self, group_id):
+        """
+        Looks up a group by ID
+
+        Args:
+            group_id (str):  Group ID
+
+        Returns:
+            :class:`Group`:
+        """
+        return await self._run(self.client.group, group_id)
+
+    async def group_users(self, group):
+        """
+        All users belonging to a group, looked up concurrently.
+
+        Args:
+            group (:class:`Group`):  The group.
+
+        Yields:
+            :class:`User`
+        """
+        async for user in self.users(group.member_ids):
+            yield user
+
+    def invalidate(self, cls=None, object_id=None):
+        """
+        Forgets cached objects so they are fetched again on next lookup.  With no arguments the whole cache is cleared.
+
+        Keyword Args:
+            cls (type):  Only forget objects of this type, e.g. :class:`User`.
+            object_id (str):  Only forget the object with this ID.
+        """
+        self.client.invalidate(cls=cls, object_id=object_id)
+
+    async def task(self, task_id, fields=None):
+        """
+        Looks up a task by ID
+
+        Args:
+            task_id (str): Task ID
+
+        Keyword Args:
+            fields (list):  Optional fields to include, e.g. ["recurrent"]
+
+        Returns:
+            :class:`Task`:
+        """
+        return await self._run(self.client.task, task_id, fields=fields)
+
+    async def tasks(self, title=None, page_size=None, raw=False, **filters):
+        """
+        Queries for tasks in all accounts.
+
+        Keyword Args:
+            title (str):  Title filter, exact match
+            page_size (int):  Tasks requested per page
+            raw (bool or tuple):  Yield dicts or tuples of the given keys instead of objects
+            **filters:  Any other parameter in :data:`TASK_QUERY_PARAMETERS`, as for :meth:`Pryke.tasks`.
+
+        Yields:
+            :class:`Task`:
+        """
+        params = query_params(dict(filters, title=title), TASK_QUERY_PARAMETERS)
+        async for task in self.paginate("tasks", Task, params=params, page_size=page_size, raw=raw):
+            yield task
+
+    async def tasks_by_id(self, task_ids):
+        """
+        Look up several tasks by ID concurrently.
+
+        Args:
+            task_ids (iterable):  Task IDs to look up.
+
+        Yields:
+            :class:`Task`
+        """
+        async for task in self._lookup_many("tasks", task_ids, Task):
+            yield task
+
+    async def user(self, user_id):
+        """
+        Looks up a user by ID
+
+        Args:
+            user_id (str):  ID for user.
+
+        Returns:
+            :class:`User`
+        """
+        return await self._run(self.client.user, user_id)
+
+    async def users(self, user_ids):
+        """
+        Look up several users by ID concurrently.
+
+        Args:
+            user_ids (iterable):  User IDs to look up.
+
+        Yields:
+            :class:`User`
+        """
+        async for user in self._lookup_many("users", user_ids, User):
+            yield user
+
+    async def version(self):
+        """
+        Current API version as reported by server.
+
+        Returns:
+            tuple: A tuple of the major and minor version numbers.
+        """
+        data = self.client.decode(await self.get("version"))["data"][0]
+        return data['major'], data['minor']
+
+
+class PrykePool:
+    """
+    Several clients authorized with different tokens, used together to multiply throughput beyond the per token
+    rate limit.
+
+    Calls for an account are routed to a client whose token can access it, preferring the one that can dispatch a
+    request soonest according to its :class:`RateLimiter`, which includes any backoff after throttled responses.
+    Objects returned stay bound to the client that fetched them, so their own requests use the same token.
+
+    Attributes:
+        clients (list):  :class:`Pryke` clients of the pool
+    """
+    def __init__(self, clients):
+        """
+        Inits the pool.
+
+        Args:
+            clients (iterable):  :class:`Pryke` clients, each with its own token and limiter.
+
+        Raises:
+            ValueError: If no clients are given.
+        """
+        self.clients = list(clients)
+        if not self.clients:
+            raise ValueError("A client pool needs at least one client")
+
+        self._accounts = None  # account ID -> clients whose token can access it
+        self._dispatched = [0] * len(self.clients)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_tokens(cls, client_id, client_secret, tokens, **kwargs):
+        """
+        Creates a pool with one client per token.
+
+        Args:
+            client_id (str):
+            client_secret (str):
+            tokens (iterable):  Access tokens as strings, token dicts or :class:`MemoryTokenStore` objects.
+
+        Keyword Args:
+            **kwargs:  Passed to every :class:`Pryke`.
+
+        Returns:
+            :class:`PrykePool`
+        """
+        clients = []
+        for token in tokens:
+            if isinstance(token, str):
+                clients.append(Pryke(client_id, client_secret, access_token=token, **kwargs))
+            elif isinstance(token, MemoryTokenStore):
+                clients.append(Pryke(client_id, client_secret, token_store=token, **kwargs))
+            else:
+                clients.append(Pryke(client_id, client_secret, token=token, **kwargs))
+        return cls(clients)
+
+    @staticmethod
+    def account_id_of(object_id):
+        """
+        Account of an object, from the account ID prefixing the 16 character IDs of Wrike tasks, folders, comments
+        and attachments.
+
+        Args:
+            object_id (str):  ID of the object.
+
+        Returns:
+            str: The account ID, or None if it cannot be told from the object ID.
+        """
+        if object_id is not None and len(object_id) == 16:
+            return object_id[:8]
+        return None
+
+    def discover(self):
+        """
+        Finds the accounts each client's token can access.  Called on first use; call again after access changes.
+
+        Returns:
+            dict: Clients by account ID.
+        """
+        accounts = {}
+        for client in self.clients:
+            for account in client.accounts():
+                accounts.setdefault(account.id, []).append(client)
+        self._accounts = accounts
+        return accounts
+
+    def client(self, account_id=None):
+        """
+        Client to send the next request for an account through.
+
+        Keyword Args:
+            account_id (str):  Account the request is for; any client is used if it is None or unknown.
+
+        Returns:
+            :class:`Pryke`
+        """
+        candidates = self.clients
+        if account_id is not None:
+            if self._accounts is None:
+                self.discover()
+            candidates = self._accounts.get(account_id) or self.clients
+
+        with self._lock:
+            index = min((self.clients.index(client) for client in candidates),
+                        key=lambda index: (self.clients[index].limiter.delay(), self._dispatched[index]))
+            self._dispatched[index] += 1
+        return self.clients[index]
+
+    def account(self, account_id):
+        """
+        Look up an account by ID
+
+        Args:
+            account_id (str): ID for the account
+
+        Returns:
+            :class:`Account`:
+        """
+        return self.client(account_id).account(account_id)
+
+    def accounts(self):
+        """
+        Every account any client can access, each once.
+
+        Yields:
+            :class:`Account`: The next account, bound to the least busy client that can access it.
+        """
+        seen = set()
+        for client in self.clients:
+            for account in client.accounts():
+                if account.id not in seen:
+                    seen.add(account.id)
+                    yield Account(self.client(account.id), data=account._data)
+
+    def folder(self, folder_id):
+        """
+        Search for a single folder by ID
+
+        Args:
+            folder_id (str):  ID of the folder
+
+        Returns:
+            :class:`Folder`:
+        """
+        return self.client(self.account_id_of(folder_id)).folder(folder_id)
+
+    def folders(self, account_id=None, **kwargs):
+        """
+        Folders of one account, or of every account.
+
+        Keyword Args:
+            account_id (str):  Account to list; defaults to all of them.
+            **kwargs:  Passed to :meth:`Account.folders`.
+
+        Yields:
+            :class:`Folder`
+        """
+        for account in self._accounts_for(account_id):
+            yield from account.folders(**kwargs)
+
+    def task(self, task_id, fields=None):
+        """
+        Looks up a task by ID
+
+        Args:
+            task_id (str): Task ID
+
+        Keyword Args:
+            fields (list):  Optional fields to include.
+
+        Returns:
+            :class:`Task`:
+        """
+        return self.client(self.account_id_of(task_id)).task(task_id, fields=fields)
+
+    def tasks(self, account_id=None, **kwargs):
+        """
+        Tasks of one account, or of every account.
+
+        Keyword Args:
+            account_id (str):  Account to query; defaults to all of them.
+            **kwargs:  Passed to :meth:`Account.tasks`, e.g. ``page_size`` or filters.
+
+        Yields:
+            :class:`Task`
+        """
+        for account in self._accounts_for(account_id):
+            yield from account.tasks(**kwargs)
+
+    def user(self, user_id):
+        """
+        Looks up a user by ID
+
+        Args:
+            user_id (str):  ID for user.
+
+        Returns:
+            User
+        """
+        return self.client().user(user_id)
+
+    def _accounts_for(self, account_id):
+        """
+        Accounts to query, bound to a client each without looking them up.
+        """
+        if account_id is not None:
+            return [Account(self.client(account_id), data={'id': account_id})]
+        if self._accounts is None:
+            self.discover()
+        return [Account(self.client(account_id), data={'id': account_id}) for account_id in self._accounts]
+
+    def stats(self):
+        """
+        :meth:`Pryke.stats` of every client, in the order of :attr:`clients`.
+
+        Returns:
+            list
+        """
+        return [client.stats() for client in self.clients]
+
+
+class Field:
+    """
+    Attribute of a :class:`PrykeObject` stored in, and read from, its raw API data.
+
+    The raw data is the only copy kept, so objects carry no per-instance ``__dict__``.
+
+    Attributes:
+        key (str):  Key of the value in the API data, e.g. "createdDate"
+        convert (callable):  Applied to values that are not None when read, e.g. an Enum
+        default:  Value when the key is missing or null; called first if callable
+    """
+    __slots__ = ('key', 'convert', 'default')
+
+    def __init__(self, key, convert=None, default=None):
+        self.key = key
+        self.convert = convert
+        self.default = default
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+
+        value = obj._data.get(self.key)
+        if value is None:
+            return self.default() if callable(self.default) else self.default
+        if self.convert is not None:
+            return self.convert(value)
+        return value
+
+    def __set__(self, obj, value):
+        obj._data[self.key] = value
+
+
+class DateField(Field):
+    """
+    Timestamp attribute of a :class:`PrykeObject`, parsed to a :class:`datetime.datetime` on first access.
+
+    Parsed values are cached on the object, so fields that are never read are never parsed.
+    """
+    __slots__ = ()
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+
+        if obj._dates is not None and self.key in obj._dates:
+            return obj._dates[self.key]
+
+        value = obj._data.get(self.key)
+        if value is not None:
+            value = parse_date(value)
+            if obj._dates is None:
+                obj._dates = {}
+            obj._dates[self.key] = value
+        return value
+
+    def __set__(self, obj, value):
+        if obj._dates is not None:
+            obj._dates.pop(self.key, None)
+        if isinstance(value, datetime.datetime):
+            value = value.strftime(DATE_FORMAT)
+        obj._data[self.key] = value
+
+
+def parse_date(value):
+    """
+    Parses a Wrike timestamp such as "2016-10-03T16:10:41Z".
+
+    Timestamps in :data:`DATE_FORMAT` take a fast path around :func:`datetime.datetime.strptime`, which is only used
+    for anything else.
+
+    Args:
+        value (str):  Timestamp to parse.
+
+    Returns:
+        datetime.datetime: The naive UTC date and time.
+    """
+    if len(value) == 20 and value[19] == "Z" and value[10] == "T":
+        try:
+            return datetime.datetime.fromisoformat(value[:19])
+        except ValueError:
+            pass
+    return datetime.datetime.strptime(value, DATE_FORMAT)
+
+
+TASK_QUERY_PARAMETERS = {
+    'authors': 'authors',
+    'completed_date': 'completedDate',
+    'created_date': 'createdDate',
+    'custom_statuses': 'customStatuses',
+    'descendants': 'descendants',
+    'due_date': 'dueDate',
+    'fields': 'fields',
+    'importance': 'importance',
+    'limit': 'limit',
+    'metadata': 'metadata',
+    'permalink': 'permalink',
+    'responsibles': 'responsibles',
+    'scheduled_date': 'scheduledDate',
+    'sort_field': 'sortField',
+    'sort_order': 'sortOrder',
+    'start_date': 'startDate',
+    'status': 'status',
+    'sub_tasks': 'subTasks',
+    'title': 'title',
+    'type': 'type',
+    'updated_date': 'updatedDate',
+}
+"""Keyword arguments accepted by task queries, mapped to Wrike query parameters."""
+
+
+def query_params(values, names=None):
+    """
+    Encodes keyword arguments as Wrike query parameters.
+
+    Lists and dicts, such as ``{"start": datetime, "end": datetime}`` ranges, are sent as JSON, booleans as
+    "true"/"false", datetimes in :data:`DATE_FORMAT` and dates as YYYY-MM-DD.  None values are left out.
+
+    Args:
+        values (dict):  Keyword arguments.
+
+    Keyword Args:
+        names (dict):  Accepted keywords mapped to parameter names; defaults to just ``fields``.
+
+    Returns:
+        dict: Parameters to pass with the request.
+
+    Raises:
+        TypeError: If a keyword is not accepted.
+    """
+    names = names or {'fields': 'fields'}
+    params = {}
+
+    for name, value in values.items():
+        if name not in names:
+            raise TypeError("Unknown query parameter '{}'".format(name))
+        if value is None:
+            continue
+
+        value = _json_value(value)
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value)
+        elif isinstance(value, bool):
+            value = "true" if value else "false"
+        params[names[name]] = value
+
+    return params
+
+
+def _json_value(value):
+    """
+    Converts dates, tuples and sets, including nested ones, to JSON-compatible values.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return [_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    return value
+
+
+def records(instance, cls, data, raw=False):
+    """
+    Builds objects, or lightweight records, from the ``data`` of a decoded response.
+
+    Args:
+        instance (:class:`Pryke`):  Client the objects are bound to.
+        cls (type):  :class:`PrykeObject` subclass to build.
+        data (list):  Decoded records.
+
+    Keyword Args:
+        raw (bool or tuple):  True to yield the dicts unchanged, or a tuple of keys to yield a tuple of those values
+            per record.
+
+    Yields:
+        :class:`PrykeObject`, dict or tuple: The next record.
+    """
+    if raw is True:
+        yield from data
+    elif raw:
+        for item in data:
+            yield tuple(item.get(key) for key in raw)
+    else:
+        for item in data:
+            yield cls(instance, data=item)
+
+
+class JSONStream:
+    """
+    Incremental reader of a JSON document arriving in chunks of bytes.
+
+    Attributes:
+        chunks (iterator):  Remaining chunks of the document
+    """
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+    def __init__(self, chunks):
+        """
+        Args:
+            chunks (iterable):  Chunks of UTF-8 encoded bytes, e.g. from :meth:`requests.Response.iter_content`.
+        """
+        self.chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._done = False
+
+    def _fill(self):
+        """
+        Appends the next chunk to the buffer, dropping what has already been consumed.
+
+        Returns:
+            bool: False once the document is exhausted.
+        """
+        if self._done:
+            return False
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self._done = True
+            text = self._utf8.decode(b'', final=True)
+        else:
+            text = self._utf8.decode(chunk)
+
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def char(self, consume=True):
+        """
+        Skips whitespace and returns the next character.
+
+        Keyword Args:
+            consume (bool):  Advance past the character.
+
+        Returns:
+            str: The character, or an empty string at the end of the document.
+        """
+        while True:
+            self._pos = self.WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                char = self._buffer[self._pos]
+                self._pos += consume
+                return char
+            if not self._fill():
+                return ''
+
+    def value(self):
+        """
+        Decodes the next complete JSON value, reading more chunks until it has arrived.
+
+        Returns:
+            The decoded value.
+
+        Raises:
+            json.JSONDecodeError: If the document is malformed or ends early.
+        """
+        self.char(consume=False)
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+
+            # A number or literal at the very end of the buffer may continue in the next chunk.
+            if end == len(self._buffer) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def expect(self, chars):
+        """
+        Consumes the next character, which must be one of ``chars``.
+
+        Returns:
+            str: The character.
+
+        Raises:
+            ValueError: If another character, or the end of the document, comes next.
+        """
+        char = self.char()
+        if not char or char not in chars:
+            raise ValueError("Malformed JSON stream: expected one of {!r}, got {!r}".format(chars, char))
+        return char
+
+
+def iter_json_items(chunks, key='data', header=None):
+    """
+    Yields the elements of an array in a JSON object as each one finishes downloading.
+
+    Args:
+        chunks (iterable):  Chunks of the UTF-8 encoded response body.
+
+    Keyword Args:
+        key (str):  Key of the array in the top-level object.
+        header (dict):  Receives every other top-level member, e.g. ``nextPageToken``, once the object is consumed.
+
+    Yields:
+        The next decoded element.
+    """
+    stream = JSONStream(chunks)
+    stream.expect('{')
+    if stream.char(consume=False) == '}':
+        return
+
+    while True:
+        name = stream.value()
+        stream.expect(':')
+        if name == key:
+            stream.expect('[')
+            if stream.char(consume=False) == ']':
+                stream.char()
+            else:
+                while True:
+                    yield stream.value()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            value = stream.value()
+            if header is not None:
+                header[name] = value
+
+        if stream.expect(',}') == '}':
+            return
 
-        return User(self, data=r.json()['data'][0])
 
-    @property
-    def version(self):
-        """
-        Current API version as reported by server.
+def updated_since_params(updated_since):
+    """
+    Request parameters filtering a query on ``updatedDate``.
 
-        Returns:
-            tuple: A tuple of the major and minor version numbers.
+    Args:
+        updated_since (datetime.datetime or str):  Earliest update time, or None for no filter.
 
-        See Also:
-            https://developers.wrike.com/documentation/api/methods/api-version
-        """
-        r = self.get("version")
-        data = r.json()["data"][0]
-        return data['major'], data['minor']
+    Returns:
+        dict: Parameters to pass with the request.
+    """
+    if updated_since is None:
+        return {}
+    if isinstance(updated_since, datetime.datetime):
+        updated_since = updated_since.strftime(DATE_FORMAT)
+    return {'updatedDate': json.dumps({'start': updated_since})}
 
 
 class PrykeObject:
     """
     Generic Pryke Object
 
+    Attributes are :class:`Field` descriptors over the API data, and subclasses declare ``__slots__`` for anything
+    else they keep.
+
     Attributes:
         self.instance (:class:`Pryke`): API Client Instance
-        self._date_fields (list):  List of fields to treat as dates
+        self._dates (dict):  Dates parsed so far by :class:`DateField` attributes, keyed by API field
     """
-    def __init__(self, instance, data={}):
+    __slots__ = ('instance', '_data', '_dates')
+
+    def __init__(self, instance, data=None):
         """
         Inits Object
 
@@ -307,22 +2793,8 @@ class PrykeObject:
         """
         self.instance = instance
 
-        self._data = data
-        self._date_fields = []
-
-    def _format_dates(self):
-        """
-        Format date strings to python datetime
-
-        Returns:
-            bool: True is successful
-        """
-        for date_field in self._date_fields:
-            current_value = getattr(self, date_field)
-            if current_value is not None:
-                setattr(self, date_field, datetime.datetime.strptime(current_value, "%Y-%m-%dT%H:%M:%SZ"))
-
-        return True
+        self._data = data if data is not None else {}
+        self._dates = None
 
     def get(self, path, params={}):
         """
@@ -359,49 +2831,57 @@ class Account(PrykeObject):
     See Also:
         https://developers.wrike.com/documentation/api/methods/accounts
     """
-    def __init__(self, instance, data={}):
-        """
-        Inits Account
+    __slots__ = ()
+
+    id = Field('id')
+    name = Field('name')
+    date_format = Field('title')
+    first_day_of_week = Field('firstDayOfWeek')
+    work_days = Field('workDays')
+    root_folder_id = Field('rootFolderId')
+    recycle_bin_id = Field('recycleBinId')
+    created_date = DateField('createdDate')
+    subscription = Field('subscription')
+    metadata = Field('metadata')
+    custom_fields = Field('customFields')
+    joined_date = DateField('joinedDate')
 
-        Args:
-            instance (:class:`Pryke`):  An API client instance
+    @property
+    def subscription_type(self):
+        """
+        Type of the account subscription, if any.
+        """
+        return (self.subscription or {}).get('type')
 
-        Keyword Args:
-            data (dict): Data to populate object attributes
+    @property
+    def subscription_paid(self):
         """
-        super().__init__(instance, data)
+        Whether the account subscription is paid, if any.
+        """
+        return (self.subscription or {}).get('paid')
 
-        self.id = data.get('id')
-        self.name = data.get('name')
-        self.date_format = data.get('title')
-        self.first_day_of_week = data.get("firstDayOfWeek")
-        self.work_days = data.get("workDays")
-        self.root_folder_id = data.get("rootFolderId")
-        self.recycle_bin_id = data.get("recycleBinId")
-        self.created_date = data.get("createdDate")
-        self.subscription = data.get("subscription")
-        self.metadata = data.get("metadata")
-        self.custom_fields = data.get("customFields")
-        self.joined_date = data.get("joinedDate")
-
-        if self.subscription is not None:
-            self.subscription_type = self.subscription.get('type')
-            self.subscription_paid = self.subscription.get('paid')
-            self.subscription_user_limit = self.subscription.get('userLimit')
-
-        self._date_fields = ["created_date", "joined_date"]
-        self._format_dates()
+    @property
+    def subscription_user_limit(self):
+        """
+        User limit of the account subscription, if any.
+        """
+        return (self.subscription or {}).get('userLimit')
 
     def __repr__(self):
         return "Pryke Account {}".format(self.id)
 
-    def attachments(self, start, end):
+    def attachments(self, start, end, with_urls=False):
         """
         Return all Attachments of account tasks and folders.
 
+        Ranges longer than Wrike allows are split into windows of :data:`ATTACHMENT_WINDOW`, one request each.
+
         Args:
             start (datetime.datetime): Created date filter start
-            end (datetime.datetime): Created date filter end (must be less than 31 days from start)
+            end (datetime.datetime): Created date filter end
+
+        Keyword Args:
+            with_urls (bool):  Include download URLs.
 
         Yields:
             :class:`Attachment`
@@ -409,13 +2889,31 @@ class Account(PrykeObject):
         See Also:
             https://developers.wrike.com/documentation/api/methods/get-attachments#get-accounts-single-attachments
         """
-        # TODO: add versions and withUrls params
-        params = {'createdDate': { 'start': start.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                                   'end': end.strftime("%Y-%m-%dT%H:%M:%SZ") }}
-        r = self.get("accounts/{}/attachments".format(self.id), params=params)
+        # TODO: add versions param
+        while start <= end:
+            window_end = min(end, start + ATTACHMENT_WINDOW)
+            params = query_params({'created_date': {'start': start, 'end': window_end}, 'with_urls': with_urls or None},
+                                  {'created_date': 'createdDate', 'with_urls': 'withUrls'})
+            yield from self.instance.paginate("accounts/{}/attachments".format(self.id), Attachment, params=params)
+            start = window_end + datetime.timedelta(seconds=1)
+
+    def export_attachments(self, directory, start, end, workers=None):
+        """
+        Downloads all attachments created in a date range into a directory, several at a time.
+
+        Args:
+            directory (str):  Directory to save the attachments in.
+            start (datetime.datetime): Created date filter start
+            end (datetime.datetime): Created date filter end
+
+        Keyword Args:
+            workers (int):  Number of concurrent downloads.
 
-        for attachment_data in r.json()['data']:
-            yield Attachment(self.instance, data=attachment_data)
+        Returns:
+            list: The result of :meth:`Pryke.download_attachments` for each attachment.
+        """
+        return self.instance.download_attachments(self.attachments(start, end, with_urls=True), directory,
+                                                  workers=workers)
 
     def contacts(self):
         """
@@ -424,22 +2922,31 @@ class Account(PrykeObject):
         Yields:
             :class:`Contact`
         """
-        r = self.get("accounts/{}/contacts".format(self.id))
-
-        for contact_data in r.json()['data']:
-            yield Contact(self.instance, data=contact_data)
+        yield from self.instance.paginate("accounts/{}/contacts".format(self.id), Contact)
 
-    def folders(self):
+    def folders(self, updated_since=None, fields=None, raw=False):
         """
         All folders associated with the account.
 
+        Keyword Args:
+            updated_since (datetime.datetime or str):  Only folders updated at or after this time
+            fields (list):  Optional fields to include, e.g. ["description"]
+            raw (bool or tuple):  Yield dicts or tuples of the given keys instead of objects
+
         Yields:
             :class:`Folder`
         """
-        r = self.get("accounts/{}/folders".format(self.id))
+        params = dict(updated_since_params(updated_since), **query_params({'fields': fields}))
+        yield from self.instance.paginate("accounts/{}/folders".format(self.id), Folder, params=params, raw=raw)
 
-        for folder_data in r.json()['data']:
-            yield Folder(self.instance, data=folder_data)
+    def folder_tree(self):
+        """
+        All folders of the account, indexed as a tree, from a single query.
+
+        Returns:
+            :class:`FolderTree`
+        """
+        return FolderTree(self.folders())
 
     def groups(self):
         """
@@ -448,10 +2955,7 @@ class Account(PrykeObject):
         Yields:
             :class:`Group`
         """
-        r = self.get("accounts/{}/groups".format(self.id))
-
-        for group_data in r.json()['data']:
-            yield Group(self.instance, data=group_data)
+        yield from self.instance.paginate("accounts/{}/groups".format(self.id), Group)
 
     @property
     def recycle_bin(self):
@@ -462,7 +2966,7 @@ class Account(PrykeObject):
             :class:`Folder`
         """
         r = self.get("folders/{}".format(self.recycle_bin_id))
-        return Folder(r.json()['data'])
+        return Folder(self.instance.decode(r)['data'])
 
     @property
     def root_folder(self):
@@ -473,19 +2977,35 @@ class Account(PrykeObject):
             :class:`Folder`
         """
         r = self.get("folders/{}".format(self.root_folder_id))
-        return Folder(r.json()['data'])
+        return Folder(self.instance.decode(r)['data'])
 
-    def tasks(self):
+    def tasks(self, page_size=None, updated_since=None, raw=False, stream=False, **filters):
         """
         All tasks associated with the account.
 
+        Keyword Args:
+            page_size (int):  Tasks requested per page
+            updated_since (datetime.datetime or str):  Only tasks updated at or after this time
+            raw (bool or tuple):  Yield dicts or tuples of the given keys instead of objects
+            stream (bool):  Parse responses incrementally, as for :meth:`Pryke.paginate`
+            **filters:  Any parameter in :data:`TASK_QUERY_PARAMETERS`, as for :meth:`Pryke.tasks`.
+
         Yields:
             :class:`Task`
         """
-        r = self.get("accounts/{}/tasks".format(self.id))
+        params = dict(updated_since_params(updated_since), **query_params(filters, TASK_QUERY_PARAMETERS))
+        yield from self.instance.paginate("accounts/{}/tasks".format(self.id), Task, params=params,
+                                          page_size=page_size, raw=raw, stream=stream)
+
 
-        for task_data in r.json()['data']:
-            yield Task(self.instance, data=task_data)
+@unique
+class AttachmentType(Enum):
+
+    BOX = "Box"
+    DROP_BOX = "DropBox"
+    GOOGLE = "Google"
+    ONE_DRIVE = "OneDrive"
+    WRIKE = "Wrike"  # Attachment file content stored in Wrike.
 
 
 class Attachment(PrykeObject):
@@ -512,7 +3032,25 @@ class Attachment(PrykeObject):
     See Also:
         https://developers.wrike.com/documentation/api/methods/attachments
     """
-    def __init__(self, instance, data={}):
+    __slots__ = ('_author', '_task')
+
+    id = Field('id')
+    author_id = Field('authorId')
+    name = Field('name')
+    created_date = DateField('createdDate')
+    version = Field('version')
+    type = Field('type', AttachmentType)
+    content_type = Field('contentType')
+    size = Field('size')
+    task_id = Field('taskId')
+    folder_id = Field('folderId')
+    comment_id = Field('commentId')
+    current_attachment_id = Field('currentAttachmentId')
+    preview_url = Field('previewUrl')
+    url = Field('url')
+    review_ids = Field('reviewIds')
+
+    def __init__(self, instance, data=None):
         """
         Inits attachment
 
@@ -524,28 +3062,9 @@ class Attachment(PrykeObject):
         """
         super().__init__(instance, data)
 
-        self.id = data.get('id')
-        self.author_id = data.get('authorId')
-        self.name = data.get('name')
-        self.created_date = data.get('createdDate')
-        self.version = data.get('version')
-        self.type = AttachmentType(data.get('type'))
-        self.content_type = data.get('contentType')
-        self.size = data.get('size')
-        self.task_id = data.get('taskId')
-        self.folder_id = data.get('folderId')
-        self.comment_id = data.get('commentId')
-        self.current_attachment_id = data.get('currentAttachmentId')
-        self.preview_url = data.get('previewUrl')
-        self.url = data.get('url')
-        self.review_ids = data.get('reviewIds')
-
         self._author = None
         self._task = None
 
-        self._date_fields = ["created_date"]
-        self._format_dates()
-
     @property
     def author(self):
         """
@@ -555,28 +3074,95 @@ class Attachment(PrykeObject):
             :class:`User`: User
         """
         if self._author is None:
-            self._author = self.instance.user(self.author_id)
+            self.instance.load_authors([self])
         return self._author
 
-    def download(self, path):
+    def download(self, path, chunk_size=DOWNLOAD_CHUNK_SIZE, resume=False, progress=None, verify_size=False):
         """
-        Downloads the attachment to the specified path
+        Downloads the attachment to the specified path, streaming it to disk in chunks.
 
         Args:
-            path (str):  Fully-qualified path where attachment should be saved
+            path (str or file):  Fully-qualified path where attachment should be saved, or a binary file object.
+
+        Keyword Args:
+            chunk_size (int):  Bytes read and written at a time.
+            resume (bool):  Continue an interrupted download with an HTTP Range request, appending to the data
+                already at ``path`` (or before the current position of a file object).
+            progress (callable):  Called with the bytes downloaded so far and the expected total (or None) after
+                each chunk.
+            verify_size (bool):  Fail if the downloaded size differs from :attr:`size`.
 
         Returns:
             bool: True if successful, False on failure
         """
         if self.url is None:
             return False
-        with open(path, "wb") as output_file:
-            if self.type == AttachmentType.WRIKE:
-                r = self.get(self.url)
-            else:
-                r = requests.get(self.url)
-            output_file.write(r.content)
-        return True
+
+        if isinstance(path, str):
+            offset = os.path.getsize(path) if resume and os.path.exists(path) else 0
+            with open(path, "ab" if offset else "wb") as output_file:
+                return self._download_to(output_file, offset, chunk_size, progress, verify_size)
+        offset = path.tell() if resume else 0
+        return self._download_to(path, offset, chunk_size, progress, verify_size)
+
+    def _download_to(self, output_file, offset, chunk_size, progress, verify_size):
+        """
+        Streams the attachment into an open file, starting ``offset`` bytes in.
+
+        Args:
+            output_file (file):  Binary file object positioned at ``offset``.
+            offset (int):  Bytes already downloaded.
+            chunk_size (int):  Bytes read and written at a time.
+            progress (callable):  Progress callback, or None.
+            verify_size (bool):  Fail if the downloaded size differs from :attr:`size`.
+
+        Returns:
+            bool: True if successful, False on failure
+        """
+        headers = dict(self.instance.headers)
+        if offset:
+            headers['Range'] = "bytes={}-".format(offset)
+
+        if self.type == AttachmentType.WRIKE:
+            r = self.instance.get(self.url, headers=headers, stream=True)
+        else:
+            r = self.instance.session.get(self.url, headers=headers, timeout=self.instance.timeout, stream=True)
+
+        with r:
+            if r.status_code == 416 and offset:  # nothing left to download
+                return not verify_size or self._size_matches(offset)
+            if r.status_code not in [200, 206]:
+                return False
+
+            if offset and r.status_code == 200:  # server ignored the range; start over
+                output_file.seek(output_file.tell() - offset)
+                output_file.truncate()
+                offset = 0
+
+            total = self.size if self.size is not None and self.size >= 0 else None
+            if total is None and 'Content-Length' in r.headers:
+                total = offset + int(r.headers['Content-Length'])
+
+            downloaded = offset
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                output_file.write(chunk)
+                downloaded += len(chunk)
+                if progress is not None:
+                    progress(downloaded, total)
+
+        return not verify_size or self._size_matches(downloaded)
+
+    def _size_matches(self, downloaded):
+        """
+        Whether the downloaded byte count matches :attr:`size`; sizes unknown to Wrike always match.
+
+        Args:
+            downloaded (int):  Bytes downloaded.
+
+        Returns:
+            bool: True if the sizes match
+        """
+        return self.size is None or self.size < 0 or downloaded == self.size
 
     @property
     def task(self):
@@ -591,16 +3177,6 @@ class Attachment(PrykeObject):
         return self._task
 
 
-@unique
-class AttachmentType(Enum):
-
-    BOX = "Box"
-    DROP_BOX = "DropBox"
-    GOOGLE = "Google"
-    ONE_DRIVE = "OneDrive"
-    WRIKE = "Wrike"  # Attachment file content stored in Wrike.
-
-
 class Comment(PrykeObject):
     """
     Wrike Comment
@@ -617,7 +3193,17 @@ class Comment(PrykeObject):
     See Also:
         https://developers.wrike.com/documentation/api/methods/comments
     """
-    def __init__(self, instance, data={}):
+    __slots__ = ('_author', '_folder', '_task')
+
+    id = Field('id')
+    author_id = Field('authorId')
+    text = Field('text')  # text (body) of the comment
+    updated_date = DateField('updatedDate')
+    created_date = DateField('createdDate')
+    task_id = Field('taskId')
+    folder_id = Field('folderId')
+
+    def __init__(self, instance, data=None):
         """
         Inits comment
 
@@ -626,21 +3212,11 @@ class Comment(PrykeObject):
             data (dict): Data from API
         """
         super().__init__(instance, data)
-        self.id = data.get('id')
-        self.author_id = data.get('authorId')
-        self.text = data.get('text')  # text (body) of the comment
-        self.updated_date = data.get('updatedDate')
-        self.created_date = data.get('createdDate')
-        self.task_id = data.get('taskId')
-        self.folder_id = data.get('folderId')
 
         self._author = None
         self._folder = None
         self._task = None
 
-        self._date_fields = ["created_date", "updated_date"]
-        self._format_dates()
-
     @property
     def author(self):
         """
@@ -650,7 +3226,7 @@ class Comment(PrykeObject):
             :class:`User`: The author
         """
         if self._author is None:
-            self._author = self.instance.user(self.author_id)
+            self.instance.load_authors([self])
         return self._author
 
     @property
@@ -685,20 +3261,13 @@ class Contact(PrykeObject):
     See Also:
         https://developers.wrike.com/documentation/api/methods/contacts
     """
-    def __init__(self, instance, data={}):
-        """
-        Inits contact
+    __slots__ = ()
 
-        Args:
-            instance (Pryke):
-            data (dict):
-        """
-        super().__init__(instance, data)
-        self.id = data.get('id')
-        self.first_name = data.get('firstName')
-        self.last_name = data.get('lastName')
-        self.type = data.get('type')  # UserType Enum
-        # TODO: add more properties
+    id = Field('id')
+    first_name = Field('firstName')
+    last_name = Field('lastName')
+    type = Field('type')  # UserType Enum
+    # TODO: add more properties
 
 
 class Folder(PrykeObject):
@@ -708,54 +3277,60 @@ class Folder(PrykeObject):
     See Also:
        https://developers.wrike.com/documentation/api/methods/folders-&-projects
     """
-    def __init__(self, instance, data={}):
-        """
-        Inits folder
-
-        Args:
-            instance (Pryke):
-            data (dict):
-        """
-        super().__init__(instance, data)
-        self.id = data.get('id')
-        self.account_id = data.get('accountId')
-        self.title = data.get('title')
-        self.created_date = data.get('createdDate')
-        self.updated_date = data.get('updatedDate')
-        self.brief_description = data.get('briefDescription')
-        self.description = data.get('description')
-        self.color = data.get('color')
-        self.shared_ids = data.get('sharedIds', [])
-        self.parent_ids = data.get('parentIds', [])
-        self.child_ids = data.get('childIds', [])
-        self.super_parent_ids = data.get('superParentIds', [])
-        self.scope = data.get('scope')
-        self.has_attachments = data.get('hasAttachments')
-        self.attachment_count = data.get('attachmentCount')
-        # TODO: add more fields
-        self.project = data.get('project')
-
-        self._date_fields = []
-        self._format_dates()
+    __slots__ = ()
+
+    id = Field('id')
+    account_id = Field('accountId')
+    title = Field('title')
+    created_date = DateField('createdDate')
+    updated_date = DateField('updatedDate')
+    brief_description = Field('briefDescription')
+    description = Field('description')
+    color = Field('color')
+    shared_ids = Field('sharedIds', default=list)
+    parent_ids = Field('parentIds', default=list)
+    child_ids = Field('childIds', default=list)
+    super_parent_ids = Field('superParentIds', default=list)
+    scope = Field('scope')
+    has_attachments = Field('hasAttachments')
+    attachment_count = Field('attachmentCount')
+    # TODO: add more fields
+    project = Field('project')
 
     def __repr__(self):
         return "Pryke Folder {}".format(self.id)
 
-    def attachments(self):
+    def attachments(self, with_urls=False):
         """
         All attachments of a folder.
 
+        Keyword Args:
+            with_urls (bool):  Include download URLs.
+
         Yields:
             Attachment
 
         See Also:
             https://developers.wrike.com/documentation/api/methods/get-attachments#get-folders-single-attachments
         """
-        # TODO: add versions, createdDate, and withUrls parameters
-        r = self.get("folders/{}/attachments".format(self.id))
+        # TODO: add versions and createdDate parameters
+        params = {'withUrls': 'true'} if with_urls else {}
+        yield from self.instance.paginate("folders/{}/attachments".format(self.id), Attachment, params=params)
+
+    def export_attachments(self, directory, workers=None):
+        """
+        Downloads all attachments of the folder into a directory, several at a time.
+
+        Args:
+            directory (str):  Directory to save the attachments in.
+
+        Keyword Args:
+            workers (int):  Number of concurrent downloads.
 
-        for attachment_data in r.json()['data']:
-            yield Attachment(self.instance, data=attachment_data)
+        Returns:
+            list: The result of :meth:`Pryke.download_attachments` for each attachment.
+        """
+        return self.instance.download_attachments(self.attachments(with_urls=True), directory, workers=workers)
 
     def children(self):
 
@@ -771,8 +3346,197 @@ class Folder(PrykeObject):
         Yields:
             :class:`User`
         """
-        for user_id in self.shared_ids:
-            yield self.instance.user(user_id)
+        yield from self.instance.users(self.shared_ids)
+
+
+class FolderTree:
+    """
+    Folder hierarchy indexed for fast navigation without further requests.
+
+    Folders are laid out in depth-first (Euler tour) order, so each subtree is a contiguous interval of that order:
+    ancestry checks compare interval bounds and subtree listings are slices.  The tour enters every folder once,
+    through the first parent it reaches the folder from; links from any other parent are kept as adjacency and
+    followed on demand, so the order holds each folder exactly once however many parents share it.
+
+    Attributes:
+        roots (list):  IDs of folders without a known parent
+    """
+    def __init__(self, folders):
+        """
+        Builds the indexes.
+
+        Args:
+            folders (iterable):  :class:`Folder` objects, e.g. from :meth:`Pryke.folders`.  Child and parent IDs
+                outside this set are ignored.
+        """
+        self._folders = {folder.id: folder for folder in folders}
+        self._children = {folder_id: [] for folder_id in self._folders}
+        self._parents = {folder_id: [] for folder_id in self._folders}
+        self._edges = set()
+
+        for folder in self._folders.values():
+            for child_id in folder.child_ids:
+                self._link(folder.id, child_id)
+            for parent_id in folder.parent_ids:
+                self._link(parent_id, folder.id)
+
+        self.roots = [folder_id for folder_id, parent_ids in self._parents.items() if not parent_ids]
+        self._order = []
+        self._intervals = {}
+        self._links = {folder_id: [] for folder_id in self._folders}  # children not entered from this parent
+
+        for root_id in self.roots:
+            self._tour(root_id)
+        for folder_id in self._folders:  # folders only reachable through a cycle
+            if folder_id not in self._intervals:
+                self.roots.append(folder_id)
+                self._tour(folder_id)
+        self._linked = any(self._links.values())
+
+    def __contains__(self, folder_id):
+        return folder_id in self._folders
+
+    def __getitem__(self, folder_id):
+        return self._folders[folder_id]
+
+    def __iter__(self):
+        return iter(self._folders.values())
+
+    def __len__(self):
+        return len(self._folders)
+
+    def _link(self, parent_id, child_id):
+        """
+        Records a parent/child edge between two known folders.
+        """
+        if parent_id in self._folders and child_id in self._folders and (parent_id, child_id) not in self._edges:
+            self._edges.add((parent_id, child_id))
+            self._children[parent_id].append(child_id)
+            self._parents[child_id].append(parent_id)
+
+    def _tour(self, root_id):
+        """
+        Appends the folders reachable from a folder that are not in the order yet, recording the interval of each.
+
+        Args:
+            root_id (str):  Folder to start from.
+        """
+        stack = [(root_id, iter(self._children[root_id]), len(self._order))]
+        entered = {root_id}
+        self._order.append(root_id)
+
+        while stack:
+            folder_id, children, start = stack[-1]
+            for child_id in children:
+                if child_id in entered or child_id in self._intervals:
+                    self._links[folder_id].append(child_id)
+                    continue
+                entered.add(child_id)
+                stack.append((child_id, iter(self._children[child_id]), len(self._order)))
+                self._order.append(child_id)
+                break
+            else:
+                stack.pop()
+                self._intervals[folder_id] = (start, len(self._order))
+
+    def children(self, folder_id):
+        """
+        Direct children of a folder.
+
+        Args:
+            folder_id (str):  ID of the folder.
+
+        Returns:
+            list: :class:`Folder` objects.
+        """
+        return [self._folders[child_id] for child_id in self._children[folder_id]]
+
+    def descendants(self, folder_id):
+        """
+        Every folder below a folder, in depth-first order.
+
+        Args:
+            folder_id (str):  ID of the folder.
+
+        Returns:
+            list: :class:`Folder` objects, excluding the folder itself.
+        """
+        found = OrderedDict()
+        pending = [folder_id]
+        while pending:
+            subtree_id = pending.pop()
+            if subtree_id in found:
+                continue
+            start, end = self._intervals[subtree_id]
+            for descendant_id in self._order[start:end]:
+                found[descendant_id] = self._folders[descendant_id]
+                pending.extend(reversed(self._links[descendant_id]))
+        found.pop(folder_id, None)
+        return list(found.values())
+
+    def is_descendant(self, folder_id, ancestor_id):
+        """
+        Whether a folder is below another one.
+
+        Constant time when the folder is below ``ancestor_id`` through first parents, or when no folder has more
+        than one parent; otherwise the ancestors of ``folder_id`` reached through extra parents are walked.
+
+        Args:
+            folder_id (str):  ID of the folder.
+            ancestor_id (str):  ID of the possible ancestor.
+
+        Returns:
+            bool: True if ``folder_id`` is in the subtree of ``ancestor_id`` and is not ``ancestor_id`` itself.
+        """
+        if folder_id == ancestor_id:
+            return False
+
+        ancestor_start, ancestor_end = self._intervals[ancestor_id]
+        start, end = self._intervals[folder_id]
+        if ancestor_start < start and end <= ancestor_end:
+            return True
+        if not self._linked:
+            return False
+
+        seen = {folder_id}
+        pending = [folder_id]
+        while pending:
+            current_id = pending.pop()
+            start, end = self._intervals[current_id]
+            if current_id != folder_id and ancestor_start <= start and end <= ancestor_end:
+                return True
+            for parent_id in self._parents[current_id]:
+                if parent_id not in seen:
+                    seen.add(parent_id)
+                    pending.append(parent_id)
+        return False
+
+    def parents(self, folder_id):
+        """
+        Direct parents of a folder.
+
+        Args:
+            folder_id (str):  ID of the folder.
+
+        Returns:
+            list: :class:`Folder` objects.
+        """
+        return [self._folders[parent_id] for parent_id in self._parents[folder_id]]
+
+    def path(self, folder_id):
+        """
+        Folders from a root down to a folder, following the first parent of each.
+
+        Args:
+            folder_id (str):  ID of the folder.
+
+        Returns:
+            list: :class:`Folder` objects, starting with the root and ending with the folder.
+        """
+        path = [folder_id]
+        while self._parents[path[-1]] and self._parents[path[-1]][0] not in path:
+            path.append(self._parents[path[-1]][0])
+        return [self._folders[path_id] for path_id in reversed(path)]
 
 
 class Group(PrykeObject):
@@ -793,25 +3557,17 @@ class Group(PrykeObject):
     See Also:
         https://developers.wrike.com/documentation/api/methods/groups
     """
-    def __init__(self, instance, data={}):
-        """
-        Inits group
-
-        Args:
-            instance (Pryke):  An API client instance.
-            data (dict):  Data to populate object attributes.
-        """
-        super().__init__(instance, data)
-
-        self.id = data.get('id')
-        self.account_id = data.get('accountId')
-        self.title = data.get('title')
-        self.member_ids = data.get('memberIds', [])
-        self.child_ids = data.get('childIds', [])
-        self.parent_ids = data.get('parentIds', [])
-        self.avatar_url = data.get('avatarUrl')
-        self.my_team = data.get('myTeam', False)
-        self.metadata = data.get('metadata', [])
+    __slots__ = ()
+
+    id = Field('id')
+    account_id = Field('accountId')
+    title = Field('title')
+    member_ids = Field('memberIds', default=list)
+    child_ids = Field('childIds', default=list)
+    parent_ids = Field('parentIds', default=list)
+    avatar_url = Field('avatarUrl')
+    my_team = Field('myTeam', default=False)
+    metadata = Field('metadata', default=list)
 
     def account(self):
         """
@@ -829,8 +3585,7 @@ class Group(PrykeObject):
         Yields:
             User
         """
-        for user_id in self.member_ids:
-            yield self.instance.user(user_id)
+        yield from self.instance.users(self.member_ids)
 
 
 class Task(PrykeObject):
@@ -849,7 +3604,36 @@ class Task(PrykeObject):
     See Also:
         https://developers.wrike.com/documentation/api/methods/tasks
     """
-    def __init__(self, instance, data={}):
+    __slots__ = ('_author',)
+
+    id = Field('id')
+    account_id = Field('accountId')
+    title = Field('title')
+    description = Field('description')
+    brief_description = Field('briefDescription')
+    parent_ids = Field('parentIds')
+    super_parent_ids = Field('superParentIds')
+    shared_ids = Field('sharedIds')
+    responsible_ids = Field('responsibleIds')
+    status = Field('status')
+    importance = Field('importance')
+    created_date = DateField('createdDate')
+    updated_date = DateField('updatedDate')
+    completed_date = DateField('completedDate')
+    dates = Field('dates')
+    scope = Field('scope')
+    author_ids = Field('authorIds')
+    custom_status_id = Field('customStatusId')
+    has_attachments = Field('hasAttachments')
+    attachment_count = Field('attachmentCount')  # (int)
+    permalink = Field('permalink')  # (str)
+    priority = Field('priority')  # (str)
+    followed_by_me = Field('followedByMe')  # (bool)
+    follower_ids = Field('followerIds')  # (list)
+    recurrent = Field('recurrent')  # (bool)
+    # TODO: add more properties
+
+    def __init__(self, instance, data=None):
         """
         Inits Task
 
@@ -858,38 +3642,9 @@ class Task(PrykeObject):
             data (dict): Data to populate object attributes.
         """
         super().__init__(instance, data)
-        self.id = data.get('id')
-        self.account_id = data.get('accountId')
-        self.title = data.get('title')
-        self.description = data.get('description')
-        self.brief_description = data.get('briefDescription')
-        self.parent_ids = data.get('parentIds')
-        self.super_parent_ids = data.get('superParentIds')
-        self.shared_ids = data.get('sharedIds')
-        self.responsible_ids = data.get('responsibleIds')
-        self.status = data.get('status')
-        self.importance = data.get('importance')
-        self.created_date = data.get('createdDate')
-        self.updated_date = data.get('updatedDate')
-        self.completed_date = data.get('completedDate')
-        self.dates = data.get('dates')
-        self.scope = data.get('scope')
-        self.author_ids = data.get('authorIds')
-        self.custom_status_id = data.get('customStatusId')
-        self.has_attachments = data.get('hasAttachments')
-        self.attachment_count = data.get('attachmentCount')  # (int)
-        self.permalink = data.get('permalink')  # (str)
-        self.priority = data.get('priority')  # (str)
-        self.followed_by_me = data.get('followedByMe')  # (bool)
-        self.follower_ids = data.get('followerIds')  # (list)
-        self.recurrent = data.get('recurrent')  # (bool)
-        # TODO: add more properties
 
         self._author = None
 
-        self._date_fields = ["created_date", "updated_date", "completed_date"]
-        self._format_dates()
-
     def __repr__(self):
         return "Pryke Task {}".format(self.id)
 
@@ -926,10 +3681,7 @@ class Task(PrykeObject):
             https://developers.wrike.com/documentation/api/methods/get-attachments#get-tasks-single-attachments
         """
         # TODO: add versions, createdDate, and withUrls parameters
-        r = self.get("tasks/{}/attachments".format(self.id))
-
-        for attachment_data in r.json()['data']:
-            yield Attachment(self.instance, data=attachment_data)
+        yield from self.instance.paginate("tasks/{}/attachments".format(self.id), Attachment)
 
     def comments(self):
         """
@@ -941,10 +3693,7 @@ class Task(PrykeObject):
         See Also:
             https://developers.wrike.com/documentation/api/methods/get-comments#get-tasks-single-comments
         """
-        r = self.get("tasks/{}/comments".format(self.id))
-
-        for comment_data in r.json()['data']:
-            yield Comment(self.instance, data=comment_data)
+        yield from self.instance.paginate("tasks/{}/comments".format(self.id), Comment)
 
     def export(self, path):
         """
@@ -955,12 +3704,40 @@ class Task(PrykeObject):
 
         Returns:
             bool: True if file was saved
+
+        See Also:
+            :meth:`Pryke.export_tasks` to export many tasks at once.
         """
-        template = self.instance.templates.get_template("task.html")
         with open(path, "w") as export_file:
-            export_file.write(template.render(task=self))
+            export_file.write(self.render())
         return True
 
+    def render(self, template=None, comments=None, attachments=None):
+        """
+        Renders the task to HTML.
+
+        Keyword Args:
+            template (jinja2.Template):  Template to render; defaults to "task.html".
+            comments (list):  Comments of the task, if already fetched.
+            attachments (list):  Attachments of the task, if already fetched.
+
+        Returns:
+            str
+        """
+        if template is None:
+            template = self.instance.templates.get_template("task.html")
+        if comments is None:
+            comments = list(self.comments())
+        if attachments is None:
+            attachments = list(self.attachments())
+        return template.render(task=self, comments=comments, attachments=attachments)
+
+
+@unique
+class UserType(Enum):
+    person = "Person"
+    group = "Group"
+
 
 class User(PrykeObject):
     """
@@ -988,39 +3765,138 @@ class User(PrykeObject):
     See Also:
         https://developers.wrike.com/documentation/api/methods/users
     """
-    def __init__(self, instance, data={}):
+    __slots__ = ()
+
+    id = Field('id')
+    first_name = Field('firstName')
+    last_name = Field('lastName')
+    type = Field('type', UserType)
+    profiles = Field('profiles')
+    avatar_url = Field('avatarUrl')
+    timezone = Field('timezone')
+    locale = Field('locale')
+    deleted = Field('deleted')
+    me = Field('me')
+    member_ids = Field('memberIds')
+    metadata = Field('metadata')
+    my_team = Field('myTeam')
+    title = Field('title')
+    company_name = Field('companyName')
+    phone = Field('phone')
+    location = Field('location')
+
+    def __str__(self):
+        return "{} {}".format(self.first_name, self.last_name)
+
+
+LOOKUP_TYPES = {
+    "accounts": Account,
+    "attachments": Attachment,
+    "comments": Comment,
+    "contacts": Contact,
+    "folders": Folder,
+    "groups": Group,
+    "tasks": Task,
+    "users": User,
+}
+
+SyncEvent = namedtuple('SyncEvent', ['kind', 'account_id', 'object'])
+"""Upsert of an object found by :meth:`Sync.changes`; ``kind`` is "tasks" or "folders"."""
+
+
+class Sync:
+    """
+    Incremental sync of tasks and folders using ``updatedDate`` windows.
+
+    The latest ``updatedDate`` seen per account and kind is kept as a high-water mark in a JSON state file, so each
+    run only asks Wrike for what changed since the previous one.  Records without ``updatedDate``, such as those of
+    folder tree listings, move the mark to the time the query was sent instead, less :data:`SYNC_CLOCK_SKEW`.
+    Deletions are not reported.
+
+    Attributes:
+        client (:class:`Pryke`):  API client
+        state_path (str):  Path of the JSON state file
+        kinds (tuple):  Kinds of objects to sync
+        state (dict):  High-water marks, keyed by account ID and then kind
+    """
+    def __init__(self, client, state_path, kinds=("folders", "tasks")):
         """
-        Inits User
+        Inits the sync, loading any state saved by a previous run.
 
         Args:
-            instance (Pryke):  An API client instance.
-            data (dict):  Data to populate object attributes.
+            client (:class:`Pryke`):  API client
+            state_path (str):  Path of the JSON state file; created on first save.
+
+        Keyword Args:
+            kinds (tuple):  Kinds of objects to sync, "folders" and/or "tasks".
         """
-        super().__init__(instance, data)
+        self.client = client
+        self.state_path = state_path
+        self.kinds = kinds
+        self.state = {}
 
-        self.id = data.get('id')
-        self.first_name = data.get('firstName')
-        self.last_name = data.get('lastName')
-        self.type = UserType(data.get('type'))
-        self.profiles = data.get('profiles')
-        self.avatar_url = data.get('avatarUrl')
-        self.timezone = data.get('timezone')
-        self.locale = data.get('locale')
-        self.deleted = data.get('deleted')
-        self.me = data.get('me')
-        self.member_ids = data.get('memberIds')
-        self.metadata = data.get('metadata')
-        self.my_team = data.get('myTeam')
-        self.title = data.get('title')
-        self.company_name = data.get('companyName')
-        self.phone = data.get('phone')
-        self.location = data.get('location')
+        if os.path.exists(state_path):
+            with open(state_path, "r") as state_file:
+                self.state = json.load(state_file)
 
-    def __str__(self):
-        return "{} {}".format(self.first_name, self.last_name)
+    def changes(self, accounts=None):
+        """
+        Objects created or updated since the last run.
 
+        The high-water mark of each account and kind is saved once its changes have all been consumed, so an
+        interrupted run starts over from the previous mark.  Objects updated exactly at a mark are reported again.
 
-@unique
-class UserType(Enum):
-    person = "Person"
-    group = "Group"
\ No newline at end of file
+        Keyword Args:
+            accounts (iterable):  :class:`Account` objects to sync; defaults to every accessible account.
+
+        Yields:
+            :class:`SyncEvent`: The next upsert.
+        """
+        if accounts is None:
+            accounts = self.client.accounts()
+
+        for account in accounts:
+            marks = self.state.setdefault(account.id, {})
+
+            for kind in self.kinds:
+                mark = marks.get(kind)
+                query = account.tasks if kind == "tasks" else account.folders
+                queried = (datetime.datetime.now(datetime.timezone.utc) - SYNC_CLOCK_SKEW).strftime(DATE_FORMAT)
+                dated = False
+
+                for obj in query(updated_since=mark):
+                    updated = obj._data.get('updatedDate')
+                    if updated is not None:
+                        dated = True
+                        if mark is None or updated > mark:
+                            mark = updated
+                    yield SyncEvent(kind, account.id, obj)
+
+                if not dated and (mark is None or queried > mark):
+                    mark = queried
+
+                if mark is not None:
+                    marks[kind] = mark
+                    self.save()
+
+    def reset(self, account_id=None):
+        """
+        Forgets high-water marks so the next run reads everything again.
+
+        Keyword Args:
+            account_id (str):  Only reset this account.
+        """
+        if account_id is None:
+            self.state = {}
+        else:
+            self.state.pop(account_id, None)
+        self.save()
+
+    def save(self):
+        """
+        Writes the state file, replacing it atomically.
+        """
+        temp_path = "{}.tmp".format(self.state_path)
+        with open(temp_path, "w") as state_file:
+            json.dump(self.state, state_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.state_path)
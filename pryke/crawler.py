@@ -0,0 +1,272 @@
+from pryke import (DATE_FORMAT, DEFAULT_RATE_LIMIT, TASK_QUERY_PARAMETERS, Attachment, Comment, FileTokenStore, Pryke,
+                   Task, query_params)
+
+import datetime
+import json
+import multiprocessing
+import os
+
+
+SHARD_DAYS = 30  # span of task creation dates crawled by one shard
+KINDS = ("folders", "tasks", "comments", "attachments")
+
+_client = None  # client of a worker process, created by _init_worker
+
+
+def make_client(options):
+    """
+    Creates a client from picklable options, as sent to worker processes.
+
+    Args:
+        options (dict):  Keyword arguments of :class:`pryke.Pryke`, except that a ``token_path`` is turned into a
+            :class:`pryke.FileTokenStore` shared by every process.
+
+    Returns:
+        :class:`pryke.Pryke`
+    """
+    options = dict(options)
+    token_path = options.pop('token_path', None)
+    if token_path is not None:
+        options['token_store'] = FileTokenStore(token_path)
+    return Pryke(**options)
+
+
+def _init_worker(options):
+    global _client
+    _client = make_client(options)
+
+
+def _crawl(shard, client=None):
+    try:
+        return shard, crawl_shard(client or _client, shard)
+    except Exception as e:  # reported by Crawler.run, which leaves the shard pending
+        return shard, e
+
+
+def crawl_shard(client, shard):
+    """
+    Fetches every record of one shard.
+
+    Args:
+        client (:class:`pryke.Pryke`):  API client.
+        shard (dict):  Shard planned by :meth:`Crawler.shards`.
+
+    Returns:
+        dict: UTF-8 encoded JSON Lines per kind of record.
+
+    Raises:
+        pryke.PrykeError: If any request of the shard failed.
+    """
+    records = {kind: [] for kind in shard['kinds']}
+
+    if shard['type'] == 'folders':
+        for folder in client.folders_by_id(shard['folder_ids']):
+            if 'folders' in records:
+                records['folders'].append(folder._data)
+            if 'attachments' in records:
+                records['attachments'].extend(
+                    client.paginate("folders/{}/attachments".format(folder.id), Attachment, raw=True))
+
+    else:
+        params = query_params({'created_date': {'start': shard['start'], 'end': shard['end']}}, TASK_QUERY_PARAMETERS)
+        for task in client.paginate("accounts/{}/tasks".format(shard['account_id']), Task, params=params, raw=True):
+            if 'tasks' in records:
+                records['tasks'].append(task)
+            if 'comments' in records:
+                records['comments'].extend(client.paginate("tasks/{}/comments".format(task['id']), Comment, raw=True))
+            if 'attachments' in records and task.get('hasAttachments', True):
+                records['attachments'].extend(
+                    client.paginate("tasks/{}/attachments".format(task['id']), Attachment, raw=True))
+
+    return {kind: "".join(json.dumps(record) + "\n" for record in items).encode()
+            for kind, items in records.items()}
+
+
+class Crawler:
+    """
+    Exports whole accounts to JSON Lines files on a pool of processes.
+
+    An account is split into shards: one per top level folder subtree for folders and their attachments, and one per
+    :attr:`shard_days` of task creation dates for tasks with their comments and attachments.  Worker processes
+    fetch, decode and serialize shards, and the parent process is the single writer of ``<kind>.jsonl``.  After
+    each shard the file sizes are saved to ``checkpoint.json``, so a restarted crawl skips finished shards and
+    truncates whatever an interrupted one had written.
+
+    Attributes:
+        options (dict):  Keyword arguments of the client used to plan shards
+        worker_options (dict):  Keyword arguments of the client created in every process, with its share of the
+            rate limit
+        processes (int):  Number of worker processes; 0 crawls in the calling process
+        shard_days (int):  Days of task creation dates per shard
+        since (datetime.datetime):  Earliest task creation date exported, or None
+        until (datetime.datetime):  Task creation date up to which tasks are exported, or None
+        kinds (tuple):  Kinds of records exported, any of :data:`KINDS`
+    """
+    def __init__(self, client_id, client_secret, access_token=None, token_path=None, processes=None,
+                 shard_days=SHARD_DAYS, kinds=KINDS, since=None, until=None, rate_limit=DEFAULT_RATE_LIMIT, **kwargs):
+        """
+        Inits the crawler.
+
+        Args:
+            client_id (str):
+            client_secret (str):
+
+        Keyword Args:
+            access_token (str):  Access token used by every process.
+            token_path (str):  Token file of a :class:`pryke.FileTokenStore`, for tokens refreshed during the crawl.
+            processes (int):  Number of worker processes; defaults to the number of CPUs.
+            shard_days (int):  Days of task creation dates per shard.
+            kinds (tuple):  Kinds of records to export.
+            since (datetime.datetime):  Export tasks created from this time; defaults to when the account was created.
+            until (datetime.datetime):  Export tasks created before this time; defaults to when shards are planned.
+            rate_limit (float):  Requests per minute allowed for the token; split evenly between the processes.
+            **kwargs:  Other picklable keyword arguments of :class:`pryke.Pryke`.
+        """
+        self.processes = os.cpu_count() if processes is None else processes
+        self.shard_days = shard_days
+        self.since = since
+        self.until = until
+        self.kinds = tuple(kinds)
+
+        self.options = dict(kwargs, client_id=client_id, client_secret=client_secret, access_token=access_token,
+                            token_path=token_path, rate_limit=rate_limit, interactive=False)
+        self.worker_options = dict(self.options)
+        if rate_limit is not None:
+            self.worker_options['rate_limit'] = rate_limit / max(1, self.processes)
+
+    def shards(self, client, account_id):
+        """
+        Splits an account into shards.
+
+        Args:
+            client (:class:`pryke.Pryke`):  API client.
+            account_id (str):  Account to split.
+
+        Returns:
+            list: JSON serializable shards, each with a unique ``id``.
+        """
+        account = client.account(account_id)
+        shards = []
+
+        folder_kinds = [kind for kind in self.kinds if kind in ('folders', 'attachments')]
+        if folder_kinds:
+            tree = account.folder_tree()
+            claimed = set()
+            for root_id in tree.roots:
+                groups = [[root_id]] + [[child.id] + [folder.id for folder in tree.descendants(child.id)]
+                                        for child in tree.children(root_id)]
+                for group in groups:
+                    folder_ids = [folder_id for folder_id in group if folder_id not in claimed]
+                    claimed.update(folder_ids)
+                    if folder_ids:
+                        shards.append({'id': "folders:{}".format(group[0]), 'type': 'folders', 'kinds': folder_kinds,
+                                       'account_id': account_id, 'folder_ids': folder_ids})
+
+        task_kinds = [kind for kind in self.kinds if kind in ('tasks', 'comments', 'attachments')]
+        if task_kinds:
+            start = self.since or account.created_date or datetime.datetime(2006, 1, 1)  # Wrike was founded in 2006
+            until = self.until or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            span = datetime.timedelta(days=self.shard_days)
+            while start < until:
+                end = min(start + span, until)
+                shards.append({'id': "tasks:{}".format(start.strftime(DATE_FORMAT)), 'type': 'tasks',
+                               'kinds': task_kinds, 'account_id': account_id, 'start': start.strftime(DATE_FORMAT),
+                               'end': (end - datetime.timedelta(seconds=1)).strftime(DATE_FORMAT)})
+                start = end
+
+        return shards
+
+    def _results(self, shards):
+        """
+        Crawls shards on the process pool, or in this process if :attr:`processes` is 0.
+
+        Yields:
+            tuple: Each shard and its records, or the exception that failed it, in the order shards finish.
+        """
+        if self.processes == 0:
+            client = make_client(self.worker_options)
+            for shard in shards:
+                yield _crawl(shard, client)
+            return
+
+        with multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(self.worker_options,)) as pool:
+            yield from pool.imap_unordered(_crawl, shards)
+
+    def run(self, account_id, directory, progress=None):
+        """
+        Exports an account, resuming from the checkpoint in ``directory`` if there is one.
+
+        Args:
+            account_id (str):  Account to export.
+            directory (str):  Directory of the ``<kind>.jsonl`` files and ``checkpoint.json``; created if missing.
+
+        Keyword Args:
+            progress (callable):  Called after every shard with the number of finished shards, the total and the
+                shard.
+
+        Returns:
+            dict: Path of the JSON Lines file of every kind.
+
+        Raises:
+            ValueError: If ``directory`` holds the checkpoint of another account.
+            pryke.PrykeError: The first error of a failed shard, once every other shard is done.  Failed shards stay
+                pending, so running again retries just those.
+        """
+        os.makedirs(directory, exist_ok=True)
+        checkpoint_path = os.path.join(directory, "checkpoint.json")
+        paths = {kind: os.path.join(directory, "{}.jsonl".format(kind)) for kind in self.kinds}
+
+        checkpoint = {'account_id': account_id, 'shards': None, 'done': [], 'sizes': {}}
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            if checkpoint['account_id'] != account_id:
+                raise ValueError("{} holds an export of account {}".format(directory, checkpoint['account_id']))
+
+        if checkpoint['shards'] is None:
+            checkpoint['shards'] = self.shards(make_client(self.options), account_id)
+            self._save(checkpoint, checkpoint_path)
+
+        for kind, path in paths.items():  # drop records of a shard that was interrupted
+            with open(path, "ab") as output:
+                output.truncate(checkpoint['sizes'].get(kind, 0))
+
+        done = set(checkpoint['done'])
+        pending = [shard for shard in checkpoint['shards'] if shard['id'] not in done]
+        outputs = {kind: open(path, "ab") for kind, path in paths.items()}
+        errors = []
+        try:
+            for shard, lines in self._results(pending):
+                if isinstance(lines, Exception):
+                    errors.append(lines)
+                    continue
+
+                for kind, text in lines.items():
+                    outputs[kind].write(text)
+                for output in outputs.values():
+                    output.flush()
+                    os.fsync(output.fileno())
+
+                checkpoint['done'].append(shard['id'])
+                checkpoint['sizes'] = {kind: output.tell() for kind, output in outputs.items()}
+                self._save(checkpoint, checkpoint_path)
+
+                if progress is not None:
+                    progress(len(checkpoint['done']), len(checkpoint['shards']), shard)
+        finally:
+            for output in outputs.values():
+                output.close()
+
+        if errors:
+            raise errors[0]
+        return paths
+
+    @staticmethod
+    def _save(checkpoint, path):
+        """
+        Writes the checkpoint, replacing it atomically.
+        """
+        temp_path = "{}.tmp".format(path)
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(temp_path, path)
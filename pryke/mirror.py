@@ -0,0 +1,409 @@
+from pryke import DATE_FORMAT, Attachment, Comment, Folder, Task, User
+
+import datetime
+import json
+import sqlite3
+import threading
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (id TEXT PRIMARY KEY, account_id TEXT, status TEXT, importance TEXT,
+                                  created_date TEXT, updated_date TEXT, completed_date TEXT, data TEXT);
+CREATE TABLE IF NOT EXISTS task_parents (task_id TEXT, folder_id TEXT, PRIMARY KEY (task_id, folder_id));
+CREATE TABLE IF NOT EXISTS task_responsibles (task_id TEXT, user_id TEXT, PRIMARY KEY (task_id, user_id));
+CREATE TABLE IF NOT EXISTS folders (id TEXT PRIMARY KEY, account_id TEXT, title TEXT, created_date TEXT,
+                                    updated_date TEXT, data TEXT);
+CREATE TABLE IF NOT EXISTS folder_parents (folder_id TEXT, parent_id TEXT, PRIMARY KEY (folder_id, parent_id));
+CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, data TEXT);
+CREATE TABLE IF NOT EXISTS comments (id TEXT PRIMARY KEY, task_id TEXT, folder_id TEXT, author_id TEXT,
+                                     created_date TEXT, updated_date TEXT, data TEXT);
+CREATE TABLE IF NOT EXISTS attachments (id TEXT PRIMARY KEY, task_id TEXT, folder_id TEXT, author_id TEXT,
+                                        created_date TEXT, data TEXT);
+
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS tasks_account ON tasks (account_id);
+CREATE INDEX IF NOT EXISTS tasks_created ON tasks (created_date);
+CREATE INDEX IF NOT EXISTS tasks_updated ON tasks (updated_date);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed_date);
+CREATE INDEX IF NOT EXISTS task_parents_folder ON task_parents (folder_id);
+CREATE INDEX IF NOT EXISTS task_responsibles_user ON task_responsibles (user_id);
+CREATE INDEX IF NOT EXISTS folders_updated ON folders (updated_date);
+CREATE INDEX IF NOT EXISTS folder_parents_parent ON folder_parents (parent_id);
+CREATE INDEX IF NOT EXISTS comments_task ON comments (task_id);
+CREATE INDEX IF NOT EXISTS comments_folder ON comments (folder_id);
+CREATE INDEX IF NOT EXISTS comments_author ON comments (author_id);
+CREATE INDEX IF NOT EXISTS attachments_task ON attachments (task_id);
+CREATE INDEX IF NOT EXISTS attachments_folder ON attachments (folder_id);
+"""
+
+LOAD_KINDS = ("folders", "tasks", "comments", "attachments", "users")  # kinds of objects Mirror.load copies
+
+SUBTREE = """
+WITH RECURSIVE subtree(id) AS (
+    SELECT ? UNION SELECT folder_id FROM folder_parents JOIN subtree ON parent_id = subtree.id
+)
+SELECT id FROM subtree
+"""
+"""Query of the IDs of a folder and every folder below it, given the folder ID."""
+
+
+class Mirror:
+    """
+    Local SQLite copy of tasks, folders, users, comments and attachments, answering queries without API requests.
+
+    Objects are stored as their raw API data alongside indexed columns, and queries return the usual model classes
+    bound to :attr:`client`, so their navigation methods still work.
+
+    Attributes:
+        client (:class:`pryke.Pryke`):  API client the returned objects are bound to
+        path (str):  Path of the SQLite database, or ":memory:"
+    """
+    def __init__(self, client, path=":memory:"):
+        """
+        Opens the mirror, creating the database if needed.
+
+        Args:
+            client (:class:`pryke.Pryke`):  API client the returned objects are bound to
+
+        Keyword Args:
+            path (str):  Path of the SQLite database, or ":memory:"
+        """
+        self.client = client
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self._db.close()
+
+    def load(self, account, kinds=LOAD_KINDS, workers=None):
+        """
+        Copies an account into the mirror.
+
+        Folders of the account's folder tree carry no ``accountId``; they are stored under ``account``.  Comments are
+        read per task on a thread pool, attachments by creation date windows since the account was created, and the
+        users responsible for tasks or authoring comments and attachments with batched lookups.
+
+        Args:
+            account (:class:`pryke.Account`):  Account to copy.
+
+        Keyword Args:
+            kinds (tuple):  Kinds of objects to copy, any of :data:`LOAD_KINDS`.  Comments are read from the tasks
+                copied in the same call.
+            workers (int):  Threads reading comments; defaults to :data:`pryke.DEFAULT_WORKERS`.
+
+        Returns:
+            int: Number of objects stored.
+        """
+        def with_account(folder):
+            folder._data.setdefault('accountId', account.id)
+            return folder
+
+        count = 0
+        user_ids = []
+
+        if "folders" in kinds:
+            count += self.upsert(with_account(folder) for folder in account.folders())
+
+        tasks = list(account.tasks()) if "tasks" in kinds or "comments" in kinds else []
+        if "tasks" in kinds:
+            count += self.upsert(tasks)
+            user_ids.extend(user_id for task in tasks for user_id in task.responsible_ids or [])
+
+        if "comments" in kinds:
+            comments = []
+            for found in self.client.map(lambda task: list(task.comments()), tasks, workers=workers):
+                if isinstance(found, Exception):
+                    raise found
+                comments.extend(found)
+            count += self.upsert(comments)
+            user_ids.extend(comment.author_id for comment in comments)
+
+        if "attachments" in kinds:
+            start = account.created_date or datetime.datetime(2006, 1, 1)  # Wrike was founded in 2006
+            end = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            attachments = list(account.attachments(start, end))
+            count += self.upsert(attachments)
+            user_ids.extend(attachment.author_id for attachment in attachments)
+
+        if "users" in kinds:
+            count += self.upsert(self.client.users(user_id for user_id in user_ids if user_id))
+
+        return count
+
+    def apply(self, events):
+        """
+        Stores the objects of :class:`pryke.SyncEvent` upserts, keeping the mirror current with :class:`pryke.Sync`.
+
+        Args:
+            events (iterable):  Events from :meth:`pryke.Sync.changes`.
+
+        Returns:
+            int: Number of objects stored.
+        """
+        return self.upsert(event.object for event in events)
+
+    def upsert(self, objects):
+        """
+        Inserts or replaces objects.
+
+        Args:
+            objects (iterable):  :class:`Task`, :class:`Folder`, :class:`User`, :class:`Comment` or
+                :class:`Attachment` objects.
+
+        Returns:
+            int: Number of objects stored.
+        """
+        count = 0
+        with self._lock:
+            for obj in objects:
+                self._store(obj)
+                count += 1
+            self._db.commit()
+        return count
+
+    def _store(self, obj):
+        """
+        Writes one object and its link rows.
+
+        Args:
+            obj (:class:`pryke.PrykeObject`):  Object to store.
+        """
+        data = obj._data
+        raw = json.dumps(data)
+
+        if isinstance(obj, Task):
+            self._db.execute("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (obj.id, obj.account_id, obj.status, obj.importance, data.get('createdDate'),
+                              data.get('updatedDate'), data.get('completedDate'), raw))
+            self._replace_links("task_parents", "task_id", obj.id, obj.parent_ids)
+            self._replace_links("task_responsibles", "task_id", obj.id, obj.responsible_ids)
+        elif isinstance(obj, Folder):
+            self._db.execute("INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?, ?)",
+                             (obj.id, obj.account_id, obj.title, data.get('createdDate'), data.get('updatedDate'),
+                              raw))
+            # folder tree listings only carry childIds, lookups also parentIds; keep whichever side is known
+            if 'parentIds' in data:
+                self._replace_links("folder_parents", "folder_id", obj.id, obj.parent_ids)
+            if 'childIds' in data:
+                self._db.execute("DELETE FROM folder_parents WHERE parent_id = ?", (obj.id,))
+                self._db.executemany("INSERT OR IGNORE INTO folder_parents VALUES (?, ?)",
+                                     [(child_id, obj.id) for child_id in obj.child_ids])
+        elif isinstance(obj, User):
+            self._db.execute("INSERT OR REPLACE INTO users VALUES (?, ?)", (obj.id, raw))
+        elif isinstance(obj, Comment):
+            self._db.execute("INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (obj.id, obj.task_id, obj.folder_id, obj.author_id, data.get('createdDate'),
+                              data.get('updatedDate'), raw))
+        elif isinstance(obj, Attachment):
+            self._db.execute("INSERT OR REPLACE INTO attachments VALUES (?, ?, ?, ?, ?, ?)",
+                             (obj.id, obj.task_id, obj.folder_id, obj.author_id, data.get('createdDate'), raw))
+        else:
+            raise TypeError("Cannot mirror {}".format(type(obj).__name__))
+
+    def _replace_links(self, table, column, object_id, linked_ids):
+        """
+        Replaces the rows linking an object to a list of IDs.
+
+        Args:
+            table (str):  Link table.
+            column (str):  Column holding the object ID.
+            object_id (str):  ID of the object.
+            linked_ids (list):  IDs to link, or None.
+        """
+        self._db.execute("DELETE FROM {} WHERE {} = ?".format(table, column), (object_id,))
+        self._db.executemany("INSERT OR IGNORE INTO {} VALUES (?, ?)".format(table),
+                             [(object_id, linked_id) for linked_id in linked_ids or []])
+
+    def _query(self, cls, sql, params):
+        """
+        Runs a query selecting raw data and builds objects from the rows.
+
+        Args:
+            cls (type):  Model class to build.
+            sql (str):  Query selecting a single ``data`` column.
+            params (list):  Query parameters.
+
+        Returns:
+            list: The objects found.
+        """
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [cls(self.client, data=json.loads(row[0])) for row in rows]
+
+    def _get(self, cls, table, object_id):
+        """
+        Looks up one object by ID.
+
+        Returns:
+            :class:`pryke.PrykeObject`: The object, or None if it is not mirrored.
+        """
+        found = self._query(cls, "SELECT data FROM {} WHERE id = ?".format(table), [object_id])
+        return found[0] if found else None
+
+    def attachment(self, attachment_id):
+        """
+        Looks up a mirrored attachment by ID.
+
+        Args:
+            attachment_id (str):  ID of the attachment.
+
+        Returns:
+            :class:`pryke.Attachment`: The attachment, or None.
+        """
+        return self._get(Attachment, "attachments", attachment_id)
+
+    def attachments(self, task_id=None, folder_id=None):
+        """
+        Mirrored attachments, optionally of one task or folder.
+
+        Keyword Args:
+            task_id (str):  Only attachments of this task.
+            folder_id (str):  Only attachments of this folder.
+
+        Returns:
+            list: :class:`pryke.Attachment` objects.
+        """
+        clauses, params = self._filters(task_id=task_id, folder_id=folder_id)
+        return self._query(Attachment, "SELECT data FROM attachments" + self._where(clauses), params)
+
+    def comments(self, task_id=None, folder_id=None, author_id=None):
+        """
+        Mirrored comments, oldest first.
+
+        Keyword Args:
+            task_id (str):  Only comments on this task.
+            folder_id (str):  Only comments on this folder.
+            author_id (str):  Only comments by this user.
+
+        Returns:
+            list: :class:`pryke.Comment` objects.
+        """
+        clauses, params = self._filters(task_id=task_id, folder_id=folder_id, author_id=author_id)
+        return self._query(Comment, "SELECT data FROM comments" + self._where(clauses) + " ORDER BY created_date",
+                           params)
+
+    def folder(self, folder_id):
+        """
+        Looks up a mirrored folder by ID.
+
+        Args:
+            folder_id (str):  ID of the folder.
+
+        Returns:
+            :class:`pryke.Folder`: The folder, or None.
+        """
+        return self._get(Folder, "folders", folder_id)
+
+    def folders(self, parent_id=None, account_id=None, descendants=False):
+        """
+        Mirrored folders.
+
+        Keyword Args:
+            parent_id (str):  Only children of this folder.
+            account_id (str):  Only folders of this account.
+            descendants (bool):  With ``parent_id``, include every folder below it rather than direct children only.
+
+        Returns:
+            list: :class:`pryke.Folder` objects.
+        """
+        clauses, params = self._filters(account_id=account_id)
+        if parent_id is not None and descendants:
+            clauses.append("id IN (SELECT id FROM ({}) WHERE id != ?)".format(SUBTREE))
+            params.extend([parent_id, parent_id])
+        elif parent_id is not None:
+            clauses.append("id IN (SELECT folder_id FROM folder_parents WHERE parent_id = ?)")
+            params.append(parent_id)
+        return self._query(Folder, "SELECT data FROM folders" + self._where(clauses), params)
+
+    def task(self, task_id):
+        """
+        Looks up a mirrored task by ID.
+
+        Args:
+            task_id (str):  ID of the task.
+
+        Returns:
+            :class:`pryke.Task`: The task, or None.
+        """
+        return self._get(Task, "tasks", task_id)
+
+    def tasks(self, status=None, responsible_id=None, folder_id=None, account_id=None, importance=None,
+              updated_after=None, updated_before=None, descendants=False):
+        """
+        Mirrored tasks matching every given filter, most recently updated first.
+
+        Keyword Args:
+            status (str):  Only tasks with this status, e.g. "Active".
+            responsible_id (str):  Only tasks this user is responsible for.
+            folder_id (str):  Only tasks in this folder.
+            account_id (str):  Only tasks of this account.
+            importance (str):  Only tasks of this importance, e.g. "High".
+            updated_after (datetime.datetime):  Only tasks updated at or after this time.
+            updated_before (datetime.datetime):  Only tasks updated before this time.
+            descendants (bool):  With ``folder_id``, include tasks in any folder below it rather than directly in it.
+
+        Returns:
+            list: :class:`pryke.Task` objects.
+        """
+        clauses, params = self._filters(status=status, account_id=account_id, importance=importance)
+
+        if responsible_id is not None:
+            clauses.append("id IN (SELECT task_id FROM task_responsibles WHERE user_id = ?)")
+            params.append(responsible_id)
+        if folder_id is not None and descendants:
+            clauses.append("id IN (SELECT task_id FROM task_parents WHERE folder_id IN ({}))".format(SUBTREE))
+            params.append(folder_id)
+        elif folder_id is not None:
+            clauses.append("id IN (SELECT task_id FROM task_parents WHERE folder_id = ?)")
+            params.append(folder_id)
+        if updated_after is not None:
+            clauses.append("updated_date >= ?")
+            params.append(updated_after.strftime(DATE_FORMAT))
+        if updated_before is not None:
+            clauses.append("updated_date < ?")
+            params.append(updated_before.strftime(DATE_FORMAT))
+
+        return self._query(Task, "SELECT data FROM tasks" + self._where(clauses) + " ORDER BY updated_date DESC",
+                           params)
+
+    def user(self, user_id):
+        """
+        Looks up a mirrored user by ID.
+
+        Args:
+            user_id (str):  ID of the user.
+
+        Returns:
+            :class:`pryke.User`: The user, or None.
+        """
+        return self._get(User, "users", user_id)
+
+    @staticmethod
+    def _filters(**columns):
+        """
+        Conditions matching columns to values, skipping None values.
+
+        Returns:
+            tuple: A list of SQL conditions and a list of their parameters.
+        """
+        columns = {column: value for column, value in columns.items() if value is not None}
+        return ["{} = ?".format(column) for column in columns], list(columns.values())
+
+    @staticmethod
+    def _where(clauses):
+        """
+        WHERE clause requiring every condition, or an empty string if there are none.
+
+        Args:
+            clauses (list):  SQL conditions.
+
+        Returns:
+            str: The clause.
+        """
+        return " WHERE " + " AND ".join(clauses) if clauses else ""
@@ -3,7 +3,7 @@ import os
 import pytest
 import responses
 
-from pryke import Pryke
+from pryke import AsyncPryke, Pryke
 from tests import add_response
 
 
@@ -12,6 +12,13 @@ def pryke():
     return Pryke("", "", access_token="blah")
 
 
+@pytest.fixture(scope="session")
+def async_pryke():
+    client = AsyncPryke("", "", access_token="blah", concurrency=4)
+    yield client
+    client.close()
+
+
 @pytest.fixture(scope="session")
 @responses.activate
 def account(pryke):
@@ -1,7 +1,10 @@
 from pryke import Attachment, AttachmentType, Contact, Folder, Group, Task
 from tests import add_response
+from urllib.parse import parse_qs, urlparse
 
 import datetime
+import json
+import os
 import responses
 
 
@@ -19,6 +22,39 @@ def test_account_attachments(account):
     assert attachment.type == AttachmentType.WRIKE
 
 
+@responses.activate
+def test_account_export_attachments(account, tmpdir):
+    body = {"kind": "attachments", "data": [
+        {"id": "WRIKE{}".format(i), "name": "file{}.txt".format(i), "version": 1, "type": "Wrike", "size": 4,
+         "url": "https://www.wrike.com/attachments/WRIKE{}/download/file{}.txt".format(i, i)} for i in range(2)]}
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/attachments', json=body, status=200)
+    for attachment in body['data']:
+        responses.add(responses.GET, attachment['url'], body=b"data", status=200)
+
+    start = datetime.datetime(2016, 10, 1)
+    paths = account.export_attachments(str(tmpdir), start, start + datetime.timedelta(days=1), workers=2)
+    assert [os.path.basename(path) for path in paths] == ["WRIKE0_v1_file0.txt", "WRIKE1_v1_file1.txt"]
+    assert all(os.path.getsize(path) == 4 for path in paths)
+    downloads = sorted(call.request.url for call in responses.calls if '/api/v3/' not in call.request.url)
+    assert downloads == [attachment['url'] for attachment in body['data']]
+
+
+@responses.activate
+def test_account_attachments_window(account):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/attachments')
+    start = datetime.datetime(2016, 1, 1)
+    end = datetime.datetime(2016, 3, 31)
+
+    list(account.attachments(start, end))
+    assert len(responses.calls) == 3  # 90 days in windows of at most 30 days
+    windows = [json.loads(parse_qs(urlparse(call.request.url).query)['createdDate'][0]) for call in responses.calls]
+    assert windows == [
+        {"start": "2016-01-01T00:00:00Z", "end": "2016-01-31T00:00:00Z"},
+        {"start": "2016-01-31T00:00:01Z", "end": "2016-03-01T00:00:01Z"},
+        {"start": "2016-03-01T00:00:02Z", "end": "2016-03-31T00:00:00Z"},
+    ]
+
+
 @responses.activate
 def test_account_contacts(account):
     add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/contacts')
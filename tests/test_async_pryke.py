@@ -0,0 +1,60 @@
+from tests import add_response
+from pryke import Account, Folder, Group, Task, User
+
+import asyncio
+import json
+import responses
+
+
+async def collect(agen):
+    return [item async for item in agen]
+
+
+@responses.activate
+def test_async_pryke_account(async_pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR')
+    a = asyncio.run(async_pryke.account('IEAGIITR'))
+    assert isinstance(a, Account)
+    assert a.id == "IEAGIITR"
+
+
+@responses.activate
+def test_async_pryke_folder_children(async_pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/folders/IEAGIITRI4AYHYMV')
+    parent = Folder(async_pryke.client, data={'id': 'PARENT', 'childIds': ['IEAGIITRI4AYHYMV']})
+    children = asyncio.run(collect(async_pryke.folder_children(parent)))
+    assert [f.id for f in children] == ['IEAGIITRI4AYHYMV']
+
+
+@responses.activate
+def test_async_pryke_group_users(async_pryke):
+    async_pryke.invalidate()
+    member_ids = ["USER{:04d}".format(i) for i in range(250)]
+    for start in range(0, 250, 100):
+        chunk = member_ids[start:start + 100]
+        body = {"kind": "users", "data": [{"id": user_id, "type": "Person"} for user_id in chunk]}
+        responses.add(responses.GET, 'https://www.wrike.com/api/v3/users/{}'.format(",".join(chunk)),
+                      body=json.dumps(body), status=200, content_type="application/json")
+
+    group = Group(async_pryke.client, data={'id': 'KX7ZHLB5', 'memberIds': member_ids})
+    users = asyncio.run(collect(async_pryke.group_users(group)))
+    assert len(responses.calls) == 3  # one request per 100 users
+    assert sorted(u.id for u in users) == member_ids
+    assert all(isinstance(u, User) for u in users)
+
+
+@responses.activate
+def test_async_pryke_tasks(async_pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks')
+    tasks = asyncio.run(collect(async_pryke.tasks()))
+    assert all(isinstance(t, Task) for t in tasks)
+    assert tasks[-1].id == "IEAGIITRKQAYHYM5"
+    assert tasks[-1].instance is async_pryke.client  # models are shared with the synchronous client
+
+
+@responses.activate
+def test_async_pryke_version(async_pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/version')
+    major, minor = asyncio.run(async_pryke.version())
+    assert isinstance(major, int)
+    assert isinstance(minor, int)
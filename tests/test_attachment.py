@@ -1,5 +1,6 @@
-from pryke import Task, User
+from pryke import Attachment, Task, User
 from tests import add_response
+import io
 import responses
 
 
@@ -26,6 +27,90 @@ def test_attachment_download(attachment):
     assert not attachment.download("somepath")
 
 
+@responses.activate
+def test_attachment_download_external(pryke, tmpdir):
+    """
+    download method of Attachment object for files stored outside Wrike.
+
+    Args:
+        pryke (pryke.Pryke):  Pryke instance with OAuth client mocked.
+        tmpdir:  Temporary directory.
+    """
+    responses.add(responses.GET, 'https://example.com/file.txt', body=b"external", status=200)
+    attachment = Attachment(pryke, data={'id': 'EXTERNAL', 'type': 'Google', 'url': 'https://example.com/file.txt'})
+    path = str(tmpdir.join("external.txt"))
+    assert attachment.download(path)
+    with open(path, "rb") as downloaded:
+        assert downloaded.read() == b"external"
+    assert "Pryke" in responses.calls[0].request.headers['User-Agent']  # sent through the pooled session
+
+
+@responses.activate
+def test_attachment_download_wrike(pryke, tmpdir):
+    """
+    download method of Attachment object for files stored in Wrike.
+
+    Args:
+        pryke (pryke.Pryke):  Pryke instance with OAuth client mocked.
+        tmpdir:  Temporary directory.
+    """
+    url = 'https://www.wrike.com/attachments/IEAGIITRIYACEGSL/download/notes.txt'
+    responses.add(responses.GET, url, body=b"stored in Wrike", status=200)
+    attachment = Attachment(pryke, data={'id': 'IEAGIITRIYACEGSL', 'type': 'Wrike', 'url': url})
+    path = str(tmpdir.join("notes.txt"))
+    assert attachment.download(path)
+    with open(path, "rb") as downloaded:
+        assert downloaded.read() == b"stored in Wrike"
+    assert responses.calls[0].request.url == url  # requested as is, not below the API endpoint
+    assert responses.calls[0].request.headers['Authorization'].startswith("Bearer ")
+
+
+@responses.activate
+def test_attachment_download_resume(pryke, tmpdir):
+    """
+    download method of Attachment object resuming an interrupted download.
+
+    Args:
+        pryke (pryke.Pryke):  Pryke instance with OAuth client mocked.
+        tmpdir:  Temporary directory.
+    """
+    def callback(request):
+        assert request.headers['Range'] == "bytes=4-"
+        return 206, {}, b"456789"
+
+    responses.add_callback(responses.GET, 'https://example.com/file.bin', callback=callback)
+    attachment = Attachment(pryke, data={'id': 'EXTERNAL', 'type': 'Box', 'size': 10,
+                                         'url': 'https://example.com/file.bin'})
+
+    path = str(tmpdir.join("file.bin"))
+    with open(path, "wb") as partial:
+        partial.write(b"0123")
+
+    reported = []
+    assert attachment.download(path, chunk_size=2, resume=True, verify_size=True,
+                               progress=lambda done, total: reported.append((done, total)))
+    with open(path, "rb") as downloaded:
+        assert downloaded.read() == b"0123456789"
+    assert reported == [(6, 10), (8, 10), (10, 10)]
+
+
+@responses.activate
+def test_attachment_download_verify_size(pryke):
+    """
+    download method of Attachment object writing to a file object and checking the size.
+
+    Args:
+        pryke (pryke.Pryke):  Pryke instance with OAuth client mocked.
+    """
+    responses.add(responses.GET, 'https://example.com/file.bin', body=b"short", status=200)
+    attachment = Attachment(pryke, data={'id': 'EXTERNAL', 'type': 'Box', 'size': 10,
+                                         'url': 'https://example.com/file.bin'})
+    output = io.BytesIO()
+    assert attachment.download(output)
+    assert output.getvalue() == b"short"
+    assert not attachment.download(io.BytesIO(), verify_size=True)
+
+
 @responses.activate
 def test_attachment_task(attachment):
     """
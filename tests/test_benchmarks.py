@@ -0,0 +1,38 @@
+from benchmarks.server import FakeWrike
+from benchmarks.suite import METRICS, client, load_baselines, regressions, run, save_baselines
+from pryke import Task
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def insecure_transport(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')  # the fake server speaks plain HTTP
+
+
+def test_fake_wrike_pagination():
+    with FakeWrike(tasks=25, throttle_every=3) as fake:
+        pryke = client(fake)
+        tasks = list(pryke.tasks(page_size=10))
+        assert [task.id for task in tasks] == ["TASK{:08d}".format(index) for index in range(25)]
+        assert all(isinstance(task, Task) for task in tasks)
+        assert fake.requests == 4  # three pages and one throttled retry
+        assert [user.id for user in pryke.users(["USER000001", "USER000002"])] == ["USER000001", "USER000002"]
+
+
+def test_run_and_baselines(tmpdir):
+    results = run(tasks=50, users=20, requests=5, page_size=20, repeat=1)
+    assert set(results) == {metric.name for metric in METRICS}
+    assert all(value > 0 for value in results.values())
+
+    path = str(tmpdir.join("baselines.json"))
+    assert load_baselines(path) == {}
+    save_baselines(results, {'tasks': 50}, path)
+    baselines = load_baselines(path)
+    assert baselines['requests_per_second'] == pytest.approx(results['requests_per_second'], rel=1e-3)
+
+    assert regressions(results, baselines) == []
+    slower = dict(results, pagination_per_second=baselines['pagination_per_second'] / 2)
+    assert [metric.name for metric, _, _ in regressions(slower, baselines)] == ['pagination_per_second']
+    bigger = dict(results, memory_per_100k_objects=baselines['memory_per_100k_objects'] * 2)
+    assert [metric.name for metric, _, _ in regressions(bigger, baselines)] == ['memory_per_100k_objects']
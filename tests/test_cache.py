@@ -0,0 +1,47 @@
+from pryke import ObjectCache, Task, User
+
+import time
+
+
+def test_cache_add(pryke):
+    cache = ObjectCache()
+    u = User(pryke, data={'id': 'KUAJ25LD', 'type': 'Person'})
+    assert cache.add(u) is u
+    assert cache.get(User, 'KUAJ25LD') is u
+    assert cache.get(Task, 'KUAJ25LD') is None  # keyed by type as well as ID
+
+
+def test_cache_invalidate(pryke):
+    cache = ObjectCache()
+    cache.add(User(pryke, data={'id': 'KUAJ25LD', 'type': 'Person'}))
+    cache.add(User(pryke, data={'id': 'KUAJ25LE', 'type': 'Person'}))
+    cache.add(Task(pryke, data={'id': 'IEAGIITRKQAYHYM6'}))
+
+    cache.invalidate(User, 'KUAJ25LD')
+    assert cache.get(User, 'KUAJ25LD') is None
+    assert len(cache) == 2
+
+    cache.invalidate(User)
+    assert len(cache) == 1
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_cache_lru(pryke):
+    cache = ObjectCache(max_size=2)
+    cache.add(User(pryke, data={'id': 'A', 'type': 'Person'}))
+    cache.add(User(pryke, data={'id': 'B', 'type': 'Person'}))
+    cache.get(User, 'A')  # A is now the most recently used
+    cache.add(User(pryke, data={'id': 'C', 'type': 'Person'}))
+    assert cache.get(User, 'B') is None
+    assert cache.get(User, 'A') is not None
+    assert cache.get(User, 'C') is not None
+
+
+def test_cache_ttl(pryke):
+    cache = ObjectCache(ttl=0.05)
+    cache.add(User(pryke, data={'id': 'KUAJ25LD', 'type': 'Person'}))
+    assert cache.get(User, 'KUAJ25LD') is not None
+    time.sleep(0.1)
+    assert cache.get(User, 'KUAJ25LD') is None
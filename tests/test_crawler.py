@@ -0,0 +1,85 @@
+from benchmarks.server import EPOCH, FakeWrike
+from pryke import Pryke, PrykeError
+from pryke.crawler import Crawler
+
+import datetime
+import json
+import os
+import pytest
+
+
+def crawler(fake, **kwargs):
+    return Crawler("", "", access_token="crawler", endpoint=fake.endpoint, rate_limit=None, shard_days=1,
+                   until=EPOCH + datetime.timedelta(days=2), **kwargs)
+
+
+def read(path):
+    with open(path) as jsonl_file:
+        return [json.loads(line) for line in jsonl_file]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')  # the fake server speaks plain HTTP
+    with FakeWrike(tasks=2000, folders=10) as server:
+        yield server
+
+
+def test_crawler_shards(fake):
+    client = crawler(fake, processes=0)
+    shards = client.shards(Pryke("", "", access_token="crawler", endpoint=fake.endpoint), "ACCOUNT0")
+    assert [shard['id'] for shard in shards] == ["folders:FOLDER000000", "folders:FOLDER000001",
+                                                 "tasks:2017-01-01T00:00:00Z", "tasks:2017-01-02T00:00:00Z"]
+    assert len(shards[1]['folder_ids']) == 9
+    assert shards[3]['end'] == "2017-01-02T23:59:59Z"
+
+
+def test_crawler_run(fake, tmpdir):
+    progress = []
+    paths = crawler(fake, processes=2).run("ACCOUNT0", str(tmpdir), progress=lambda *args: progress.append(args))
+
+    tasks = read(paths['tasks'])
+    assert sorted(task['id'] for task in tasks) == ["TASK{:08d}".format(index) for index in range(2000)]
+    assert len(read(paths['comments'])) == 2000
+    assert len(read(paths['folders'])) == 10
+    assert read(paths['attachments']) == []
+    assert [done for done, total, shard in progress] == [1, 2, 3, 4]
+    assert all(total == 4 for done, total, shard in progress)
+
+
+def test_crawler_resume(fake, tmpdir):
+    class Interrupted(Exception):
+        pass
+
+    def interrupt(done, total, shard):
+        if done == 3:
+            with open(os.path.join(str(tmpdir), "tasks.jsonl"), "a") as tasks_file:
+                tasks_file.write('{"id": "PARTIAL"}\n')  # written by a shard that never finished
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        crawler(fake, processes=0).run("ACCOUNT0", str(tmpdir), progress=interrupt)
+
+    requests = fake.requests
+    paths = crawler(fake, processes=0).run("ACCOUNT0", str(tmpdir))
+    assert fake.requests - requests < 1000  # only the last shard is crawled again
+    assert sorted(task['id'] for task in read(paths['tasks'])) == ["TASK{:08d}".format(index) for index in range(2000)]
+
+    with pytest.raises(ValueError):
+        crawler(fake, processes=0).run("ACCOUNT1", str(tmpdir))
+
+
+def test_crawler_failed_shard(fake, tmpdir):
+    fake.errors["tasks/TASK00001500/comments"] = 500  # in the second day of tasks
+    with pytest.raises(PrykeError):
+        crawler(fake, processes=2).run("ACCOUNT0", str(tmpdir))
+
+    with open(os.path.join(str(tmpdir), "checkpoint.json")) as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    assert "tasks:2017-01-02T00:00:00Z" not in checkpoint['done']  # left pending
+    assert len(checkpoint['done']) == 3
+    assert len(read(os.path.join(str(tmpdir), "tasks.jsonl"))) == 1440
+
+    fake.errors.clear()
+    paths = crawler(fake, processes=0).run("ACCOUNT0", str(tmpdir))
+    assert sorted(task['id'] for task in read(paths['tasks'])) == ["TASK{:08d}".format(index) for index in range(2000)]
@@ -1,6 +1,8 @@
 from pryke import Attachment, Folder, User
 from tests import add_response
 
+import json
+import os
 import responses
 
 
@@ -19,6 +21,39 @@ def test_folder_attachments(folder):
     assert attachment.id == "IEAGIITRIYACEGSM"
 
 
+@responses.activate
+def test_folder_export_attachments(pryke, tmpdir):
+    """
+    export_attachments method of Folder object.
+
+    Args:
+        pryke (pryke.Pryke):  Pryke instance with OAuth client mocked.
+        tmpdir:  Temporary directory.
+    """
+    urls = ['https://www.wrike.com/attachments/ATTACH0/download/file0.txt',  # stored in Wrike
+            'https://www.wrike.com/attachments/ATTACH1/download/file1.txt',
+            'https://example.com/file2.txt']  # stored in Box
+    body = {"kind": "attachments", "data": [
+        {"id": "ATTACH{}".format(i), "name": "file{}.txt".format(i), "version": 1, "type": "Box" if i == 2 else "Wrike",
+         "size": 4, "url": url} for i, url in enumerate(urls)]}
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/folders/EXPORT/attachments',
+                  body=json.dumps(body), status=200, content_type="application/json")
+    for url in urls:
+        responses.add(responses.GET, url, body=b"data", status=200)
+
+    folder = Folder(pryke, data={'id': 'EXPORT'})
+    directory = str(tmpdir)
+    paths = folder.export_attachments(directory, workers=3)
+    assert paths == [os.path.join(directory, "ATTACH{}_v1_file{}.txt".format(i, i)) for i in range(3)]
+    assert all(os.path.getsize(path) == 4 for path in paths)
+    assert len(responses.calls) == 4
+    assert "withUrls=true" in responses.calls[0].request.url
+    assert sorted(call.request.url for call in responses.calls[1:]) == sorted(urls)
+
+    assert folder.export_attachments(directory) == paths
+    assert len(responses.calls) == 5  # files already present are not downloaded again
+
+
 def test_folder_children(folder):
     """
     children method of Folder object.
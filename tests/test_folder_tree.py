@@ -0,0 +1,94 @@
+from pryke import Folder, FolderTree
+from tests import add_response
+
+import pytest
+import responses
+
+
+@pytest.fixture
+def tree(pryke):
+    """
+    Root
+    |-- A
+    |   |-- A1
+    |   `-- Shared
+    `-- B
+        `-- Shared
+    """
+    return FolderTree([
+        Folder(pryke, data={'id': 'ROOT', 'childIds': ['A', 'B']}),
+        Folder(pryke, data={'id': 'A', 'childIds': ['A1', 'SHARED']}),
+        Folder(pryke, data={'id': 'A1', 'childIds': ['MISSING']}),
+        Folder(pryke, data={'id': 'B', 'childIds': ['SHARED']}),
+        Folder(pryke, data={'id': 'SHARED'}),
+    ])
+
+
+def test_folder_tree_descendants(tree):
+    assert tree.roots == ['ROOT']
+    assert [f.id for f in tree.descendants('ROOT')] == ['A', 'A1', 'SHARED', 'B']
+    assert [f.id for f in tree.descendants('A')] == ['A1', 'SHARED']
+    assert tree.descendants('SHARED') == []
+    assert [f.id for f in tree.children('A')] == ['A1', 'SHARED']
+
+
+def test_folder_tree_is_descendant(tree):
+    assert tree.is_descendant('A1', 'ROOT')
+    assert tree.is_descendant('SHARED', 'A')
+    assert tree.is_descendant('SHARED', 'B')  # placed in two parents
+    assert not tree.is_descendant('A1', 'B')
+    assert not tree.is_descendant('ROOT', 'A')
+    assert not tree.is_descendant('A', 'A')
+
+
+def test_folder_tree_path(tree):
+    assert [f.id for f in tree.path('A1')] == ['ROOT', 'A', 'A1']
+    assert [f.id for f in tree.parents('SHARED')] == ['A', 'B']
+    assert 'MISSING' not in tree
+    assert len(tree) == 5
+
+
+def test_folder_tree_deep(pryke):
+    folders = [Folder(pryke, data={'id': str(i), 'childIds': [str(i + 1)]}) for i in range(5000)]
+    tree = FolderTree(folders)  # deeper than the recursion limit
+    assert tree.is_descendant('4999', '0')
+    assert len(tree.path('4999')) == 5000
+
+
+@responses.activate
+def test_pryke_folder_tree(pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/folders')
+    tree = pryke.folder_tree()
+    assert set(tree.roots) == {'IEAGIITRI7777777', 'IEAGIITRI7777776'}
+    assert tree.is_descendant('IEAGIITRI4AYHYMV', 'IEAGIITRI7777777')
+    assert len(responses.calls) == 1
+
+
+def test_folder_tree_diamonds(pryke):
+    # 19 diamonds in a chain: every folder of the lower diamonds is reachable through 2 ** n paths
+    folders = []
+    for i in range(19):
+        top, left, right = str(i), "L{}".format(i), "R{}".format(i)
+        folders += [Folder(pryke, data={'id': top, 'childIds': [left, right]}),
+                    Folder(pryke, data={'id': left, 'childIds': [str(i + 1)]}),
+                    Folder(pryke, data={'id': right, 'childIds': [str(i + 1)]})]
+    folders.append(Folder(pryke, data={'id': '19'}))
+    tree = FolderTree(folders)
+
+    assert len(tree._order) == len(folders)  # shared subtrees are toured once
+    assert len(tree.descendants('0')) == len(folders) - 1
+    assert {f.id for f in tree.descendants('R17')} == {'18', 'L18', 'R18', '19'}
+    assert tree.is_descendant('19', 'R0')  # only through second parents
+    assert tree.is_descendant('L5', 'R3')
+    assert not tree.is_descendant('L3', 'R3')
+    assert not tree.is_descendant('0', '19')
+
+
+def test_folder_tree_wide(pryke):
+    child_ids = ["C{}".format(i) for i in range(40000)]
+    folders = [Folder(pryke, data={'id': 'ROOT', 'childIds': child_ids})]
+    folders += [Folder(pryke, data={'id': child_id, 'parentIds': ['ROOT']}) for child_id in child_ids]
+    tree = FolderTree(folders)  # edges given from both sides are deduplicated in constant time
+    assert len(tree.children('ROOT')) == 40000
+    assert tree.parents('C39999')[0].id == 'ROOT'
+    assert tree.is_descendant('C39999', 'ROOT')
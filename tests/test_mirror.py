@@ -0,0 +1,85 @@
+from pryke import Comment, Folder, Pryke, Task, User
+from pryke.mirror import Mirror
+from tests import add_response
+
+import datetime
+import os
+import pytest
+import re
+import responses
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'api', 'v3')
+
+
+@pytest.fixture
+def mirror(pryke):
+    m = Mirror(pryke)
+    m.upsert([
+        Folder(pryke, data={'id': 'FOLDER1', 'accountId': 'IEAGIITR', 'title': 'Root'}),
+        Folder(pryke, data={'id': 'FOLDER2', 'accountId': 'IEAGIITR', 'title': 'Child', 'parentIds': ['FOLDER1']}),
+        Task(pryke, data={'id': 'TASK1', 'status': 'Active', 'parentIds': ['FOLDER2'], 'responsibleIds': ['USER1'],
+                          'updatedDate': '2016-10-03T16:10:45Z'}),
+        Task(pryke, data={'id': 'TASK2', 'status': 'Completed', 'parentIds': ['FOLDER2'],
+                          'responsibleIds': ['USER1', 'USER2'], 'updatedDate': '2016-10-04T16:10:45Z'}),
+        Task(pryke, data={'id': 'TASK3', 'status': 'Active', 'parentIds': ['FOLDER1'], 'responsibleIds': ['USER2'],
+                          'updatedDate': '2016-10-05T16:10:45Z'}),
+        User(pryke, data={'id': 'USER1', 'type': 'Person', 'firstName': 'Ann'}),
+        Comment(pryke, data={'id': 'COMMENT1', 'taskId': 'TASK1', 'authorId': 'USER1', 'text': 'Hello'}),
+    ])
+    yield m
+    m.close()
+
+
+def test_mirror_tasks(mirror):
+    tasks = mirror.tasks(responsible_id='USER1', status='Active', folder_id='FOLDER2')
+    assert [t.id for t in tasks] == ['TASK1']
+    assert isinstance(tasks[0], Task)
+    assert [t.id for t in mirror.tasks(folder_id='FOLDER1')] == ['TASK3']
+    assert [t.id for t in mirror.tasks(folder_id='FOLDER1', descendants=True)] == ['TASK3', 'TASK2', 'TASK1']
+
+    assert [t.id for t in mirror.tasks(responsible_id='USER2')] == ['TASK3', 'TASK2']  # most recently updated first
+    assert [t.id for t in mirror.tasks(updated_after=datetime.datetime(2016, 10, 4))] == ['TASK3', 'TASK2']
+
+    mirror.upsert([Task(mirror.client, data={'id': 'TASK1', 'status': 'Completed', 'responsibleIds': ['USER2']})])
+    assert mirror.tasks(responsible_id='USER1', status='Active') == []  # links are replaced on update
+
+
+def test_mirror_lookups(mirror):
+    assert mirror.task('TASK1').updated_date == datetime.datetime(2016, 10, 3, 16, 10, 45)
+    assert mirror.user('USER1').first_name == 'Ann'
+    assert mirror.task('MISSING') is None
+    assert [f.id for f in mirror.folders(parent_id='FOLDER1')] == ['FOLDER2']
+    assert [f.id for f in mirror.folders(parent_id='FOLDER1', descendants=True)] == ['FOLDER2']
+    assert [c.text for c in mirror.comments(task_id='TASK1')] == ['Hello']
+    assert mirror.attachments() == []
+
+
+@responses.activate
+def test_mirror_load():
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/folders')
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/tasks')
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/attachments')
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/users/KUAJ25LD')
+    with open(os.path.join(DATA, 'tasks', 'IEAGIITRKQAYHYM6', 'comments.json')) as body_file:
+        responses.add(responses.GET, re.compile(r'https://www.wrike.com/api/v3/tasks/\w+/comments'),
+                      body=body_file.read(), status=200, content_type="application/json")
+    pryke = Pryke("", "", access_token="blah", rate_limit=None)  # attachments are read in 30-day windows since 2016
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR')
+    account = pryke.account('IEAGIITR')
+    m = Mirror(pryke)
+    assert m.load(account) > 0
+    assert [c.id for c in m.comments(task_id='IEAGIITRKQAYHYM6')] == ['IEAGIITRIMBEVLZE', 'IEAGIITRIMBEVLZG']
+    assert len(m.attachments()) == 3
+    assert m.user('KUAJ25LD') is not None  # authors of comments and attachments
+    user_calls = [call for call in responses.calls if '/users/' in call.request.url]
+    assert len(user_calls) == 1  # looked up in one batch
+    assert m.folder('IEAGIITRI4AYHYMV') is not None
+    children = m.folders(parent_id='IEAGIITRI7777777')  # linked through the childIds of the folder tree
+    assert [f.id for f in children] == ['IEAGIITRI4AYHYMV']
+    assert len(m.folders(account_id='IEAGIITR')) == 3
+    assert all(t.account_id == 'IEAGIITR' for t in m.tasks())
+
+    requests = len(responses.calls)
+    assert Mirror(pryke).load(account, kinds=("folders",)) == 3
+    assert len(responses.calls) == requests + 1  # nothing else is fetched
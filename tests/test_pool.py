@@ -0,0 +1,70 @@
+from pryke import Account, PrykePool, Task
+
+import json
+import pytest
+import re
+import responses
+
+
+ACCOUNTS = {"Bearer tokenA": ["AAAAAAAA", "CCCCCCCC"], "Bearer tokenB": ["BBBBBBBB", "CCCCCCCC"]}
+
+
+def accounts_callback(request):
+    data = [{"id": account_id} for account_id in ACCOUNTS[request.headers["Authorization"]]]
+    return 200, {}, json.dumps({"kind": "accounts", "data": data})
+
+
+def tasks_callback(request):
+    task_id = request.url.rsplit("/", 1)[-1]
+    return 200, {}, json.dumps({"kind": "tasks", "data": [{"id": task_id}]})
+
+
+@pytest.fixture
+def pool():
+    return PrykePool.from_tokens("", "", ["tokenA", "tokenB"])
+
+
+def test_pool_requires_clients():
+    with pytest.raises(ValueError):
+        PrykePool([])
+
+
+@responses.activate
+def test_pool_routes_by_account(pool):
+    responses.add_callback(responses.GET, "https://www.wrike.com/api/v3/accounts", callback=accounts_callback,
+                           content_type="application/json")
+    responses.add_callback(responses.GET, re.compile(r"https://www.wrike.com/api/v3/tasks/\w+"),
+                           callback=tasks_callback, content_type="application/json")
+
+    assert {account_id: len(clients) for account_id, clients in pool.discover().items()} == \
+        {"AAAAAAAA": 1, "BBBBBBBB": 1, "CCCCCCCC": 2}
+
+    task = pool.task("AAAAAAAAKQAYHYM4")
+    assert isinstance(task, Task)
+    assert task.instance is pool.clients[0]
+    assert responses.calls[-1].request.headers["Authorization"] == "Bearer tokenA"
+    assert pool.task("BBBBBBBBKQAYHYM4").instance is pool.clients[1]
+
+    shared = {pool.task("CCCCCCCCKQAYHYM{}".format(index)).instance for index in range(4)}
+    assert shared == set(pool.clients)  # work on a shared account is spread over both tokens
+
+    pool.clients[0].limiter.pause(60)  # e.g. after a 429 response
+    assert all(pool.client("CCCCCCCC") is pool.clients[1] for _ in range(3))
+    assert pool.client("AAAAAAAA") is pool.clients[0]  # the only token with access
+
+
+@responses.activate
+def test_pool_accounts_and_tasks(pool):
+    responses.add_callback(responses.GET, "https://www.wrike.com/api/v3/accounts", callback=accounts_callback,
+                           content_type="application/json")
+    for account_id in ["AAAAAAAA", "BBBBBBBB", "CCCCCCCC"]:
+        responses.add(responses.GET, "https://www.wrike.com/api/v3/accounts/{}/tasks".format(account_id),
+                      body=json.dumps({"kind": "tasks", "data": [{"id": account_id + "KQAYHYM4"}]}),
+                      content_type="application/json")
+
+    accounts = list(pool.accounts())
+    assert sorted(account.id for account in accounts) == ["AAAAAAAA", "BBBBBBBB", "CCCCCCCC"]
+    assert all(isinstance(account, Account) for account in accounts)
+
+    assert sorted(task.id for task in pool.tasks()) == ["AAAAAAAAKQAYHYM4", "BBBBBBBBKQAYHYM4", "CCCCCCCCKQAYHYM4"]
+    assert [task.instance for task in pool.tasks(account_id="BBBBBBBB")] == [pool.clients[1]]
@@ -1,10 +1,18 @@
 from tests import add_response
-from pryke import __version__, Account, Attachment, Comment, Contact, Folder, Group, Task, User
-from urllib.parse import urlparse
+from pryke import (__version__, Account, Attachment, Comment, Contact, Folder, Group, Pryke, PrykeError, RateLimiter,
+                   Task, User, iter_json_items)
+from urllib.parse import parse_qs, urlparse
 
 import datetime
+import json
+import os
+import pytest
+import re
 import responses
+import subprocess
+import sys
 import time
+import zipfile
 
 
 @responses.activate
@@ -83,6 +91,61 @@ def test_pryke_contacts(pryke):
     assert contact.id == "KUAJ25LD"
 
 
+@responses.activate
+def test_pryke_export_tasks(tmpdir):
+    client = Pryke("", "", access_token="blah")
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks')
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/users/KUAJ25LD')
+    data = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'api', 'v3', 'tasks', 'IEAGIITRKQAYHYM6')
+    for kind in ['comments', 'attachments']:
+        with open(os.path.join(data, kind + '.json')) as body_file:
+            responses.add(responses.GET, re.compile(r'https://www.wrike.com/api/v3/tasks/\w+/' + kind),
+                          body=body_file.read(), status=200, content_type="application/json")
+    tasks = list(client.tasks())
+
+    paths = client.export_tasks(tasks, directory=str(tmpdir.join("export")), workers=2, batch_size=1)
+    assert paths == [str(tmpdir.join("export", "{}.html".format(task.id))) for task in tasks]
+    with open(paths[0]) as export_file:
+        assert tasks[0].title in export_file.read()
+    assert len([call for call in responses.calls if '/users/' in call.request.url]) == 1  # authors batched once
+
+    archive = str(tmpdir.join("export.zip"))
+    assert client.export_tasks(tasks, archive=archive) == ["{}.html".format(task.id) for task in tasks]
+    with zipfile.ZipFile(archive) as zip_file:
+        assert sorted(zip_file.namelist()) == sorted("{}.html".format(task.id) for task in tasks)
+
+    with pytest.raises(ValueError):
+        client.export_tasks(tasks)
+
+
+def test_pryke_lazy_imports():
+    code = "import sys, pryke; print(sorted(m for m in ('asyncio', 'jinja2', 'requests_oauthlib') if m in sys.modules))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=root)
+    assert output.decode().strip() == "[]"
+
+
+def test_pryke_precompile_templates(tmpdir):
+    client = Pryke("", "", access_token="blah", template_cache=str(tmpdir.join("templates")))
+    assert client._templates is None  # nothing is compiled until templates are used
+    templates = client.precompile_templates(["task.html"])
+    assert templates[0].name == "task.html"
+    assert tmpdir.join("templates").listdir()  # bytecode stored for other processes
+
+    other = Pryke("", "", access_token="blah", template_cache=str(tmpdir.join("templates")))
+    assert other.templates.get_template("task.html").name == "task.html"
+
+
+@responses.activate
+def test_pryke_fetch_many(pryke):
+    pryke.invalidate()
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks/IEAGIITRKQAYHYM6')
+    tasks = pryke.fetch_many("tasks", ['IEAGIITRKQAYHYM6', 'IEAGIITRKQAYHYM6'], workers=2)
+    assert len(tasks) == 2  # one result per requested ID
+    assert all(isinstance(t, Task) for t in tasks)
+    assert len(responses.calls) == 1
+
+
 @responses.activate
 def test_pryke_folder(pryke):
     add_response(responses.GET, 'https://www.wrike.com/api/v3/folders/IEAGIITRI4AYHYMV')
@@ -105,24 +168,94 @@ def test_pryke_get(pryke):
         rsps.add(responses.GET, "https://www.wrike.com/api/v3/folders", body="{}", status=200,
                       content_type="application/json")
         rsps.add(responses.GET, "https://www.wrike.com/api/v3/tasks", body="{}", status=429,
-                      content_type="application/json")
+                      content_type="application/json", headers={"Retry-After": "1"})
+        rsps.add(responses.GET, "https://www.wrike.com/api/v3/tasks", body="{}", status=503,
+                      content_type="application/json", headers={"Retry-After": "1"})
         rsps.add(responses.GET, "https://www.wrike.com/api/v3/tasks", body="{}", status=429,
-                      content_type="application/json")
-        rsps.add(responses.GET, "https://www.wrike.com/api/v3/tasks", body="{}", status=429,
-                      content_type="application/json")
+                      content_type="application/json", headers={"Retry-After": "1"})
         rsps.add(responses.GET, "https://www.wrike.com/api/v3/tasks", body="{}", status=200,
                       content_type="application/json")
         r = pryke.get("folders", params={"cat": "mouse"})
         assert "?cat=mouse" in r.request.url  # params are passed
         start = time.perf_counter()
         r = pryke.get("tasks", params={"dog": "bone"})
-        assert 32 > time.perf_counter()-start > 28  # should throttle for ~30 seconds
+        assert 4 > time.perf_counter()-start > 2.9  # honours Retry-After for each throttled response
         assert r.status_code == 200  # eventually succeeds
         assert "?dog=bone" in r.request.url  # params are passed still
         assert "Pryke" in r.request.headers['User-Agent']
         assert __version__ in r.request.headers['User-Agent']
 
 
+def test_pryke_get_backoff():
+    client = Pryke("", "", access_token="blah", max_retries=2)
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        for _ in range(3):
+            rsps.add(responses.GET, "https://www.wrike.com/api/v3/tasks", body="{}", status=429,
+                     content_type="application/json")
+        start = time.perf_counter()
+        r = client.get("tasks")
+        assert 3 > time.perf_counter()-start >= 1  # backs off 0.5-1s, then 1-2s
+        assert r.status_code == 429  # gives up after max_retries
+        assert len(rsps.calls) == 3
+
+
+def test_pryke_get_rate_limit():
+    client = Pryke("", "", access_token="blah", limiter=RateLimiter(rate_limit=600, burst=2))
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://www.wrike.com/api/v3/version", body="{}", status=200,
+                 content_type="application/json")
+        start = time.perf_counter()
+        for _ in range(5):
+            client.get("version")
+        assert time.perf_counter()-start > 0.25  # 2 requests in a burst, then one every 0.1s
+
+
+@responses.activate
+def test_pryke_stats():
+    client = Pryke("", "", access_token="blah")
+    calls = []
+    client.hooks['before_request'].append(lambda path, params: calls.append(('before', path)))
+    client.hooks['after_request'].append(lambda path, params, response, seconds: calls.append(
+        ('after', path, response.status_code, seconds >= 0)))
+
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks/IEAGIITRKQAYHYM6')
+    responses.add(responses.GET, "https://www.wrike.com/api/v3/version", body="{}", status=429,
+                  content_type="application/json", headers={"Retry-After": "0"})
+    responses.add(responses.GET, "https://www.wrike.com/api/v3/version", body="{}", status=200,
+                  content_type="application/json")
+    client.task('IEAGIITRKQAYHYM6')
+    client.task('IEAGIITRKQAYHYM6')
+    client.get("version")
+
+    assert calls == [('before', 'tasks/IEAGIITRKQAYHYM6'), ('after', 'tasks/IEAGIITRKQAYHYM6', 200, True),
+                     ('before', 'version'), ('after', 'version', 200, True)]
+
+    stats = client.stats()
+    assert stats['requests'] == 3
+    assert stats['retries'] == 1 and stats['throttled'] == 1 and stats['errors'] == 1
+    assert stats['bytes'] > 0
+    assert stats['object_cache']['hits'] == 1 and stats['object_cache']['misses'] == 1
+    assert set(stats['endpoints']) == {'tasks/{id}', 'version'}
+    assert stats['endpoints']['version']['latency']['+Inf'] == 2
+
+    text = client.prometheus()
+    assert 'pryke_requests_total{endpoint="tasks/{id}"} 1' in text
+    assert 'pryke_request_duration_seconds_bucket{endpoint="version",le="+Inf"} 2' in text
+    assert 'pryke_retries_total{endpoint="version"} 1' in text
+    assert 'pryke_object_cache_hits_total 1' in text
+
+    for name in ["a.txt", "b.txt"]:
+        url = "https://www.wrike.com/attachments/IEAGIITRIYACEGSL/download/{}".format(name)
+        responses.add(responses.GET, url, body=b"file", status=200)
+        client.get(url)
+    endpoints = client.stats()['endpoints']
+    assert set(endpoints) == {'tasks/{id}', 'version', 'download'}  # one series for every downloaded file
+    assert endpoints['download']['requests'] == 2
+
+    client.metrics.reset()
+    assert client.stats()['requests'] == 0
+
+
 @responses.activate
 def test_pryke_group(pryke):
     add_response(responses.GET, 'https://www.wrike.com/api/v3/groups/KX7ZHLB5')
@@ -131,6 +264,85 @@ def test_pryke_group(pryke):
     assert g.id == "KX7ZHLB5"
 
 
+@responses.activate
+def test_pryke_invalidate(pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/users/KUAJ25LD')
+    pryke.invalidate()
+    u = pryke.user('KUAJ25LD')
+    assert pryke.user('KUAJ25LD') is u  # served from the cache
+    assert len(responses.calls) == 1
+
+    pryke.invalidate(User, 'KUAJ25LD')
+    assert pryke.user('KUAJ25LD') is not u
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_pryke_load_authors(pryke):
+    pryke.invalidate(User)
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/comments')
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/users/KUAJ25LD')
+    comments = pryke.load_authors(pryke.comments())
+    assert all(isinstance(comment.author, User) for comment in comments)
+    assert len(responses.calls) == 2  # one for the comments, one for all of their authors
+
+
+@responses.activate
+def test_pryke_map(pryke):
+    pryke.invalidate()
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/users/KUAJ25LD')
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks/IEAGIITRKQAYHYM6')
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/folders/BOGUS', body=ValueError("connection reset"))
+
+    results = pryke.map(lambda fn: fn(), [lambda: pryke.user('KUAJ25LD'),
+                                           lambda: pryke.folder('BOGUS'),
+                                           lambda: pryke.task('IEAGIITRKQAYHYM6')], workers=3)
+    assert isinstance(results[0], User)
+    assert isinstance(results[1], ValueError)  # errors are collected, not raised
+    assert isinstance(results[2], Task)
+
+
+@responses.activate
+def test_pryke_paginate(pryke):
+    pages = {
+        None: {"kind": "tasks", "nextPageToken": "PAGE2", "data": [{"id": "TASK1"}, {"id": "TASK2"}]},
+        "PAGE2": {"kind": "tasks", "nextPageToken": "PAGE3", "data": [{"id": "TASK3"}]},
+        "PAGE3": {"kind": "tasks", "data": [{"id": "TASK4"}]},
+    }
+
+    def callback(request):
+        query = parse_qs(urlparse(request.url).query)
+        assert query['pageSize'] == ['2']
+        token = query.get('nextPageToken', [None])[0]
+        return 200, {}, json.dumps(pages[token])
+
+    responses.add_callback(responses.GET, 'https://www.wrike.com/api/v3/tasks', callback=callback,
+                           content_type="application/json")
+
+    tasks = list(pryke.tasks(page_size=2))
+    assert [t.id for t in tasks] == ["TASK1", "TASK2", "TASK3", "TASK4"]
+    assert all(isinstance(t, Task) for t in tasks)
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_pryke_paginate_error(pryke):
+    error = {"errorDescription": "Parameter 'status' value is invalid", "error": "invalid_parameter"}
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/tasks', json=error, status=400)
+    for stream in [False, True]:
+        with pytest.raises(PrykeError) as info:
+            list(pryke.tasks(status="Bogus", stream=stream))
+        assert info.value.response.status_code == 400
+        assert info.value.error == "invalid_parameter"
+        assert "value is invalid" in str(info.value)
+
+    client = Pryke("", "", access_token="blah", max_retries=0)
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/tasks', body="Too Many Requests",
+                  status=429)
+    with pytest.raises(PrykeError):
+        list(client.paginate("accounts/IEAGIITR/tasks", Task))  # throttled past the retries
+
+
 @responses.activate
 def test_pryke_task(pryke):
     add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks/IEAGIITRKQAYHYM6')
@@ -139,6 +351,15 @@ def test_pryke_task(pryke):
     assert t.id == 'IEAGIITRKQAYHYM6'
 
 
+@responses.activate
+def test_pryke_task_fields(pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks/IEAGIITRKQAYHYM6')
+    t = pryke.task('IEAGIITRKQAYHYM6', fields=["recurrent"])
+    assert t.id == 'IEAGIITRKQAYHYM6'
+    assert json.loads(parse_qs(urlparse(responses.calls[0].request.url).query)['fields'][0]) == ["recurrent"]
+    assert pryke.task('IEAGIITRKQAYHYM6', fields=["recurrent"]) is not t  # not served from the cache
+
+
 @responses.activate
 def test_pryke_tasks(pryke):
     add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks')
@@ -150,6 +371,111 @@ def test_pryke_tasks(pryke):
     assert t.id == "IEAGIITRKQAYHYM5"
 
 
+def test_iter_json_items():
+    body = json.dumps({"kind": "tasks", "nextPageToken": "PAGE2",
+                       "data": [{"id": "TASK1", "title": "caf\u00e9"}, 12345, [1, 2.5], None], "count": 4},
+                      ensure_ascii=False).encode()
+    header = {}
+    items = iter_json_items((body[i:i + 1] for i in range(len(body))), header=header)
+    assert next(items) == {"id": "TASK1", "title": "caf\u00e9"}
+    assert header == {"kind": "tasks", "nextPageToken": "PAGE2"}
+    assert list(items) == [12345, [1, 2.5], None]
+    assert header["count"] == 4
+
+    assert list(iter_json_items([b'{"data": []}'])) == []
+    assert list(iter_json_items([b' {} '])) == []
+    with pytest.raises(ValueError):
+        list(iter_json_items([b'{"data": [{"id": 1}']))
+
+
+@responses.activate
+def test_pryke_paginate_stream(pryke):
+    pages = {
+        None: {"kind": "tasks", "nextPageToken": "PAGE2", "data": [{"id": "TASK1"}, {"id": "TASK2"}]},
+        "PAGE2": {"kind": "tasks", "data": [{"id": "TASK3"}]},
+    }
+
+    def callback(request):
+        token = parse_qs(urlparse(request.url).query).get('nextPageToken', [None])[0]
+        return 200, {}, json.dumps(pages[token])
+
+    responses.add_callback(responses.GET, 'https://www.wrike.com/api/v3/tasks', callback=callback,
+                           content_type="application/json")
+
+    tasks = list(pryke.tasks(stream=True))
+    assert [t.id for t in tasks] == ["TASK1", "TASK2", "TASK3"]
+    assert all(isinstance(t, Task) for t in tasks)
+    assert len(responses.calls) == 2
+    assert list(pryke.tasks(stream=True, raw=('id',)))[-1] == ("TASK3",)
+
+
+@responses.activate
+def test_pryke_tasks_raw(pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks')
+    records = list(pryke.tasks(raw=True))
+    assert all(isinstance(record, dict) for record in records)
+    assert records[-1]['id'] == "IEAGIITRKQAYHYM5"
+
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks')
+    rows = list(pryke.tasks(raw=('id', 'missing')))
+    assert rows[-1] == ("IEAGIITRKQAYHYM5", None)
+
+
+@responses.activate
+def test_pryke_json_loads(pryke):
+    decoded = []
+
+    def loads(content):
+        decoded.append(content)
+        return json.loads(content)
+
+    pryke.json_loads = loads
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks')
+    assert list(pryke.tasks())
+    assert len(decoded) == 1 and isinstance(decoded[0], bytes)
+
+
+@responses.activate
+def test_pryke_tasks_filters(pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks')
+    list(pryke.tasks(status="Active", responsibles=["KUAJ25LD"], descendants=False, sort_field="UpdatedDate",
+                     updated_date={"start": datetime.datetime(2016, 10, 1)}, fields=["recurrent"]))
+    query = parse_qs(urlparse(responses.calls[0].request.url).query)
+    assert query['status'] == ["Active"]
+    assert json.loads(query['responsibles'][0]) == ["KUAJ25LD"]
+    assert query['descendants'] == ["false"]
+    assert query['sortField'] == ["UpdatedDate"]
+    assert json.loads(query['updatedDate'][0]) == {"start": "2016-10-01T00:00:00Z"}
+    assert json.loads(query['fields'][0]) == ["recurrent"]
+
+    with pytest.raises(TypeError):
+        list(pryke.tasks(colour="red"))
+
+
+@responses.activate
+def test_pryke_tasks_by_id(pryke):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/tasks/IEAGIITRKQAYHYM6')
+    tasks = list(pryke.tasks_by_id(['IEAGIITRKQAYHYM6', 'IEAGIITRKQAYHYM6']))
+    assert len(tasks) == 1  # duplicate IDs are requested once
+    assert isinstance(tasks[0], Task)
+    assert tasks[0].id == 'IEAGIITRKQAYHYM6'
+
+
+def test_pryke_transport():
+    client = Pryke("", "", access_token="blah", pool_connections=2, pool_maxsize=32, keep_alive=False, timeout=5)
+    for session in (client.oauth, client.session):
+        adapter = session.get_adapter("https://www.wrike.com/")
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 32
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://www.wrike.com/api/v3/version", body="{}", status=200,
+                 content_type="application/json")
+        r = client.get("version")
+        assert r.request.headers['Connection'] == 'close'
+        assert rsps.calls[0].request.req_kwargs['timeout'] == 5
+
+
 @responses.activate
 def test_pryke_user(pryke):
     add_response(responses.GET, 'https://www.wrike.com/api/v3/users/KUAJ25LD')
@@ -158,6 +484,52 @@ def test_pryke_user(pryke):
     assert u.id == "KUAJ25LD"
 
 
+@responses.activate
+def test_pryke_user_errors():
+    client = Pryke("", "", access_token="blah", max_retries=0)
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/users/MISSING', json={"error": "not_found"}, status=404)
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/users/BUSY', json={"error": "rate_limit_exceeded"},
+                  status=429)
+    assert client.user('MISSING') is None
+    with pytest.raises(PrykeError):
+        client.user('BUSY')  # throttled past the retries
+
+
+@responses.activate
+def test_pryke_users(pryke):
+    user_ids = ["USER{:04d}".format(i) for i in range(150)]
+    for chunk in (user_ids[:100], user_ids[100:]):
+        body = {"kind": "users", "data": [{"id": user_id, "type": "Person"} for user_id in chunk]}
+        responses.add(responses.GET, 'https://www.wrike.com/api/v3/users/{}'.format(",".join(chunk)),
+                      body=json.dumps(body), status=200, content_type="application/json")
+
+    users = list(pryke.users(user_ids))
+    assert len(responses.calls) == 2  # 150 users in two requests
+    assert [u.id for u in users] == user_ids
+    assert all(isinstance(u, User) for u in users)
+
+
+@responses.activate
+def test_pryke_users_errors():
+    client = Pryke("", "", access_token="blah", max_retries=0)
+
+    def callback(request):
+        user_ids = urlparse(request.url).path.split("/")[-1].split(",")
+        if "BAD" in user_ids:
+            return 400 if len(user_ids) > 1 else 404, {}, json.dumps({"error": "invalid_request"})
+        if "BUSY" in user_ids:
+            return 429, {}, json.dumps({"error": "rate_limit_exceeded"})
+        return 200, {}, json.dumps({"kind": "users", "data": [{"id": user_id} for user_id in user_ids]})
+
+    responses.add_callback(responses.GET, re.compile(r'https://www.wrike.com/api/v3/users/.*'), callback=callback,
+                           content_type="application/json")
+
+    assert [u.id for u in client.users(["USER1", "BAD", "USER2"])] == ["USER1", "USER2"]  # found one by one
+    assert len(responses.calls) == 4
+    with pytest.raises(PrykeError):
+        list(client.users(["USER3", "BUSY"]))
+
+
 @responses.activate
 def test_pryke_version(pryke):
     add_response(responses.GET, 'https://www.wrike.com/api/v3/version')
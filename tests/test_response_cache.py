@@ -0,0 +1,68 @@
+from pryke import Pryke, ResponseCache
+
+import json
+import pytest
+import responses
+
+
+@pytest.fixture
+def http_cache(tmpdir):
+    cache = ResponseCache(str(tmpdir.join("responses.sqlite")), ttls={"users": 3600})
+    yield cache
+    cache.close()
+
+
+def user_body(first_name):
+    return json.dumps({"kind": "users", "data": [{"id": "KUAJ25LD", "type": "Person", "firstName": first_name}]})
+
+
+@responses.activate
+def test_response_cache_ttl(http_cache):
+    client = Pryke("", "", access_token="blah", http_cache=http_cache)
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/users/KUAJ25LD', body=user_body("Ann"), status=200,
+                  content_type="application/json")
+
+    assert client.get("users/KUAJ25LD").json()['data'][0]['firstName'] == "Ann"
+    assert client.get("users/KUAJ25LD").json()['data'][0]['firstName'] == "Ann"
+    assert len(responses.calls) == 1  # second response served from the cache
+
+
+@responses.activate
+def test_response_cache_revalidate(http_cache):
+    client = Pryke("", "", access_token="blah", http_cache=http_cache)
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/folders', body='{"data": []}', status=200,
+                  content_type="application/json", headers={"ETag": '"v1"'})
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/folders', status=304)
+
+    client.get("folders")
+    r = client.get("folders")
+    assert responses.calls[1].request.headers['If-None-Match'] == '"v1"'
+    assert r.status_code == 200
+    assert r.json() == {"data": []}
+
+
+@responses.activate
+def test_response_cache_offline(http_cache):
+    client = Pryke("", "", access_token="blah", http_cache=http_cache)
+    responses.add(responses.GET, 'https://www.wrike.com/api/v3/users/KUAJ25LD', body=user_body("Ann"), status=200,
+                  content_type="application/json")
+    client.get("users/KUAJ25LD")
+
+    offline = Pryke("", "", access_token="blah",
+                    http_cache=ResponseCache(http_cache.path, offline=True))
+    assert offline.user("KUAJ25LD").first_name == "Ann"
+    assert offline.get("folders").status_code == 504
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_response_cache_eviction(tmpdir):
+    cache = ResponseCache(str(tmpdir.join("responses.sqlite")), ttl=3600, max_entries=2)
+    client = Pryke("", "", access_token="blah", http_cache=cache)
+    for name in ("folders", "tasks", "comments"):
+        responses.add(responses.GET, 'https://www.wrike.com/api/v3/{}'.format(name), body='{"data": []}',
+                      status=200, content_type="application/json")
+        client.get(name)
+
+    assert len(cache) == 2
+    assert cache.get('https://www.wrike.com/api/v3/folders') == (None, None)  # least recently used
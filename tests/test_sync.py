@@ -0,0 +1,41 @@
+from pryke import Folder, Sync, Task
+from tests import add_response
+from urllib.parse import parse_qs, urlparse
+
+import datetime
+import json
+import responses
+
+
+@responses.activate
+def test_sync_changes(pryke, account, tmpdir):
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/folders')
+    add_response(responses.GET, 'https://www.wrike.com/api/v3/accounts/IEAGIITR/tasks')
+    state_path = str(tmpdir.join("sync.json"))
+
+    events = list(Sync(pryke, state_path).changes(accounts=[account]))
+    assert {event.kind for event in events} == {"folders", "tasks"}
+    assert all(isinstance(event.object, Task if event.kind == "tasks" else Folder) for event in events)
+    assert all(event.account_id == "IEAGIITR" for event in events)
+    assert "updatedDate" not in urlparse(responses.calls[-1].request.url).query  # first run reads everything
+
+    with open(state_path) as state_file:
+        mark = json.load(state_file)["IEAGIITR"]["tasks"]
+    assert mark == max(e.object._data['updatedDate'] for e in events if e.kind == "tasks")
+
+    list(Sync(pryke, state_path, kinds=("tasks",)).changes(accounts=[account]))
+    query = parse_qs(urlparse(responses.calls[-1].request.url).query)
+    assert json.loads(query['updatedDate'][0]) == {"start": mark}  # resumes from the saved mark
+
+    list(Sync(pryke, state_path, kinds=("folders",)).changes(accounts=[account]))
+    query = parse_qs(urlparse(responses.calls[-1].request.url).query)
+    start = datetime.datetime.strptime(json.loads(query['updatedDate'][0])["start"], "%Y-%m-%dT%H:%M:%SZ")
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    assert now - start < datetime.timedelta(minutes=6)  # folder trees carry no updatedDate
+
+
+def test_sync_reset(pryke, tmpdir):
+    sync = Sync(pryke, str(tmpdir.join("sync.json")))
+    sync.state = {"IEAGIITR": {"tasks": "2016-10-03T16:10:45Z"}, "OTHER": {}}
+    sync.reset("IEAGIITR")
+    assert Sync(pryke, sync.state_path).state == {"OTHER": {}}
@@ -1,6 +1,7 @@
-from pryke import Account, Attachment, Comment, Task
+from pryke import Account, Attachment, Comment, Task, parse_date
 from tests import add_response
 
+import datetime
 import os
 import responses
 
@@ -83,3 +84,41 @@ def test_task_repr(task):
     value = repr(task)
     assert "Task" in value
     assert task.id in value
+
+
+def test_task_slots(pryke):
+    """
+    Task objects keep their fields in the API data only.
+
+    Args:
+        pryke (Pryke):  Pryke instance with OAuth client mocked.
+    """
+    data = {'id': 'IEAGIITRKQAYHYM6', 'title': 'Test task'}
+    t = Task(pryke, data=data)
+    assert not hasattr(t, '__dict__')
+    assert t.title == 'Test task'
+    assert t.responsible_ids is None
+
+    t.title = 'Renamed'
+    assert data['title'] == 'Renamed'
+
+
+def test_task_dates(pryke):
+    """
+    Date fields of Task object are parsed on first access.
+
+    Args:
+        pryke (Pryke):  Pryke instance with OAuth client mocked.
+    """
+    t = Task(pryke, data={'id': 'IEAGIITRKQAYHYM6', 'createdDate': '2016-10-03T16:10:41Z'})
+    assert t._dates is None  # nothing parsed yet
+    assert t.created_date == datetime.datetime(2016, 10, 3, 16, 10, 41)
+    assert t.created_date is t.created_date  # parsed once
+    assert t.completed_date is None
+
+    t.completed_date = datetime.datetime(2016, 10, 4, 9, 0, 0)
+    assert t._data['completedDate'] == '2016-10-04T09:00:00Z'
+    assert t.completed_date == datetime.datetime(2016, 10, 4, 9, 0, 0)
+
+    assert parse_date('2016-10-03T16:10:41Z') == datetime.datetime.strptime('2016-10-03T16:10:41Z',
+                                                                            '%Y-%m-%dT%H:%M:%SZ')
@@ -0,0 +1,98 @@
+from pryke import FileTokenStore, MemoryTokenStore, Pryke
+
+import json
+import pytest
+import responses
+import time
+
+
+def token(access_token, refresh_token, expires_in):
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer",
+            "expires_in": expires_in, "expires_at": time.time() + expires_in}
+
+
+def add_token_response(access_token, refresh_token):
+    responses.add(responses.POST, "https://www.wrike.com/oauth2/token", status=200, content_type="application/json",
+                  body=json.dumps({"access_token": access_token, "refresh_token": refresh_token,
+                                   "token_type": "bearer", "expires_in": 3600}))
+
+
+def add_version_response(status=200):
+    responses.add(responses.GET, "https://www.wrike.com/api/v3/version", body='{"data": []}', status=status,
+                  content_type="application/json")
+
+
+def test_pryke_not_interactive():
+    with pytest.raises(ValueError):
+        Pryke("id", "secret", interactive=False)
+
+
+@responses.activate
+def test_pryke_refresh_before_expiry():
+    store = MemoryTokenStore()
+    client = Pryke("id", "secret", token=token("old", "refresh1", 60), token_store=store)
+    add_token_response("new", "refresh2")
+    add_version_response()
+
+    client.get("version")
+    assert len(responses.calls) == 2
+    assert "refresh_token=refresh1" in responses.calls[0].request.body
+    assert "client_secret=secret" in responses.calls[0].request.body
+    assert responses.calls[1].request.headers["Authorization"] == "Bearer new"
+    assert store.load()["refresh_token"] == "refresh2"
+
+    client.get("version")
+    assert len(responses.calls) == 3  # the new token is not refreshed again
+
+
+@responses.activate
+def test_pryke_refresh_forced():
+    store = MemoryTokenStore()
+    client = Pryke("id", "secret", token=token("valid", "refresh1", 3600), token_store=store)
+    add_token_response("new", "refresh2")
+
+    assert client.refresh()["access_token"] == "new"  # refreshed although the token is still valid
+    assert len(responses.calls) == 1
+    assert client.oauth.access_token == "new"
+
+
+@responses.activate
+def test_pryke_refresh_on_unauthorized():
+    client = Pryke("id", "secret", token=token("revoked", "refresh1", 3600))
+    add_version_response(status=401)
+    add_token_response("new", "refresh2")
+    add_version_response()
+
+    response = client.get("version")
+    assert response.status_code == 200
+    assert [call.request.method for call in responses.calls] == ["GET", "POST", "GET"]
+    assert responses.calls[2].request.headers["Authorization"] == "Bearer new"
+
+
+@responses.activate
+def test_pryke_refresh_on_unauthorized_without_retries():
+    client = Pryke("id", "secret", token=token("revoked", "refresh1", 3600), max_retries=0)
+    add_version_response(status=401)
+    add_token_response("new", "refresh2")
+    add_version_response()
+
+    assert client.get("version").status_code == 200  # sent again although throttled requests are not retried
+    assert [call.request.method for call in responses.calls] == ["GET", "POST", "GET"]
+
+
+@responses.activate
+def test_file_token_store_shared(tmpdir):
+    path = str(tmpdir.join("token.json"))
+    first = Pryke("id", "secret", token=token("old", "refresh1", 60), token_store=FileTokenStore(path))
+    second = Pryke("id", "secret", token_store=FileTokenStore(path))
+    assert second.oauth.access_token == "old"  # picked up from the file
+
+    add_token_response("new", "refresh2")
+    add_version_response()
+    first.get("version")
+    with open(path) as token_file:
+        assert json.load(token_file)["access_token"] == "new"
+
+    second.get("version")  # adopts the token the first client refreshed instead of refreshing again
+    assert [call.request.method for call in responses.calls] == ["POST", "GET", "GET"]
+    assert responses.calls[2].request.headers["Authorization"] == "Bearer new"